@@ -5,7 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 
 # Database
-from database.connection import DBSessionDep
+from database.connection import AsyncDBSessionDep
 
 # Dependencies
 from apps.auth.utils import authenticate_user, get_access_token, DBCurrentUserDep
@@ -34,10 +34,10 @@ Sign-in
 @router.post("/signin")
 async def signin(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ) -> Token:
 
-    user = authenticate_user(form_data.username, form_data.password, db = db)
+    user = await authenticate_user(form_data.username, form_data.password, db = db)
     if not user:
         raise HTTPException(
             status_code = status.HTTP_401_UNAUTHORIZED,
@@ -50,11 +50,11 @@ async def signin(
 @router.post('/signup')
 async def signup(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ) -> UserBase:
 
     try:
-        user = Users.create_user(user_data = form_data, db = db)
+        user = await Users.create_user(user_data = form_data, db = db)
     except:
         raise
 
@@ -64,10 +64,10 @@ async def signup(
 async def update_password(
     form_data: PasswordForm,
     current_user: DBCurrentUserDep,
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ) -> dict[str, bool]:
 
-    if not authenticate_user(username = current_user.username, password = form_data.old_password.get_secret_value(), db = db):
+    if not await authenticate_user(username = current_user.username, password = form_data.old_password.get_secret_value(), db = db):
         raise HTTPException(
             status_code = status.HTTP_401_UNAUTHORIZED,
             detail = "A senha inserida é inválida"
@@ -80,7 +80,7 @@ async def update_password(
         )
 
     try:
-        user = Users.update_password(
+        user = await Users.update_password(
             user = current_user,
             password = form_data.new_password.get_secret_value(),
             db = db
@@ -3,7 +3,7 @@ from typing import Annotated
 from config import settings
 
 from fastapi import Depends, HTTPException, status
-from database.connection import DBSessionDep
+from database.connection import AsyncDBSessionDep
 
 # JWT utils
 import jwt
@@ -13,7 +13,9 @@ from jwt.exceptions import InvalidTokenError
 import bcrypt
 
 # Database
-from sqlmodel import select, Session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import selectinload
 
 # Dependencies
 from .dependencies import oauth2_scheme
@@ -42,12 +44,12 @@ def get_password_hash(password):
 '''
 ''  Authentication
 '''
-def authenticate_user(
+async def authenticate_user(
     username: str,
     password: str,
-    db: Session
+    db: AsyncSession
 ):    
-    user = get_user_by_username(username = username, db = db)
+    user = await get_user_by_username(username = username, db = db)
     
     if not user:
         return False
@@ -81,18 +83,19 @@ def get_access_token(user):
 '''
 ''  Get Users
 '''
-def get_user_by_username(
+async def get_user_by_username(
     username: str,
-    db: Session
+    db: AsyncSession
 ) -> User:
-    query = select(User).where(User.username == username)
-    user = db.exec(query).first()
+    # role é usado pelas policies em toda requisição autenticada
+    query = select(User).where(User.username == username).options(selectinload(User.role))
+    user = (await db.exec(query)).first()
 
     return user if user is not None else False
     
-def get_current_user(
+async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 )-> User:
     credentials_exception = HTTPException(
         status_code = status.HTTP_401_UNAUTHORIZED,
@@ -111,7 +114,7 @@ def get_current_user(
     except InvalidTokenError:
         raise credentials_exception
     
-    user = get_user_by_username(username = token_data.username, db = db)
+    user = await get_user_by_username(username = token_data.username, db = db)
     if not user:
         raise credentials_exception
     
@@ -0,0 +1,32 @@
+# Base
+from fastapi import APIRouter, Depends
+
+# Database
+from database.pool import pool_metrics
+from database.instrumentation import query_report
+
+# Utils
+from policies.utils import Authorizer
+
+router = APIRouter(
+    prefix = '/internal',
+    tags = ['internal'],
+    responses = { 404: {'description': 'Não encontrado'} },
+)
+
+'''
+Pool de conexões
+'''
+@router.get("/pool", dependencies=[Depends(Authorizer('internal', 'read'))])
+async def read_pool_metrics() -> dict[str, dict]:
+    return { name: metrics.snapshot() for name, metrics in pool_metrics.items() }
+
+'''
+Queries por requisição
+'''
+@router.get("/queries", dependencies=[Depends(Authorizer('internal', 'read'))])
+async def read_query_report() -> dict:
+    return {
+        'rotas': query_report.routes,
+        'n_plus_one': list(query_report.flagged),
+    }
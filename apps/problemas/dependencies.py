@@ -1,12 +1,19 @@
 from typing import Annotated
 from fastapi import Depends
+from sqlalchemy.orm import selectinload
 from database.schemas.problemas import Problema, Tag, Evento, Sugestao
 from database.utils import ModelGetter
+from database.loaders import loader_options
+from apps.problemas.models.responses import ProblemaFullResponse
 
-ProblemaDep = Annotated[Problema, Depends(ModelGetter(Problema))]
+# relacionamentos de ProblemaFullResponse (uploaders também é usado pelas policies)
+ProblemaDep = Annotated[Problema, Depends(ModelGetter(Problema, options = loader_options(Problema, ProblemaFullResponse)))]
 
 EventoDep = Annotated[Evento, Depends(ModelGetter(Evento))]
 
 TagDep = Annotated[Tag, Depends(ModelGetter(Tag))]
 
-SugestaoDep = Annotated[Sugestao, Depends(ModelGetter(Sugestao))]
+SugestaoDep = Annotated[Sugestao, Depends(ModelGetter(Sugestao, options = [
+    selectinload(Sugestao.autor),
+    selectinload(Sugestao.problema).selectinload(Problema.uploaders),
+]))]
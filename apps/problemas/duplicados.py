@@ -0,0 +1,187 @@
+import asyncio
+import heapq
+import logging
+import re
+import time
+import unicodedata
+
+from sqlmodel import select
+
+from config import settings
+from database.connection import AsyncDBSessionDep, async_session_maker
+from database.schemas.problemas import Problema
+from apps.problemas.lsh import LSHIndex, OnePermutationHash, estimate
+
+'''
+''  Detecção de problemas quase duplicados
+''
+''  titulo + enunciado normalizados viram shingles de SHINGLE caracteres
+''  (resistentes a trocas de palavras e pequenas edições); a assinatura
+''  MinHash (one permutation hashing, barata para centenas de shingles)
+''  vai para um LSH de 16 bandas x 4 linhas, com limiar perto de
+''  0.5. Um problema novo só é comparado com quem divide bucket com ele e o
+''  lote varre os buckets, nunca todos os pares do catálogo.
+'''
+SHINGLE = 5
+LIMIAR_DUPLICADO = 0.5
+
+# membros de um bucket comparados com cada problema dele em clusters()
+REPRESENTANTES_POR_BUCKET = 8
+
+_nao_alfanumerico = re.compile(r'[^a-z0-9]+')
+
+def normalizar(texto: str) -> str:
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return _nao_alfanumerico.sub(' ', texto).strip()
+
+def shingles(titulo: str | None, enunciado: str | None) -> set[str]:
+    texto = normalizar(' '.join(parte for parte in (titulo, enunciado) if parte))
+    if len(texto) <= SHINGLE:
+        return { texto } if texto else set()
+    return { texto[i:i + SHINGLE] for i in range(len(texto) - SHINGLE + 1) }
+
+class DuplicateIndex:
+    '''
+    Assinaturas em memória, reconstruídas do primário no primeiro uso e a cada
+    DUPLICADOS_TTL segundos; create/update/importar/delete deste worker
+    atualizam o índice na hora. O create não espera a reconstrução: usa o
+    índice carregado e agenda a recarga em background.
+    '''
+    def __init__(self, ttl: float, num_bins: int = 64, bands: int = 16):
+        self.ttl = ttl
+        self.minhash = OnePermutationHash(num_bins, seed = 2)
+        self.bands = bands
+        self.rows = num_bins // bands
+        self.index = LSHIndex(bands, self.rows)
+        self.loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+        self._recarga: asyncio.Task | None = None
+        self._pendentes: list[tuple[str, tuple]] | None = None # manutenção durante a reconstrução
+
+    @property
+    def carregado(self) -> bool:
+        return self.loaded_at is not None
+
+    def _valido(self) -> bool:
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl
+
+    async def ensure_loaded(self, db: AsyncDBSessionDep):
+        if self._valido():
+            return
+
+        async with self._lock:
+            if self._valido():
+                return
+
+            # set_problema/remove_problema chamados durante a leitura e o _build
+            # valem para o índice antigo: são gravados e reaplicados no novo
+            self._pendentes = []
+            try:
+                # primário: o create que agendou esta recarga pode ainda não estar na réplica
+                db.info['primary'] = True
+                linhas = (await db.exec(select(Problema.id, Problema.titulo, Problema.enunciado))).all()
+                # as assinaturas do catálogo todo levam segundos: fora do event loop
+                index = await asyncio.to_thread(self._build, linhas)
+
+                pendentes, self._pendentes = self._pendentes, None
+                self.index = index
+                for metodo, args in pendentes:
+                    getattr(self, metodo)(*args)
+                self.loaded_at = time.monotonic()
+            finally:
+                self._pendentes = None
+
+    def recarregar_em_background(self):
+        '''Agenda a reconstrução (sessão própria) se o índice venceu e nenhuma está em andamento.'''
+        if self._recarga is None and not self._valido():
+            self._recarga = asyncio.create_task(self._recarregar())
+
+    async def _recarregar(self):
+        try:
+            async with async_session_maker() as db:
+                await self.ensure_loaded(db)
+        except Exception:
+            logging.exception("Falha ao reconstruir o índice de duplicados")
+        finally:
+            self._recarga = None
+
+    def _build(self, linhas: list[tuple[int, str | None, str | None]]) -> LSHIndex:
+        index = LSHIndex(self.bands, self.rows)
+        for id, titulo, enunciado in linhas:
+            index.insert(id, self.minhash.signature(shingles(titulo, enunciado)))
+        return index
+
+    # manutenção
+    def set_problema(self, problema_id: int, titulo: str | None, enunciado: str | None):
+        if self._pendentes is not None:
+            self._pendentes.append(('set_problema', (problema_id, titulo, enunciado)))
+        self.index.insert(problema_id, self.minhash.signature(shingles(titulo, enunciado)))
+
+    def remove_problema(self, problema_id: int):
+        if self._pendentes is not None:
+            self._pendentes.append(('remove_problema', (problema_id,)))
+        self.index.remove(problema_id)
+
+    # consulta
+    def candidatos(self, problema_id: int, limiar: float = LIMIAR_DUPLICADO, k: int = 10) -> list[tuple[int, float]]:
+        '''Até k possíveis duplicatas de 'problema_id' com similaridade estimada >= limiar.'''
+        signature = self.index.signatures.get(problema_id)
+        if signature is None:
+            return []
+
+        pontuados = (
+            (id, estimate(signature, self.index.signatures[id]))
+            for id in self.index.candidates(signature) if id != problema_id
+        )
+        return heapq.nlargest(k, (item for item in pontuados if item[1] >= limiar), key = lambda item: (item[1], -item[0]))
+
+    def clusters(self, limiar: float = LIMIAR_DUPLICADO) -> list[list[int]]:
+        '''
+        Grupos de possíveis duplicatas, do maior para o menor. O agrupamento
+        é transitivo (union-find): A~B e A~C põem B e C no mesmo grupo mesmo
+        que B e C fiquem abaixo do limiar, e um grupo pode juntar problemas
+        bem diferentes por uma cadeia de semelhantes.
+
+        Em cada bucket, cada membro é comparado só com até
+        REPRESENTANTES_POR_BUCKET representantes (um por grupo já visto no
+        bucket), não com todos os outros: buckets grandes custam O(n), não
+        O(n²). Um membro que não alcança nenhum representante de um bucket
+        cheio ainda pode se juntar por outra banda.
+        '''
+        pais: dict[int, int] = {}
+        signatures = self.index.signatures
+
+        def raiz(id: int) -> int:
+            pais.setdefault(id, id)
+            while pais[id] != id:
+                pais[id] = pais[pais[id]]
+                id = pais[id]
+            return id
+
+        for bucket in self.index.groups():
+            representantes: list[int] = []
+            for id in sorted(bucket):
+                grupo = raiz(id)
+                # já no grupo de um representante (por este ou outro bucket)
+                if any(raiz(representante) == grupo for representante in representantes):
+                    continue
+
+                for representante in representantes:
+                    if estimate(signatures[representante], signatures[id]) >= limiar:
+                        pais[grupo] = raiz(representante)
+                        break
+                else:
+                    if len(representantes) < REPRESENTANTES_POR_BUCKET:
+                        representantes.append(id)
+
+        grupos: dict[int, list[int]] = {}
+        for id in pais:
+            grupos.setdefault(raiz(id), []).append(id)
+
+        return sorted(
+            (sorted(grupo) for grupo in grupos.values() if len(grupo) > 1),
+            key = lambda grupo: (-len(grupo), grupo[0])
+        )
+
+duplicate_index = DuplicateIndex(ttl = settings.DUPLICADOS_TTL)
@@ -0,0 +1,62 @@
+import json
+import time
+from collections import OrderedDict
+
+from config import settings
+from database.invalidation import on_write
+
+'''
+''  Cache das facetas de Problema
+''
+''  Chave: filtros normalizados. Limpo a cada commit que escreve nas tabelas
+''  agregadas (escritas deste worker) e expirado por TTL (escritas de outros).
+'''
+FACETAS_TABLES = ('problema', 'problema_tag', 'tag', 'evento')
+
+# parâmetros de ProblemaListQueryParams que mudam as contagens: só eles entram
+# na chave (paginação, ordenação, total, fields e resumo não)
+FACETAS_FILTROS = frozenset({
+    'titulo', 'categoria', 'enunciado', 'autor', 'dificuldade',
+    'limite_tempo_inf', 'limite_tempo_sup', 'limite_memoria_inf', 'limite_memoria_sup',
+    'eventos', 'tags', 'tags_expr', 'q',
+})
+
+class FacetasCache:
+    def __init__(self, ttl: float, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    @staticmethod
+    def key(filtros: dict) -> str:
+        '''Mesma chave para os mesmos filtros, independente da ordem das listas.'''
+        normalized = {
+            name: sorted(value) if isinstance(value, list) else value
+            for name, value in filtros.items()
+            if value is not None
+        }
+        return json.dumps(normalized, sort_keys = True, default = str)
+
+    def clear(self, tables: set[str] | None = None):
+        self._entries.clear()
+
+    def get(self, key: str) -> dict | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, facetas = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        return facetas
+
+    def set(self, key: str, facetas: dict):
+        self._entries[key] = (time.monotonic() + self.ttl, facetas)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last = False)
+
+facetas_cache = FacetasCache(ttl = settings.FACETAS_CACHE_TTL)
+on_write(FACETAS_TABLES, facetas_cache.clear)
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+from typing import IO, Iterator
+
+from pydantic import ValidationError
+
+from apps.problemas.models.requests import ProblemaImport
+
+'''
+''  Leitura de arquivos de importação de problemas
+''
+''  JSONL: um objeto por linha com os campos de ProblemaCreate, 'evento'
+''  (título) e 'tags' (lista de nomes).
+''  CSV: cabeçalho com os mesmos campos; 'tags' separadas por ';'.
+'''
+FORMATOS = ('jsonl', 'csv')
+SEPARADOR_TAGS = ';'
+
+def formato_do_arquivo(nome: str | None) -> str | None:
+    if not nome:
+        return None
+
+    extensao = nome.rsplit('.', 1)[-1].lower()
+    if extensao in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    if extensao == 'csv':
+        return 'csv'
+
+    return None
+
+def _jsonl(texto: IO[str]) -> Iterator[tuple[int, dict | str]]:
+    for numero, linha in enumerate(texto, start = 1):
+        if not linha.strip():
+            continue
+        try:
+            registro = json.loads(linha)
+        except json.JSONDecodeError as error:
+            yield numero, f"JSON inválido: {error.msg}"
+            continue
+
+        if not isinstance(registro, dict):
+            yield numero, "Esperado um objeto JSON"
+            continue
+
+        yield numero, registro
+
+def _csv(texto: IO[str]) -> Iterator[tuple[int, dict | str]]:
+    reader = csv.DictReader(texto)
+    for registro in reader:
+        # célula vazia é ausência de valor, não string vazia
+        registro = { campo: valor for campo, valor in registro.items() if campo and valor not in (None, '') }
+        if 'tags' in registro:
+            registro['tags'] = [nome.strip() for nome in registro['tags'].split(SEPARADOR_TAGS) if nome.strip()]
+        yield reader.line_num, registro
+
+def ler(arquivo: IO[bytes], formato: str) -> Iterator[tuple[int, ProblemaImport | str]]:
+    '''
+    (número da linha, problema validado ou mensagem de erro), sem carregar
+    o arquivo inteiro na memória.
+    '''
+    texto = io.TextIOWrapper(arquivo, encoding = 'utf-8-sig', newline = '')
+    registros = _jsonl(texto) if formato == 'jsonl' else _csv(texto)
+
+    for numero, registro in registros:
+        if isinstance(registro, str):
+            yield numero, registro
+            continue
+
+        try:
+            yield numero, ProblemaImport.model_validate(registro)
+        except ValidationError as error:
+            yield numero, '; '.join(
+                '.'.join(str(parte) for parte in detalhe['loc']) + ': ' + detalhe['msg']
+                for detalhe in error.errors()
+            )
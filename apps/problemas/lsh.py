@@ -0,0 +1,146 @@
+import hashlib
+import random
+from array import array
+from collections import Counter
+from typing import Iterable, Iterator
+
+'''
+''  MinHash e LSH
+''
+''  A assinatura MinHash de um conjunto guarda, para cada permutação, o
+''  menor hash dos seus elementos; a fração de posições iguais entre duas
+''  assinaturas estima a similaridade de Jaccard dos conjuntos. O LSH divide
+''  a assinatura em bandas e indexa cada banda num bucket: conjuntos
+''  parecidos caem juntos em ao menos uma banda com alta probabilidade, e a
+''  consulta só olha quem divide bucket com ela.
+'''
+MERSENNE = (1 << 61) - 1
+
+def token_hash(token: str) -> int:
+    '''Hash estável entre processos (o hash() do Python muda a cada execução).'''
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size = 8).digest(), 'little')
+
+class MinHash:
+    '''Permutações (a*x + b) mod p fixadas pela seed: assinaturas comparáveis entre workers.'''
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.permutations = [(rng.randrange(1, MERSENNE), rng.randrange(0, MERSENNE)) for _ in range(num_perm)]
+
+    def signature(self, tokens: Iterable[str]) -> array:
+        '''Assinatura do conjunto (uint64 compactos); vazia para o conjunto vazio.'''
+        hashes = [token_hash(token) for token in set(tokens)]
+        if not hashes:
+            return array('Q')
+
+        return array('Q', [min([(a * h + b) % MERSENNE for h in hashes]) for a, b in self.permutations])
+
+class OnePermutationHash:
+    '''
+    MinHash com um único hash por elemento (one permutation hashing): o hash
+    escolhe o bin e o resto dele disputa o mínimo do bin. Custa O(elementos +
+    bins) em vez de O(elementos x permutações), para conjuntos grandes como
+    shingles de texto. Bins vazios copiam o próximo bin preenchido à direita
+    (densificação por rotação), deslocado pela distância, para que posições
+    iguais continuem estimando Jaccard.
+    '''
+    HASH_BITS = 56
+
+    def __init__(self, num_bins: int = 64, seed: int = 1):
+        self.num_bins = num_bins
+        self.key = seed.to_bytes(8, 'little')
+        self.offset = (1 << self.HASH_BITS) // num_bins + 1
+
+    def signature(self, tokens: Iterable[str]) -> array:
+        vazio = 1 << self.HASH_BITS
+        bins = [vazio] * self.num_bins
+        for token in set(tokens):
+            h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size = self.HASH_BITS // 8, key = self.key).digest(), 'little')
+            indice, valor = h % self.num_bins, h // self.num_bins
+            if valor < bins[indice]:
+                bins[indice] = valor
+
+        preenchidos = [i for i, valor in enumerate(bins) if valor != vazio]
+        if not preenchidos:
+            return array('Q')
+
+        # percorre da direita para a esquerda levando o último bin preenchido visto
+        proximo = preenchidos[0] + self.num_bins
+        for i in range(self.num_bins - 1, -1, -1):
+            if bins[i] != vazio:
+                proximo = i
+            else:
+                bins[i] = bins[proximo % self.num_bins] + (proximo - i) * self.offset
+
+        return array('Q', bins)
+
+def estimate(a: array, b: array) -> float:
+    '''Jaccard estimado: fração de posições iguais nas duas assinaturas.'''
+    if not a or not b:
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+def jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class LSHIndex:
+    '''
+    Buckets por banda: 'bands' bandas de 'rows' posições da assinatura.
+    Com similaridade s, a chance de dois conjuntos dividirem um bucket é
+    1 - (1 - s^rows)^bands; o limiar fica perto de (1/bands)^(1/rows).
+    '''
+    def __init__(self, bands: int, rows: int):
+        self.bands = bands
+        self.rows = rows
+        self.buckets: list[dict[int, set[int]]] = [{} for _ in range(bands)]
+        self.signatures: dict[int, array] = {}
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def __contains__(self, id: int) -> bool:
+        return id in self.signatures
+
+    def _keys(self, signature: array) -> Iterator[tuple[int, int]]:
+        for band in range(self.bands):
+            # hash da banda como chave: um int por bucket em vez de uma tupla
+            yield band, hash(tuple(signature[band * self.rows:(band + 1) * self.rows]))
+
+    def insert(self, id: int, signature: array):
+        self.remove(id)
+        if not signature:
+            return
+
+        self.signatures[id] = signature
+        for band, key in self._keys(signature):
+            self.buckets[band].setdefault(key, set()).add(id)
+
+    def remove(self, id: int):
+        signature = self.signatures.pop(id, None)
+        if signature is None:
+            return
+
+        for band, key in self._keys(signature):
+            bucket = self.buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(id)
+                if not bucket:
+                    del self.buckets[band][key]
+
+    def candidates(self, signature: array) -> Counter[int]:
+        '''Ids que dividem ao menos uma banda com 'signature', com o número de bandas em comum.'''
+        found = Counter()
+        if not signature:
+            return found
+
+        for band, key in self._keys(signature):
+            found.update(self.buckets[band].get(key, ()))
+        return found
+
+    def groups(self) -> Iterator[set[int]]:
+        '''Buckets com mais de um id: os pares candidatos do índice inteiro.'''
+        for buckets in self.buckets:
+            for bucket in buckets.values():
+                if len(bucket) > 1:
+                    yield bucket
@@ -1,6 +1,7 @@
 from database.schemas.problemas import ProblemaBase, EventoBase, TagBase, Status_Sugestao, SugestaoBase
 from sqlmodel import Field, SQLModel
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
+from typing import Literal
 
 class ProblemaCreate(BaseModel):
     titulo: str    = Field(default=None, max_length=255, min_length=3)
@@ -11,6 +12,10 @@ class ProblemaCreate(BaseModel):
     limite_tempo: int | None      = None
     limite_memoria_mb: int | None = None
 
+class ProblemaImport(ProblemaCreate):
+    evento: str | None = Field(default = None, max_length = 255) # título de um evento existente
+    tags: list[str] = [] # nomes de tags existentes
+
 class EventoCreate(EventoBase):
     titulo: str = Field(default = None, max_length = 255, min_length = 3)
 
@@ -59,11 +64,17 @@ class SugestaoRead(BaseModel):
 class ListCommonQueryParams(BaseModel):
     skip: int = Field(default= 0)
     limit: int = Field(default=100)
+    cursor: str | None = None # valor de X-Next-Cursor da página anterior; ignora skip
+    total: bool = False # devolve o total de registros filtrados em X-Total-Count
 
 class TagListQueryParams(ListCommonQueryParams):
     nome: str | None = Field(default=None)
+    ordenar: Literal['id', 'nome'] = 'id'
+    resumo: bool = False # registros enxutos, sem passar pelo ORM
 class EventoListQueryParams(ListCommonQueryParams):
     titulo: str | None = None
+    ordenar: Literal['id', 'titulo'] = 'id'
+    resumo: bool = False # registros enxutos, sem passar pelo ORM
 
 class ProblemaListQueryParams(ListCommonQueryParams):
     titulo: str | None = None
@@ -78,7 +89,15 @@ class ProblemaListQueryParams(ListCommonQueryParams):
     dificuldade: str | None = None
 
     eventos: list[str] = None
-    tags: list[str] = None
+    tags: list[str] = None # qualquer uma das tags
+    tags_expr: str | None = Field(default = None, max_length = 1000) # ex.: grafos & (dp | guloso) & !geometria
+
+    q: str | None = Field(default = None, max_length = 255) # busca textual em titulo e enunciado, ordenada por relevância
+
+    ordenar: Literal['id', 'titulo', 'categoria'] = 'id'
+
+    fields: str | None = Field(default = None, max_length = 500) # ex.: id,titulo,dificuldade; só esses campos são lidos e devolvidos
+    resumo: bool = False # colunas de ProblemaResumo, sem ORM nem relacionamentos; ignora fields
 
 class SugestaoListQueryParams(ListCommonQueryParams):
     problema_id: int | None = Field(default = None, gt = 0)
@@ -89,4 +108,20 @@ class SugestaoListQueryParams(ListCommonQueryParams):
     upvotes_limite_inf: int | None = None
     upvotes_limite_sup: int | None = None
     downvotes_limite_inf: int | None = None
-    downvotes_limite_sup: int | None = None
\ No newline at end of file
+    downvotes_limite_sup: int | None = None
+
+    ordenar: Literal['id'] = 'id'
+
+class SugestaoProblemaQueryParams(ListCommonQueryParams):
+    status: Status_Sugestao | None = Status_Sugestao.ativa
+    ordenar: Literal['id', 'score'] = 'id' # score: limite inferior de Wilson, maior primeiro
+class TagsEmLote(BaseModel):
+    tags: list[int] = Field(min_length = 1) # ids das tags
+    problemas: list[int] | None = None # ids dos problemas...
+    filtro: ProblemaListQueryParams | None = None # ...ou os problemas que a listagem retornaria (sem paginação)
+
+    @model_validator(mode = 'after')
+    def check_alvo(self):
+        if self.problemas is None and self.filtro is None:
+            raise ValueError("Informe 'problemas' ou 'filtro'")
+        return self
@@ -30,11 +30,47 @@ class ProblemaFullResponse(ProblemaBase):
     tags: list[TagSingleResponse] | None
     # sugestoes: list['SugestoesResponse']
 
+class ImportacaoErro(BaseModel):
+    linha: int
+    erro: str
+
+class ImportacaoResponse(BaseModel):
+    inseridos: int
+    erros: list[ImportacaoErro]
+
+class ProblemaSimilarResponse(BaseModel):
+    problema: ProblemaSingleResponse
+    similaridade: float # 0 a 1: tags em comum, categoria e dificuldade
+
+class ProblemaDuplicadoResponse(BaseModel):
+    id: int
+    titulo: str
+    similaridade: float # Jaccard estimado dos shingles de titulo + enunciado
+
+class ProblemaCreateResponse(ProblemaFullResponse):
+    duplicados: list[ProblemaDuplicadoResponse] = [] # possíveis duplicatas já cadastradas
+
+class DuplicadosClusterResponse(BaseModel):
+    problemas: list[ProblemaDuplicadoResponse] # similaridade em relação ao primeiro
+
+class TagsEmLoteResponse(BaseModel):
+    problemas: int # problemas selecionados
+    alterados: int # vínculos criados ou removidos
+    tags_nao_encontradas: list[int]
+
+class ProblemaFacetasResponse(BaseModel):
+    categoria: dict[str, int]
+    dificuldade: dict[str, int]
+    autor: dict[str, int]
+    tag: dict[str, int]
+    evento: dict[str, int]
+
 class SugestaoSingleResponse(SugestaoBase):
     problema_id: int
     autor_id: int
     upvotes_count: int
     downvotes_count: int
+    score: float
 
 class SugestaoFullResponse(SugestaoSingleResponse):
     problema: list[ProblemaSingleResponse]
\ No newline at end of file
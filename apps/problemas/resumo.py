@@ -0,0 +1,60 @@
+from dataclasses import dataclass, fields
+from typing import ClassVar
+
+from fastapi import Response
+from pydantic_core import to_json
+
+from database.connection import AsyncDBSessionDep
+from database.schemas.problemas import Evento, Problema, Tag
+
+'''
+''  Modo resumo das listagens (?resumo=true)
+''
+''  Select só das colunas abaixo, linhas direto para registros com
+''  __slots__ e JSON gerado sem validação do Pydantic: sem instâncias do
+''  ORM, sem identity map e sem relacionamentos.
+'''
+@dataclass(slots = True)
+class ProblemaResumo:
+    id: int
+    titulo: str
+    categoria: str
+    dificuldade: str | None
+    autor: str | None
+    limite_tempo: int | None
+    limite_memoria_mb: int | None
+    evento_id: int | None
+
+    model: ClassVar = Problema
+
+@dataclass(slots = True)
+class EventoResumo:
+    id: int
+    titulo: str | None
+
+    model: ClassVar = Evento
+
+@dataclass(slots = True)
+class TagResumo:
+    id: int
+    nome: str | None
+
+    model: ClassVar = Tag
+
+def colunas(registro: type) -> list:
+    '''Colunas do select, na ordem dos campos do registro.'''
+    return [getattr(registro.model, campo.name) for campo in fields(registro)]
+
+async def buscar(query, registro: type, db: AsyncDBSessionDep) -> list:
+    try:
+        linhas = (await db.exec(query)).all()
+    except:
+        raise
+
+    return [registro(*linha) for linha in linhas]
+
+def resposta(registros: list, response: Response) -> Response:
+    '''JSON dos registros, com os headers já definidos na rota (cursor, total).'''
+    resumo = Response(content = to_json(registros), media_type = 'application/json')
+    resumo.headers.update(response.headers)
+    return resumo
@@ -1,10 +1,12 @@
 # Base
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 
 # Database
-from database.connection import DBSessionDep
+from database.connection import AsyncDBSessionDep
 from database.utils import delete_row, get_index, upsert_row
+from database.pagination import set_next_cursor
+from database.counts import set_total_count
 
 # Dependencies
 from apps.auth.utils import DBCurrentUserDep
@@ -17,6 +19,7 @@ from apps.problemas.models.responses import EventoSingleResponse, ProblemaSingle
 
 # Utils
 from policies.utils import Authorizer, check_permissions
+from apps.problemas.resumo import resposta
 from apps.problemas.utils import Eventos
 
 evento_router = APIRouter(
@@ -31,24 +34,36 @@ Eventos
 @evento_router.get('/')
 async def list_eventos(
     params: Annotated[EventoListQueryParams, Query()],
-    db: DBSessionDep,
+    response: Response,
+    db: AsyncDBSessionDep,
 ) -> list[EventoSingleResponse]:
     
     evento = EventoRead(**params.model_dump())
 
-    eventos = Eventos.get(
+    eventos = await Eventos.get(
         evento = evento,
         skip = params.skip,
         limit = params.limit,
+        cursor = params.cursor,
+        ordenar = params.ordenar,
+        resumo = params.resumo,
         db = db
     )
 
+    set_next_cursor(response, eventos, sort = params.ordenar, limit = params.limit)
+
+    if params.total:
+        set_total_count(response, *await Eventos.contar(evento = evento, db = db))
+
+    if params.resumo:
+        return resposta(eventos, response)
+
     return eventos
 
 @evento_router.get("/{id}")
 async def read_eventos(
     evento: EventoDep,
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ) -> EventoSingleResponse:
     
     return evento
@@ -56,19 +71,22 @@ async def read_eventos(
 @evento_router.get('/{id}/problemas')
 async def read_evento_problemas(
     evento: EventoDep,
+    db: AsyncDBSessionDep,
 ) -> list[ProblemaSingleResponse]:
     
+    await db.refresh(evento, attribute_names = ['problemas'])
+
     return evento.problemas
 
 @evento_router.post("/", dependencies=[Depends(Authorizer('evento', 'store'))])
 async def store_eventos(
     evento: EventoCreate,
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ) -> EventoSingleResponse:
     evento = Evento(**evento.model_dump())
 
     try:
-        evento_response = upsert_row(model_instance = evento, db = db)
+        evento_response = await upsert_row(model_instance = evento, db = db)
     except:
         raise
 
@@ -79,10 +97,10 @@ async def store_eventos(
 async def update_eventos(
     evento: EventoDep,
     evento_update: EventoCreate,
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ) -> EventoSingleResponse:
     try:
-        evento_updated = Eventos.update(
+        evento_updated = await Eventos.update(
             evento = evento,
             evento_update = evento_update,
             db = db
@@ -96,11 +114,11 @@ async def update_eventos(
 @evento_router.delete("/{id}", dependencies=[Depends(Authorizer('evento', 'delete'))])
 async def delete_eventos(
     evento: EventoDep,
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ):
     # permitir apenas se evento não possui problemas associados ou apenas marcar como null?
     try:
-        delete_row(model_instance = evento, db = db)
+        await delete_row(model_instance = evento, db = db)
     except:
         raise
 
@@ -1,22 +1,36 @@
 # Base
-from fastapi import APIRouter, Query, Depends
-from typing import Annotated
+from fastapi import APIRouter, Query, Depends, Response, UploadFile, HTTPException, status
+from fastapi.responses import StreamingResponse
+from typing import Annotated, Literal
 
 # Database
-from database.connection import DBSessionDep
-from database.utils import delete_row
+from database.connection import AsyncDBSessionDep
+from database.utils import delete_row, get_by_id
+from database.pagination import set_next_cursor
+from database.counts import set_total_count
+from database.loaders import loader_options
+from database.projection import parse_fields, projection_options, project
 
 # Dependencies
 from apps.auth.utils import DBCurrentUserDep
 from apps.problemas.dependencies import ProblemaDep
 
 # Schemas
-from apps.problemas.models.requests import EventoBase, EventoRead, ProblemaRead, ProblemaCreate, ProblemaUpdate, TagBase, TagRead, ProblemaListQueryParams, SugestaoCreate
-from apps.problemas.models.responses import ProblemaFullResponse, SugestaoSingleResponse
+from database.schemas.problemas import Problema
+from apps.problemas.models.requests import EventoBase, EventoRead, ProblemaRead, ProblemaCreate, ProblemaUpdate, TagBase, TagRead, ProblemaListQueryParams, SugestaoCreate, SugestaoRead, SugestaoProblemaQueryParams, TagsEmLote
+from apps.problemas.models.responses import ProblemaFullResponse, ProblemaFacetasResponse, ImportacaoResponse, ProblemaSimilarResponse, ProblemaCreateResponse, ProblemaDuplicadoResponse, DuplicadosClusterResponse, TagsEmLoteResponse, SugestaoSingleResponse
 
 # Utils
-from policies.utils import Authorizer, check_permissions
+from policies.utils import Authorizer, check_permissions, has_permission
 from apps.problemas.utils import Problemas, Sugestoes
+from apps.problemas.tag_index import tag_index
+from apps.problemas.similares import similar_index
+from apps.problemas.duplicados import LIMIAR_DUPLICADO, duplicate_index
+from apps.problemas.facetas import FACETAS_FILTROS, facetas_cache
+from apps.problemas.importacao import formato_do_arquivo, ler
+from apps.problemas.votos_buffer import vote_buffer
+from apps.problemas.votos_stream import votos_fanout
+from apps.problemas.resumo import resposta
 
 problema_router = APIRouter(
     prefix = '/problemas',
@@ -30,33 +44,106 @@ Problemas
 @problema_router.get("/")
 async def list_problemas(*,
     params: Annotated[ProblemaListQueryParams, Query()],
-    db: DBSessionDep
+    response: Response,
+    db: AsyncDBSessionDep
 ) -> list[ProblemaFullResponse]:
     
     problema = ProblemaRead(**params.model_dump())
+    campos = parse_fields(params.fields, ProblemaFullResponse)
 
-    problemas = Problemas.get(
+    problemas = await Problemas.get(
         problema = problema,
         eventos = params.eventos,
         tags = params.tags,
+        tags_expr = params.tags_expr,
+        busca = params.q,
         skip = params.skip,
         limit = params.limit,
+        cursor = params.cursor,
+        ordenar = params.ordenar,
+        campos = campos,
+        resumo = params.resumo,
         db = db
     )
 
+    if not params.q:
+        set_next_cursor(response, problemas, sort = params.ordenar, limit = params.limit)
+
+    if params.total:
+        total, exato = await Problemas.contar(
+            problema = problema,
+            eventos = params.eventos,
+            tags = params.tags,
+            tags_expr = params.tags_expr,
+            busca = params.q,
+            db = db
+        )
+        set_total_count(response, total, exato)
+
+    if params.resumo:
+        return resposta(problemas, response)
+
+    if campos is not None:
+        # resposta parcial: serializada sem o modelo completo (headers vão junto)
+        parcial = project(problemas, ProblemaFullResponse, campos)
+        parcial.headers.update(response.headers)
+        return parcial
+
     return problemas
 
 
+@problema_router.get("/facetas")
+async def list_problemas_facetas(*,
+    params: Annotated[ProblemaListQueryParams, Query()],
+    db: AsyncDBSessionDep
+) -> ProblemaFacetasResponse:
+
+    filtros = params.model_dump(include = FACETAS_FILTROS)
+    key = facetas_cache.key(filtros)
+
+    facetas = facetas_cache.get(key)
+    if facetas is None:
+        facetas = await Problemas.facetas(
+            problema = ProblemaRead(**filtros),
+            eventos = params.eventos,
+            tags = params.tags,
+            tags_expr = params.tags_expr,
+            busca = params.q,
+            db = db
+        )
+        facetas_cache.set(key, facetas)
+
+    return facetas
+
+
+@problema_router.get("/exportar", response_class = StreamingResponse)
+async def export_problemas(*,
+    params: Annotated[ProblemaListQueryParams, Query()],
+):
+    # mesmos filtros da listagem; paginação não se aplica
+    filtros = params.model_dump(exclude = {'skip', 'limit', 'cursor', 'ordenar'})
+
+    linhas = Problemas.exportar(
+        problema = ProblemaRead(**filtros),
+        eventos = params.eventos,
+        tags = params.tags,
+        tags_expr = params.tags_expr,
+        busca = params.q,
+    )
+
+    return StreamingResponse(linhas, media_type = 'application/x-ndjson')
+
+
 @problema_router.post("/", dependencies=[Depends(Authorizer('problema', 'store'))])
 async def store_problemas(*,
     problema: ProblemaCreate,
     evento: EventoRead | None = None,
     tags: list[TagRead] | None = None,
     current_user: DBCurrentUserDep,
-    db: DBSessionDep,
-) -> ProblemaFullResponse:
+    db: AsyncDBSessionDep,
+) -> ProblemaCreateResponse:
     
-    problema = Problemas.create(
+    problema = await Problemas.create(
         problema = problema,
         evento = evento,
         tags = tags,
@@ -64,14 +151,106 @@ async def store_problemas(*,
         db = db
     )
 
-    return problema
+    # o create não espera a reconstrução do índice de duplicados
+    duplicados = await Problemas.duplicados(problema = problema, esperar = False, db = db)
+
+    return ProblemaCreateResponse.model_validate(problema).model_copy(update = {
+        'duplicados': [ProblemaDuplicadoResponse(**duplicado) for duplicado in duplicados]
+    })
+
+
+@problema_router.get("/duplicados", dependencies=[Depends(Authorizer('problema', 'update_any'))])
+async def list_problemas_duplicados(
+    db: AsyncDBSessionDep,
+    limiar: Annotated[float, Query(ge = 0.1, le = 1)] = LIMIAR_DUPLICADO,
+    limit: Annotated[int, Query(ge = 1, le = 1000)] = 100,
+) -> list[DuplicadosClusterResponse]:
+
+    return await Problemas.clusters_duplicados(limiar = limiar, limit = limit, db = db)
+
+
+@problema_router.post("/importar", dependencies=[Depends(Authorizer('problema', 'store'))])
+async def import_problemas(*,
+    arquivo: UploadFile,
+    formato: Literal['jsonl', 'csv'] | None = None, # padrão: pela extensão do arquivo
+    current_user: DBCurrentUserDep,
+    db: AsyncDBSessionDep,
+) -> ImportacaoResponse:
+
+    formato = formato or formato_do_arquivo(arquivo.filename)
+    if formato is None:
+        raise HTTPException(
+            status_code = status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail = "Formato não identificado: informe formato=jsonl ou formato=csv"
+        )
+
+    resultado = await Problemas.importar(
+        linhas = ler(arquivo.file, formato),
+        uploader = current_user,
+        db = db
+    )
+
+    return resultado
+
+
+@problema_router.post("/atribuir_tags", dependencies=[Depends(Authorizer('problema', 'update'))])
+async def atribuir_tags_em_lote(*,
+    lote: TagsEmLote,
+    current_user: DBCurrentUserDep,
+    db: AsyncDBSessionDep,
+) -> TagsEmLoteResponse:
+
+    return await Problemas.alterar_tags_em_lote(
+        acao = 'atribuir',
+        tag_ids = lote.tags,
+        problema_ids = lote.problemas,
+        filtro = lote.filtro,
+        restrito_a = None if has_permission(model = 'problema', ability = 'update_any', user = current_user) else current_user,
+        db = db
+    )
+
+
+@problema_router.post("/desvincular_tags", dependencies=[Depends(Authorizer('problema', 'update'))])
+async def desvincular_tags_em_lote(*,
+    lote: TagsEmLote,
+    current_user: DBCurrentUserDep,
+    db: AsyncDBSessionDep,
+) -> TagsEmLoteResponse:
+
+    return await Problemas.alterar_tags_em_lote(
+        acao = 'desvincular',
+        tag_ids = lote.tags,
+        problema_ids = lote.problemas,
+        filtro = lote.filtro,
+        restrito_a = None if has_permission(model = 'problema', ability = 'update_any', user = current_user) else current_user,
+        db = db
+    )
 
 
 @problema_router.get("/{id}")
 async def read_problemas(
-    problema: ProblemaDep,
+    id: int,
+    db: AsyncDBSessionDep,
+    fields: Annotated[str | None, Query(max_length = 500)] = None,
 ) -> ProblemaFullResponse:
-    return problema
+    campos = parse_fields(fields, ProblemaFullResponse)
+    if campos is None:
+        return await get_by_id(model = Problema, id = id, db = db, options = loader_options(Problema, ProblemaFullResponse))
+
+    problema = await get_by_id(model = Problema, id = id, db = db, options = projection_options(Problema, ProblemaFullResponse, campos))
+    return project(problema, ProblemaFullResponse, campos)
+
+
+@problema_router.get("/{id}/similares")
+async def read_problemas_similares(
+    id: int,
+    db: AsyncDBSessionDep,
+    k: Annotated[int, Query(ge = 1, le = 100)] = 10,
+) -> list[ProblemaSimilarResponse]:
+
+    problema = await get_by_id(model = Problema, id = id, db = db)
+
+    return await Problemas.similares(problema = problema, k = k, db = db)
 
 
 @problema_router.patch("/{id}", dependencies=[Depends(Authorizer('problema', 'update'))])
@@ -81,12 +260,12 @@ async def update_problemas(*,
     evento_update: EventoRead | None = None,
     tags: list[TagRead] | None = None,
     current_user: DBCurrentUserDep,
-    db: DBSessionDep,
+    db: AsyncDBSessionDep,
 ) -> ProblemaFullResponse:
     
     check_permissions(model = 'problema', ability = 'update', user = current_user, problema = problema)
     
-    problema_updated = Problemas.update(
+    problema_updated = await Problemas.update(
         problema = problema,
         problema_update = problema_update,
         evento_update = evento_update,
@@ -101,15 +280,19 @@ async def update_problemas(*,
 async def delete_problemas_autor(
     problema: ProblemaDep,
     current_user: DBCurrentUserDep,
-    db: DBSessionDep,
+    db: AsyncDBSessionDep,
 ):
     check_permissions(model = 'problema', ability = 'delete', user = current_user, problema = problema)
 
     try:
-        delete_row(model_instance = problema, db = db)
+        await delete_row(model_instance = problema, db = db)
     except:
         raise
 
+    tag_index.remove_problema(problema.id)
+    similar_index.remove_problema(problema.id)
+    duplicate_index.remove_problema(problema.id)
+
     return { 'sucesso': True }
 
 @problema_router.post("/{id}/atribuir_tags", dependencies=[Depends(Authorizer('problema', 'update'))])
@@ -117,7 +300,7 @@ async def atribuir_tags(
     problema: ProblemaDep,
     tags: list[TagBase],
     current_user: DBCurrentUserDep,
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ):
     check_permissions(
         model = 'problema',
@@ -127,7 +310,7 @@ async def atribuir_tags(
     )
 
     try:
-        tags, errors = Problemas.atribuir_tags(
+        tags, errors = await Problemas.atribuir_tags(
             problema = problema,
             tags = tags,
             db = db
@@ -142,7 +325,7 @@ async def desvincular_tags(
     problema: ProblemaDep,
     tags: list[TagBase],
     current_user: DBCurrentUserDep,
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ):
     check_permissions(
         model = 'problema',
@@ -152,7 +335,7 @@ async def desvincular_tags(
     )
 
     try:
-        Problemas.desvincular_tags(
+        await Problemas.desvincular_tags(
             problema = problema,
             tags = tags,
             db = db
@@ -167,7 +350,7 @@ async def vincular_evento(
     problema: ProblemaDep,
     evento: EventoBase,
     current_user: DBCurrentUserDep,
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ):
     check_permissions(
         model = 'problema',
@@ -177,7 +360,7 @@ async def vincular_evento(
     )
 
     try:
-        Problemas.vincular_evento(
+        await Problemas.vincular_evento(
             problema = problema,
             evento = evento,
             db = db
@@ -191,7 +374,7 @@ async def vincular_evento(
 async def desvincular_evento(
     problema: ProblemaDep,
     current_user: DBCurrentUserDep,
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ):
     check_permissions(
         model = 'problema',
@@ -201,7 +384,7 @@ async def desvincular_evento(
     )
 
     try:
-        Problemas.desvincular_evento(
+        await Problemas.desvincular_evento(
             problema = problema,
             db = db
         )
@@ -215,11 +398,11 @@ async def store_sugestao(
     problema: ProblemaDep,
     sugestao: SugestaoCreate,
     current_user: DBCurrentUserDep,
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ) -> SugestaoSingleResponse:
     
     try:
-        sugestao_result = Sugestoes.create(
+        sugestao_result = await Sugestoes.create(
             sugestao = sugestao,
             problema = problema,
             current_user = current_user,
@@ -229,3 +412,65 @@ async def store_sugestao(
         raise
 
     return sugestao_result
+
+@problema_router.get("/{id}/sugestoes", dependencies=[Depends(Authorizer('sugestao', 'read_any'))])
+async def list_sugestoes_problema(
+    id: int,
+    params: Annotated[SugestaoProblemaQueryParams, Query()],
+    response: Response,
+    current_user: DBCurrentUserDep,
+    db: AsyncDBSessionDep
+) -> list[SugestaoSingleResponse]:
+
+    # só a existência do problema: a listagem filtra por problema_id
+    await get_by_id(model = Problema, id = id, db = db)
+    sugestao = SugestaoRead(problema_id = id, status = params.status)
+
+    try:
+        sugestoes_results = await Sugestoes.get(
+            sugestao = sugestao,
+            skip = params.skip,
+            limit = params.limit,
+            cursor = params.cursor,
+            ordenar = params.ordenar,
+            db = db
+        )
+    except:
+        raise
+
+    set_next_cursor(response, sugestoes_results, sort = params.ordenar, limit = params.limit)
+
+    if params.total:
+        set_total_count(response, *await Sugestoes.contar(sugestao = sugestao, db = db))
+
+    # votos do próprio usuário ainda no buffer já aparecem nos contadores
+    if vote_buffer is not None:
+        sugestoes_results = await Sugestoes.com_pendentes(
+            sugestoes = sugestoes_results,
+            user = current_user,
+            pendentes = vote_buffer.pendentes_do_usuario([sugestao.id for sugestao in sugestoes_results], current_user.id),
+            db = db
+        )
+
+    return sugestoes_results
+
+@problema_router.get("/{id}/sugestoes/stream", response_class = StreamingResponse, dependencies=[Depends(Authorizer('sugestao', 'read_any'))])
+async def stream_votos_problema(
+    id: int,
+    db: AsyncDBSessionDep,
+):
+    '''
+    Server-Sent Events com os contadores das sugestões do problema: as
+    ativas na conexão e qualquer uma que receba votos depois.
+    '''
+    await get_by_id(model = Problema, id = id, db = db)
+    inicial = await votos_fanout.snapshot(('problema', id), db = db)
+
+    # a conexão dura minutos: devolve a conexão do banco ao pool antes do stream
+    await db.close()
+
+    return StreamingResponse(
+        votos_fanout.stream(('problema', id), inicial),
+        media_type = 'text/event-stream',
+        headers = { 'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no' },
+    )
@@ -1,10 +1,14 @@
 # Base
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
 
 # Database
-from database.connection import DBSessionDep
-from database.utils import delete_row
+from database.connection import AsyncDBSessionDep
+from database.utils import delete_row, get_by_id
+from database.pagination import set_next_cursor
+from database.counts import set_total_count
+from database.routing import recent_writers
 
 # Dependencies
 from apps.auth.utils import DBCurrentUserDep
@@ -12,13 +16,15 @@ from apps.problemas.dependencies import SugestaoDep
 
 # Schemas
 from database.schemas.users import User
-from database.schemas.problemas import Status_Sugestao
+from database.schemas.problemas import Sugestao, Status_Sugestao, wilson_score
 from apps.problemas.models.requests import SugestaoRead, SugestaoListQueryParams
 from apps.problemas.models.responses import SugestaoSingleResponse
 
 # Utils
 from policies.utils import Authorizer, check_permissions
 from apps.problemas.utils import Sugestoes
+from apps.problemas.votos_buffer import vote_buffer
+from apps.problemas.votos_stream import votos_fanout
 
 sugestao_router = APIRouter(
     prefix = '/sugestoes',
@@ -29,44 +35,96 @@ sugestao_router = APIRouter(
 @sugestao_router.get("/", dependencies=[Depends(Authorizer('sugestao', 'read_any'))])
 async def list_sugestoes(*,
     params: Annotated[SugestaoListQueryParams, Query()],
-    db: DBSessionDep
+    response: Response,
+    current_user: DBCurrentUserDep,
+    db: AsyncDBSessionDep
 ) -> list[SugestaoSingleResponse]:
     
     sugestao = SugestaoRead(**params.model_dump())
 
     try:
-        sugestoes_results = Sugestoes.get(
+        sugestoes_results = await Sugestoes.get(
             sugestao = sugestao,
             skip = params.skip,
             limit = params.limit,
+            cursor = params.cursor,
+            ordenar = params.ordenar,
             db = db
         )
     except:
         raise
     
+    set_next_cursor(response, sugestoes_results, sort = params.ordenar, limit = params.limit)
+
+    if params.total:
+        set_total_count(response, *await Sugestoes.contar(sugestao = sugestao, db = db))
+
+    # votos do próprio usuário ainda no buffer já aparecem nos contadores
+    if vote_buffer is not None:
+        sugestoes_results = await Sugestoes.com_pendentes(
+            sugestoes = sugestoes_results,
+            user = current_user,
+            pendentes = vote_buffer.pendentes_do_usuario([sugestao.id for sugestao in sugestoes_results], current_user.id),
+            db = db
+        )
+
     return sugestoes_results
 
 
 @sugestao_router.get("/{id}/votos", dependencies=[Depends(Authorizer('sugestao', 'read'))])
 async def read_votos_sugestao(
     sugestao: SugestaoDep,
-    db: DBSessionDep,
+    current_user: DBCurrentUserDep,
+    db: AsyncDBSessionDep,
 ):
     
+    # o voto do próprio usuário ainda no buffer já aparece na contagem
+    upvotes, downvotes = await Sugestoes.contadores(
+        sugestao = sugestao,
+        user = current_user,
+        pendente = vote_buffer.voto_pendente(sugestao.id, current_user.id) if vote_buffer is not None else None,
+        db = db
+    )
+
     return {
-        'upvotes': sugestao.upvotes_count,
-        'downvotes': sugestao.downvotes_count
+        'upvotes': upvotes,
+        'downvotes': downvotes
     }
 
 
+@sugestao_router.get("/{id}/votos/stream", response_class = StreamingResponse, dependencies=[Depends(Authorizer('sugestao', 'read'))])
+async def stream_votos_sugestao(
+    id: int,
+    db: AsyncDBSessionDep,
+):
+    '''
+    Server-Sent Events: 'votos' com os contadores atuais na conexão e a cada
+    mudança (rajadas agrupadas), 'reset' quando é preciso recarregar.
+    '''
+    await get_by_id(model = Sugestao, id = id, db = db)
+    inicial = await votos_fanout.snapshot(('sugestao', id), db = db)
+
+    # a conexão dura minutos: devolve a conexão do banco ao pool antes do stream
+    await db.close()
+
+    return StreamingResponse(
+        votos_fanout.stream(('sugestao', id), inicial),
+        media_type = 'text/event-stream',
+        headers = { 'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no' },
+    )
+
+
 @sugestao_router.post("/{id}/votar", dependencies=[Depends(Authorizer('sugestao', 'votar'))])
 async def votar_sugestao(
-    sugestao: SugestaoDep,
+    id: int,
     voto: bool,
     current_user: DBCurrentUserDep,
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ) -> SugestaoSingleResponse:
     
+    # só a linha da sugestão: autor e uploaders de SugestaoDep não são usados aqui
+    sugestao = await get_by_id(model = Sugestao, id = id, db = db)
+
     if sugestao.status != Status_Sugestao.ativa:
         raise HTTPException(
             status_code = status.HTTP_400_BAD_REQUEST,
@@ -74,16 +132,27 @@ async def votar_sugestao(
         )
     
     try:
-        sugestao_result = Sugestoes.votar(
-            sugestao = sugestao,
-            voto = voto,
-            user = current_user,
-            db = db
-        )
+        if vote_buffer is not None:
+            # gravado no flush; a resposta já soma o voto aos contadores
+            await vote_buffer.add(sugestao.id, current_user.id, voto)
+            if db.info.get('identity'):
+                recent_writers.record(db.info['identity'])
+            upvotes, downvotes = await Sugestoes.contadores(sugestao = sugestao, user = current_user, pendente = voto, db = db)
+        else:
+            upvotes, downvotes = await Sugestoes.votar(
+                sugestao = sugestao,
+                voto = voto,
+                user = current_user,
+                db = db
+            )
     except:
         raise
 
-    return sugestao_result
+    return SugestaoSingleResponse.model_validate(sugestao).model_copy(update = {
+        'upvotes_count': upvotes,
+        'downvotes_count': downvotes,
+        'score': wilson_score(upvotes, downvotes),
+    })
 
 
 @sugestao_router.patch("/{id}/status", dependencies=[Depends(Authorizer('sugestao', 'update'))])
@@ -91,13 +160,13 @@ async def alterar_status_sugestao(
     sugestao: SugestaoDep,
     status: Status_Sugestao,
     current_user: DBCurrentUserDep,
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ) -> SugestaoSingleResponse:
     
     check_permissions(model = 'sugestao', ability = 'update', user = current_user, problema = sugestao.problema)
 
     try:
-        sugestao_result = Sugestoes.update_status(
+        sugestao_result = await Sugestoes.update_status(
             sugestao = sugestao,
             status = status,
             db = db,
@@ -113,12 +182,12 @@ async def alterar_status_sugestao(
 async def delete_sugestao(
     sugestao: SugestaoDep,
     current_user: DBCurrentUserDep,
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ):
     check_permissions(model = 'sugestao', ability = 'delete', user = current_user, sugestao = sugestao)
     
     try:
-        delete_row(model_instance = sugestao, db = db)
+        await delete_row(model_instance = sugestao, db = db)
     except:
         raise
 
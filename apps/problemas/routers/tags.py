@@ -1,10 +1,12 @@
 # Base
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 
 # Database
-from database.connection import DBSessionDep
+from database.connection import AsyncDBSessionDep
 from database.utils import delete_row, get_index, upsert_row
+from database.pagination import set_next_cursor
+from database.counts import set_total_count
 
 # Dependencies
 from apps.auth.utils import DBCurrentUserDep
@@ -18,7 +20,9 @@ from apps.problemas.models.responses import TagSingleResponse, ProblemaSingleRes
 
 # Utils
 from policies.utils import Authorizer, check_permissions
+from apps.problemas.resumo import resposta
 from apps.problemas.utils import Problemas, Eventos, Tags
+from apps.problemas.tag_index import tag_index
 
 tag_router = APIRouter(
     prefix = '/tags',
@@ -29,40 +33,57 @@ tag_router = APIRouter(
 @tag_router.get("/", dependencies=[Depends(Authorizer('tag', 'read_any'))])
 async def list_tags(*,
     params: Annotated[TagListQueryParams, Query()],
-    db: DBSessionDep,
+    response: Response,
+    db: AsyncDBSessionDep,
 ) -> list[TagSingleResponse]:
     
     tag = TagRead(**params.model_dump())
 
-    tag_results = Tags.get(
+    tag_results = await Tags.get(
         tag = tag,
         skip = params.skip,
         limit = params.limit,
+        cursor = params.cursor,
+        ordenar = params.ordenar,
+        resumo = params.resumo,
         db = db
     )
 
+    set_next_cursor(response, tag_results, sort = params.ordenar, limit = params.limit)
+
+    if params.total:
+        set_total_count(response, *await Tags.contar(tag = tag, db = db))
+
+    if params.resumo:
+        return resposta(tag_results, response)
+
     return tag_results
 
 @tag_router.get('/{id}/problemas', dependencies=[Depends(Authorizer('tag', 'read')), Depends(Authorizer('problema', 'read_any'))])
 async def read_tag_problemas(
     tag: TagDep,
+    db: AsyncDBSessionDep,
 ) -> list[ProblemaSingleResponse]:
     
+    await db.refresh(tag, attribute_names = ['problemas'])
+
     return tag.problemas
 
 @tag_router.post("/")
 async def store_tags(*,
     tag: TagCreate,
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ) -> TagSingleResponse:
 
     tag = Tag(**tag.model_dump())
     
     try:
-        tag_result = upsert_row(model_instance = tag, db = db)
+        tag_result = await upsert_row(model_instance = tag, db = db)
     except:
         raise
 
+    tag_index.set_tag(tag_result.id, tag_result.nome)
+
     return tag_result
 
 
@@ -70,11 +91,11 @@ async def store_tags(*,
 async def update_tags(
     tag: TagDep,
     tag_update: TagCreate,
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ) -> TagSingleResponse:
 
     try:
-        tag_updated = Tags.update(
+        tag_updated = await Tags.update(
             tag = tag,
             tag_update = tag_update,
             db = db
@@ -82,17 +103,21 @@ async def update_tags(
     except:
         raise
 
+    tag_index.set_tag(tag_updated.id, tag_updated.nome)
+
     return tag_updated
 
 
 @tag_router.delete("/{id}")
 async def delete_tags(
     tag: TagDep,
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ):
     try:
-        delete_row(model_instance = tag, db = db)    
+        await delete_row(model_instance = tag, db = db)    
     except:
         raise
 
+    tag_index.remove_tag(tag.id)
+
     return { "success": True }
@@ -3,8 +3,9 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 
 # Database
-from database.connection import DBSessionDep
+from database.connection import AsyncDBSessionDep
 from database.utils import delete_row, get_index
+from database.response_cache import response_cache
 
 # Dependencies
 from apps.auth.utils import DBCurrentUserDep
@@ -31,4 +32,11 @@ router = APIRouter()
 router.include_router(problema_router)
 router.include_router(evento_router)
 router.include_router(tag_router)
-router.include_router(sugestao_router)
\ No newline at end of file
+router.include_router(sugestao_router)
+
+# Cache de respostas: leituras públicas de problemas e as tabelas que elas serializam
+PROBLEMA_TABLES = ('problema', 'problema_tag', 'tag', 'evento', 'problema_user', 'user')
+
+response_cache.route(r'^/problemas/$', PROBLEMA_TABLES)
+response_cache.route(r'^/problemas/\d+$', PROBLEMA_TABLES)
+response_cache.route(r'^/problemas/\d+/similares$', PROBLEMA_TABLES)
@@ -0,0 +1,209 @@
+import asyncio
+import heapq
+import time
+import unicodedata
+from array import array
+from itertools import islice
+from typing import Iterable
+
+from sqlmodel import select
+
+from config import settings
+from database.connection import AsyncDBSessionDep
+from database.schemas.problemas import Problema, Problema_Tag
+from apps.problemas.lsh import LSHIndex, MinHash, jaccard
+
+'''
+''  Problemas similares
+''
+''  Pontuação: tags em comum (Jaccard), mesma categoria e dificuldade
+''  próxima. Candidatos vêm do LSH sobre a assinatura MinHash das tags;
+''  só eles são pontuados. Categoria e dificuldade ficam fora da
+''  assinatura: poucos valores repetidos no catálogo todo fariam quase todo
+''  problema dividir bucket com quase todos.
+'''
+PESO_TAGS = 0.6
+PESO_CATEGORIA = 0.25
+PESO_DIFICULDADE = 0.15
+
+ESCALA_DIFICULDADE = ('muito facil', 'facil', 'medio', 'dificil', 'muito dificil')
+
+# candidatos pontuados por resultado pedido, pelos que dividem mais bandas
+CANDIDATOS_POR_RESULTADO = 20
+
+def _normalizar(texto: str) -> str:
+    texto = unicodedata.normalize('NFKD', texto.strip().lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+def proximidade_dificuldade(a: str | None, b: str | None) -> float:
+    '''1 para iguais, proporcional à distância na escala (ou numérica), 0 sem comparação.'''
+    if not a or not b:
+        return 0.0
+
+    a, b = _normalizar(a), _normalizar(b)
+    if a == b:
+        return 1.0
+
+    if a in ESCALA_DIFICULDADE and b in ESCALA_DIFICULDADE:
+        distancia = abs(ESCALA_DIFICULDADE.index(a) - ESCALA_DIFICULDADE.index(b))
+        return 1 - distancia / (len(ESCALA_DIFICULDADE) - 1)
+
+    try:
+        x, y = float(a), float(b)
+    except ValueError:
+        return 0.0
+    escala = max(abs(x), abs(y))
+    return max(0.0, 1 - abs(x - y) / escala) if escala else 1.0
+
+class SimilarIndex:
+    '''
+    Assinaturas e buckets em memória, reconstruídos do primário (fora do event
+    loop) no primeiro uso e a cada SIMILARES_TTL segundos; as escritas deste
+    worker são aplicadas na hora pelos mesmos pontos que mantêm o tag_index.
+
+    16 bandas de 4 linhas: limiar perto de Jaccard 0.5 entre os conjuntos de
+    tags. Problemas sem tags não têm assinatura e buscam candidatos entre os
+    da mesma categoria, limitados a CANDIDATOS_POR_RESULTADO por resultado.
+    '''
+    def __init__(self, ttl: float, num_perm: int = 64, bands: int = 16):
+        self.ttl = ttl
+        self.minhash = MinHash(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.index = LSHIndex(bands, self.rows)
+        self.problemas: dict[int, tuple[str | None, str | None, frozenset[int]]] = {}
+        self.categorias: dict[str, set[int]] = {}
+        self.loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+        self._pendentes: list[tuple[str, tuple]] | None = None # manutenção durante a reconstrução
+
+    def _signature(self, tag_ids: Iterable[int]) -> array:
+        return self.minhash.signature(f't:{tag_id}' for tag_id in tag_ids)
+
+    async def ensure_loaded(self, db: AsyncDBSessionDep):
+        if self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl:
+            return
+
+        async with self._lock:
+            if self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl:
+                return
+
+            # a leitura e o _build cedem o event loop: a manutenção feita nesse
+            # meio-tempo vai para o índice antigo e é repetida no novo
+            self._pendentes = []
+            try:
+                # réplica atrasada perderia tags atribuídas e problemas criados há pouco
+                db.info['primary'] = True
+                tags = (await db.exec(select(Problema_Tag.tag_id, Problema_Tag.problema_id))).all()
+                linhas = (await db.exec(select(Problema.id, Problema.categoria, Problema.dificuldade))).all()
+
+                # as assinaturas do catálogo todo levam segundos: fora do event loop
+                construido = await asyncio.to_thread(self._build, tags, linhas)
+
+                pendentes, self._pendentes = self._pendentes, None
+                self.index, self.problemas, self.categorias = construido
+                for metodo, args in pendentes:
+                    getattr(self, metodo)(*args)
+                self.loaded_at = time.monotonic()
+            finally:
+                self._pendentes = None
+
+    def _build(self, tags: list[tuple[int, int]], linhas: list[tuple[int, str | None, str | None]]):
+        por_problema: dict[int, set[int]] = {}
+        for tag_id, problema_id in tags:
+            por_problema.setdefault(problema_id, set()).add(tag_id)
+
+        index = LSHIndex(self.bands, self.rows)
+        problemas = {}
+        categorias = {}
+        for id, categoria, dificuldade in linhas:
+            problemas[id] = (categoria, dificuldade, frozenset(por_problema.get(id, ())))
+            index.insert(id, self._signature(problemas[id][2]))
+            if categoria:
+                categorias.setdefault(_normalizar(categoria), set()).add(id)
+
+        return index, problemas, categorias
+
+    # manutenção
+    def _registrar(self, metodo: str, *args):
+        if self._pendentes is not None:
+            self._pendentes.append((metodo, args))
+
+    def set_problema(self, problema_id: int, categoria: str | None, dificuldade: str | None, tag_ids: Iterable[int]):
+        tag_ids = frozenset(tag_ids)
+        self._registrar('set_problema', problema_id, categoria, dificuldade, tag_ids)
+        self._set_problema(problema_id, categoria, dificuldade, tag_ids)
+
+    def _set_problema(self, problema_id: int, categoria: str | None, dificuldade: str | None, tag_ids: frozenset[int]):
+        self._remover_categoria(problema_id)
+        self.problemas[problema_id] = (categoria, dificuldade, tag_ids)
+        self.index.insert(problema_id, self._signature(tag_ids))
+        if categoria:
+            self.categorias.setdefault(_normalizar(categoria), set()).add(problema_id)
+
+    def attach(self, problema_id: int, tag_ids: Iterable[int]):
+        tag_ids = frozenset(tag_ids)
+        self._registrar('attach', problema_id, tag_ids)
+        if problema_id in self.problemas:
+            categoria, dificuldade, atuais = self.problemas[problema_id]
+            self._set_problema(problema_id, categoria, dificuldade, atuais | tag_ids)
+
+    def detach(self, problema_id: int, tag_ids: Iterable[int]):
+        tag_ids = frozenset(tag_ids)
+        self._registrar('detach', problema_id, tag_ids)
+        if problema_id in self.problemas:
+            categoria, dificuldade, atuais = self.problemas[problema_id]
+            self._set_problema(problema_id, categoria, dificuldade, atuais - tag_ids)
+
+    def remove_problema(self, problema_id: int):
+        self._registrar('remove_problema', problema_id)
+        self._remover_categoria(problema_id)
+        self.problemas.pop(problema_id, None)
+        self.index.remove(problema_id)
+
+    def _remover_categoria(self, problema_id: int):
+        anterior = self.problemas.get(problema_id)
+        if anterior is not None and anterior[0]:
+            chave = _normalizar(anterior[0])
+            ids = self.categorias.get(chave)
+            if ids is not None:
+                ids.discard(problema_id)
+                if not ids:
+                    del self.categorias[chave]
+
+    # consulta
+    def score(self, a: int, b: int) -> float:
+        categoria_a, dificuldade_a, tags_a = self.problemas[a]
+        categoria_b, dificuldade_b, tags_b = self.problemas[b]
+
+        mesma_categoria = bool(categoria_a) and bool(categoria_b) and _normalizar(categoria_a) == _normalizar(categoria_b)
+        return (
+            PESO_TAGS * jaccard(tags_a, tags_b)
+            + PESO_CATEGORIA * mesma_categoria
+            + PESO_DIFICULDADE * proximidade_dificuldade(dificuldade_a, dificuldade_b)
+        )
+
+    def candidatos(self, problema_id: int, k: int = 10) -> list[int]:
+        '''Ids a pontuar para 'problema_id': os que mais dividem bandas, ou a mesma categoria sem tags.'''
+        limite = k * CANDIDATOS_POR_RESULTADO
+        signature = self.index.signatures.get(problema_id)
+        if signature is not None:
+            encontrados = self.index.candidates(signature)
+            encontrados.pop(problema_id, None)
+            return [id for id, _ in encontrados.most_common(limite)]
+
+        categoria = self.problemas.get(problema_id, (None,))[0]
+        if not categoria:
+            return []
+        mesma_categoria = self.categorias.get(_normalizar(categoria), ())
+        return list(islice((id for id in mesma_categoria if id != problema_id), limite))
+
+    def top(self, problema_id: int, k: int = 10) -> list[tuple[int, float]]:
+        '''Os k mais similares a 'problema_id', com a pontuação (0 a 1).'''
+        if problema_id not in self.problemas:
+            return []
+
+        pontuados = ((id, self.score(problema_id, id)) for id in self.candidatos(problema_id, k))
+        return heapq.nlargest(k, pontuados, key = lambda item: (item[1], -item[0]))
+
+similar_index = SimilarIndex(ttl = settings.SIMILARES_TTL)
@@ -0,0 +1,302 @@
+import asyncio
+import re
+import time
+from typing import Iterable, Iterator
+
+from fastapi import HTTPException, status
+from sqlmodel import select, col
+from sqlalchemy import and_, or_, not_, false
+
+from config import settings
+from database.connection import AsyncDBSessionDep
+from database.schemas.problemas import Problema, Problema_Tag, Tag
+
+'''
+''  Bitmap
+'''
+CHUNK_BITS = 16
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+class Bitmap:
+    '''
+    Conjunto de ids em blocos de 2^16: cada bloco presente é um int usado
+    como bitset, blocos vazios não ocupam memória. As operações de conjunto
+    são feitas bloco a bloco com &, | e & ~ de inteiros.
+    '''
+    __slots__ = ('chunks',)
+
+    def __init__(self, ids: Iterable[int] = ()):
+        self.chunks: dict[int, int] = {}
+        for id in ids:
+            self.add(id)
+
+    def add(self, id: int):
+        key = id >> CHUNK_BITS
+        self.chunks[key] = self.chunks.get(key, 0) | (1 << (id & CHUNK_MASK))
+
+    def discard(self, id: int):
+        key = id >> CHUNK_BITS
+        chunk = self.chunks.get(key, 0) & ~(1 << (id & CHUNK_MASK))
+        if chunk:
+            self.chunks[key] = chunk
+        else:
+            self.chunks.pop(key, None)
+
+    def __contains__(self, id: int) -> bool:
+        return bool(self.chunks.get(id >> CHUNK_BITS, 0) >> (id & CHUNK_MASK) & 1)
+
+    def __len__(self) -> int:
+        return sum(chunk.bit_count() for chunk in self.chunks.values())
+
+    def __and__(self, other: 'Bitmap') -> 'Bitmap':
+        result = Bitmap()
+        for key, chunk in self.chunks.items():
+            merged = chunk & other.chunks.get(key, 0)
+            if merged:
+                result.chunks[key] = merged
+        return result
+
+    def __or__(self, other: 'Bitmap') -> 'Bitmap':
+        result = Bitmap()
+        result.chunks = dict(self.chunks)
+        for key, chunk in other.chunks.items():
+            result.chunks[key] = result.chunks.get(key, 0) | chunk
+        return result
+
+    def __sub__(self, other: 'Bitmap') -> 'Bitmap':
+        result = Bitmap()
+        for key, chunk in self.chunks.items():
+            merged = chunk & ~other.chunks.get(key, 0)
+            if merged:
+                result.chunks[key] = merged
+        return result
+
+    def iter_from(self, after: int = 0) -> Iterator[int]:
+        '''Ids em ordem crescente, maiores que 'after'.'''
+        for key in sorted(k for k in self.chunks if k >= after >> CHUNK_BITS):
+            chunk = self.chunks[key]
+            base = key << CHUNK_BITS
+            if base <= after:
+                chunk &= ~((1 << (after - base + 1)) - 1)
+            while chunk:
+                low = chunk & -chunk
+                yield base + low.bit_length() - 1
+                chunk ^= low
+
+    def __iter__(self) -> Iterator[int]:
+        return self.iter_from(-1)
+
+'''
+''  Expressões de tags: grafos & (dp | guloso) & !geometria
+'''
+_token = re.compile(r'\s*(?:([&|!()])|([^&|!()]+))')
+
+def parse_tag_expression(expression: str) -> tuple:
+    '''
+    Converte a expressão em uma árvore ('and'|'or', a, b), ('not', a) ou o
+    nome da tag. Precedência: ! > & > |. Erros de sintaxe viram 422.
+    '''
+    tokens = []
+    for operator, name in _token.findall(expression):
+        if operator:
+            tokens.append(operator)
+        elif name.strip():
+            tokens.append(('tag', name.strip()))
+
+    invalid = HTTPException(
+        status_code = status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail = f"Expressão de tags inválida: {expression}"
+    )
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or():
+        node = parse_and()
+        while peek() == '|':
+            take()
+            node = ('or', node, parse_and())
+        return node
+
+    def parse_and():
+        node = parse_not()
+        while peek() == '&':
+            take()
+            node = ('and', node, parse_not())
+        return node
+
+    def parse_not():
+        if peek() == '!':
+            take()
+            return ('not', parse_not())
+        return parse_atom()
+
+    def parse_atom():
+        token = peek()
+        if token == '(':
+            take()
+            node = parse_or()
+            if peek() != ')':
+                raise invalid
+            take()
+            return node
+        if isinstance(token, tuple):
+            return take()
+        raise invalid
+
+    tree = parse_or()
+    if peek() is not None:
+        raise invalid
+
+    return tree
+
+'''
+''  Mesmos filtros em SQL (subqueries em problema_tag), para quando os ids
+''  do bitmap não cabem num IN ou há outros predicados para o banco combinar
+'''
+MAX_IDS_IN = 1000
+
+def _com_tags(nomes: Iterable[str]):
+    return col(Problema.id).in_(
+        select(Problema_Tag.problema_id)
+        .join(Tag, Tag.id == Problema_Tag.tag_id)
+        .where(col(Tag.nome).in_(list(nomes)))
+    )
+
+def _predicado(tree):
+    match tree:
+        case ('tag', nome):
+            return _com_tags([nome])
+        case ('and', left, right):
+            return and_(_predicado(left), _predicado(right))
+        case ('or', left, right):
+            return or_(_predicado(left), _predicado(right))
+        case ('not', operand):
+            return not_(_predicado(operand))
+
+def tag_predicate(nomes: list[str] | None = None, expression: str | None = None):
+    '''Equivalente em SQL de TagIndex.matching(nomes, expression).'''
+    predicados = []
+    if nomes is not None:
+        predicados.append(_com_tags(nomes) if nomes else false())
+    if expression:
+        predicados.append(_predicado(parse_tag_expression(expression)))
+    return and_(*predicados) if predicados else false()
+
+'''
+''  Índice
+'''
+class TagIndex:
+    '''
+    Um bitmap de ids de problema por tag, em memória.
+
+    Reconstruído do banco no primeiro uso e a cada TAG_INDEX_TTL segundos
+    (escritas feitas por outros workers); as escritas deste worker são
+    aplicadas na hora pelos métodos de Problemas/Tags.
+    '''
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.by_tag: dict[int, Bitmap] = {}
+        self.tag_ids: dict[str, set[int]] = {} # nome não é único em Tag
+        self.problemas = Bitmap()
+        self.loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    async def ensure_loaded(self, db: AsyncDBSessionDep):
+        if self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl:
+            return
+
+        async with self._lock:
+            if self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl:
+                return
+
+            by_tag: dict[int, Bitmap] = {}
+            for tag_id, problema_id in await db.exec(select(Problema_Tag.tag_id, Problema_Tag.problema_id)):
+                by_tag.setdefault(tag_id, Bitmap()).add(problema_id)
+
+            tag_ids: dict[str, set[int]] = {}
+            for id, nome in await db.exec(select(Tag.id, Tag.nome)):
+                tag_ids.setdefault(nome, set()).add(id)
+
+            self.tag_ids = tag_ids
+            self.problemas = Bitmap(await db.exec(select(Problema.id)))
+            self.by_tag = by_tag
+            self.loaded_at = time.monotonic()
+
+    def invalidar(self):
+        '''Força a reconstrução no próximo ensure_loaded.'''
+        self.loaded_at = None
+
+    # manutenção
+    def set_problema(self, problema_id: int, tag_ids: Iterable[int]):
+        tag_ids = set(tag_ids)
+        self.problemas.add(problema_id)
+        for tag_id, bitmap in self.by_tag.items():
+            if tag_id not in tag_ids:
+                bitmap.discard(problema_id)
+        for tag_id in tag_ids:
+            self.by_tag.setdefault(tag_id, Bitmap()).add(problema_id)
+
+    def attach(self, problema_id: int, tag_ids: Iterable[int]):
+        for tag_id in tag_ids:
+            self.by_tag.setdefault(tag_id, Bitmap()).add(problema_id)
+
+    def detach(self, problema_id: int, tag_ids: Iterable[int]):
+        for tag_id in tag_ids:
+            if tag_id in self.by_tag:
+                self.by_tag[tag_id].discard(problema_id)
+
+    def remove_problema(self, problema_id: int):
+        self.problemas.discard(problema_id)
+        for bitmap in self.by_tag.values():
+            bitmap.discard(problema_id)
+
+    def set_tag(self, tag_id: int, nome: str):
+        for ids in self.tag_ids.values():
+            ids.discard(tag_id)
+        self.tag_ids.setdefault(nome, set()).add(tag_id)
+
+    def remove_tag(self, tag_id: int):
+        for ids in self.tag_ids.values():
+            ids.discard(tag_id)
+        self.by_tag.pop(tag_id, None)
+
+    # consulta
+    def tag(self, nome: str) -> Bitmap:
+        result = Bitmap()
+        for tag_id in self.tag_ids.get(nome, ()):
+            result = result | self.by_tag.get(tag_id, Bitmap())
+        return result
+
+    def any_of(self, nomes: Iterable[str]) -> Bitmap:
+        result = Bitmap()
+        for nome in nomes:
+            result = result | self.tag(nome)
+        return result
+
+    def matching(self, nomes: list[str] | None = None, expression: str | None = None) -> Bitmap:
+        '''Ids com qualquer uma das tags em 'nomes' e que satisfazem 'expression'.'''
+        result = self.any_of(nomes) if nomes is not None else None
+        if expression:
+            evaluated = self.evaluate(parse_tag_expression(expression))
+            result = evaluated if result is None else result & evaluated
+        return result if result is not None else Bitmap()
+
+    def evaluate(self, tree) -> Bitmap:
+        match tree:
+            case ('tag', nome):
+                return self.tag(nome)
+            case ('and', left, right):
+                return self.evaluate(left) & self.evaluate(right)
+            case ('or', left, right):
+                return self.evaluate(left) | self.evaluate(right)
+            case ('not', operand):
+                return self.problemas - self.evaluate(operand)
+
+tag_index = TagIndex(ttl = settings.TAG_INDEX_TTL)
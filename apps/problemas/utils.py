@@ -1,27 +1,51 @@
 # Base
-from typing import Annotated, Tuple
+from itertools import islice
+from typing import Annotated, AsyncIterator, Iterable, Tuple
 from fastapi import HTTPException, status
 
 # Database
-from database.connection import DBSessionDep
+from database.connection import AsyncDBSessionDep, async_session_maker
 from database.utils import upsert_row, delete_row
 from sqlmodel import select, col
+from sqlalchemy import delete, func, insert, literal, or_, true, union_all, update
+from sqlalchemy.exc import SQLAlchemyError
+from database.loaders import loader_options, relation_names
+from database.projection import projection_options
+from apps.problemas.resumo import ProblemaResumo, EventoResumo, TagResumo, colunas, buscar
+from database.pagination import paginate, decode_cursor
+from database.search import apply_search
+from database.counts import count_rows
 
 # Dependencies
 from apps.problemas.dependencies import ProblemaDep, EventoDep, TagDep
 from apps.auth.utils import DBCurrentUserDep
 
 # Schemas
-from database.schemas.problemas import Problema, Problema_Tag, Evento, Tag, Sugestao, Sugestao_User, Status_Sugestao
+from database.schemas.problemas import Problema, Problema_Tag, Problema_User, Evento, Tag, Sugestao, Sugestao_User, Status_Sugestao, wilson_score
 from database.schemas.users import User
-from apps.problemas.models.requests import EventoCreate, EventoRead, ProblemaCreate, ProblemaRead, ProblemaUpdate, TagRead, TagCreate, SugestaoCreate, SugestaoRead
+from apps.problemas.models.requests import EventoCreate, EventoRead, ProblemaCreate, ProblemaImport, ProblemaListQueryParams, ProblemaRead, ProblemaUpdate, TagRead, TagCreate, SugestaoCreate, SugestaoRead
+from apps.problemas.models.responses import ProblemaFullResponse, SugestaoSingleResponse
+
+# Utils
+from apps.problemas.tag_index import MAX_IDS_IN, tag_index, tag_predicate
+from apps.problemas.similares import similar_index
+from apps.problemas.duplicados import LIMIAR_DUPLICADO, duplicate_index
+from apps.problemas.lsh import estimate
+from apps.problemas.votos_stream import votos_fanout
+
+# relacionamentos serializados por ProblemaFullResponse
+PROBLEMA_RELATIONS = relation_names(Problema, ProblemaFullResponse)
+
+# tabelas lidas pelos filtros de cada listagem (invalidação dos totais)
+PROBLEMA_FILTER_TABLES = ('problema', 'problema_tag', 'tag', 'evento')
+SUGESTAO_FILTER_TABLES = ('sugestao', 'sugestao_user')
 
 class Problemas:
 
-    def atribuir_tags(*,
+    async def atribuir_tags(*,
         problema: ProblemaDep,
         tags: list[TagRead] | None = None,
-        db: DBSessionDep
+        db: AsyncDBSessionDep
     ) -> Tuple[list[Tag], list[TagRead]]:
 
         tags_inseridas = []
@@ -33,7 +57,7 @@ class Problemas:
                 tags_erros.append({"Tag": tag, "Erro": "Já atribuída"})
                 continue
 
-            tag_lookup = db.get(Tag, tag.id)
+            tag_lookup = await db.get(Tag, tag.id)
 
             if tag_lookup is None:
                 tags_erros.append({"Tag": tag, "Erro": "Não encontrada"})
@@ -43,17 +67,20 @@ class Problemas:
             tags_inseridas.append(tag_lookup)
         
         try:
-            problema = upsert_row(model_instance = problema, db = db)
+            problema = await upsert_row(model_instance = problema, db = db, relations = PROBLEMA_RELATIONS)
         except:
             raise
 
+        tag_index.attach(problema.id, [tag.id for tag in tags_inseridas])
+        similar_index.attach(problema.id, [tag.id for tag in tags_inseridas])
+
         return tags_inseridas, tags_erros
 
 
-    def desvincular_tags(*,
+    async def desvincular_tags(*,
         problema: ProblemaDep,
         tags: list[TagRead] | None = None,
-        db: DBSessionDep
+        db: AsyncDBSessionDep
     ) -> Tuple[list[Tag], list[TagRead]]:
 
         tags_a_remover = [tag.id for tag in tags]
@@ -64,29 +91,32 @@ class Problemas:
                 problema.tags.remove(tag)
         
         try:
-            problema = upsert_row(model_instance = problema, db = db)
+            problema = await upsert_row(model_instance = problema, db = db, relations = PROBLEMA_RELATIONS)
         except:
             raise
+
+        tag_index.detach(problema.id, tags_a_remover)
+        similar_index.detach(problema.id, tags_a_remover)
     
 
-    def create(*,
+    async def create(*,
         problema: ProblemaCreate,
         evento: EventoRead | None = None,
         tags: list[TagRead] | None = None,
         current_user: User,
-        db: DBSessionDep,
+        db: AsyncDBSessionDep,
     ) -> Problema:
         
         problema = Problema(**problema.model_dump())
 
         if evento is not None:
-            evento_db = db.get(Evento, evento.id)
+            evento_db = await db.get(Evento, evento.id)
             if evento is not None:
                 problema.evento = evento_db
         
         if tags is not None:
             tags_query = select(Tag).where(Tag.id.in_([tag.id for tag in tags]))
-            tags_found = db.exec(tags_query).all()
+            tags_found = (await db.exec(tags_query)).all()
             if tags_found:
                 problema.tags = tags_found
 
@@ -94,22 +124,112 @@ class Problemas:
         problema.uploaders.append(current_user)
         
         try:
-            problema_updated = upsert_row(model_instance = problema, db = db)
+            problema_updated = await upsert_row(model_instance = problema, db = db, relations = PROBLEMA_RELATIONS)
         except:
             raise
 
+        tag_index.set_problema(problema_updated.id, [tag.id for tag in problema_updated.tags])
+        similar_index.set_problema(problema_updated.id, problema_updated.categoria, problema_updated.dificuldade, [tag.id for tag in problema_updated.tags])
+        duplicate_index.set_problema(problema_updated.id, problema_updated.titulo, problema_updated.enunciado)
+
         return problema_updated
     
-    def get(*,
+    async def importar(*,
+        linhas: Iterable[tuple[int, ProblemaImport | str]],
+        uploader: User | None = None,
+        lote: int = 1000,
+        db: AsyncDBSessionDep,
+    ) -> dict:
+        '''
+        Importa as linhas (número, problema validado ou erro de leitura) em
+        lotes de 'lote', um lote por transação: uma consulta para as tags e
+        uma para os eventos citados no lote, e inserts de várias linhas em
+        problema, problema_tag e problema_user.
+        Linhas com erro são reportadas e não impedem as demais.
+        '''
+        inseridos = 0
+        erros = []
+
+        linhas = iter(linhas)
+        while bloco := list(islice(linhas, lote)):
+            validos = []
+            for numero, problema in bloco:
+                if isinstance(problema, str):
+                    erros.append({ 'linha': numero, 'erro': problema })
+                else:
+                    validos.append((numero, problema))
+
+            # nome de tag e título de evento não são únicos: vale o de menor id
+            nomes = { nome for _, problema in validos for nome in problema.tags }
+            tag_ids = {}
+            if nomes:
+                for id, nome in await db.exec(select(Tag.id, Tag.nome).where(Tag.nome.in_(nomes)).order_by(Tag.id)):
+                    tag_ids.setdefault(nome, id)
+
+            titulos = { problema.evento for _, problema in validos if problema.evento }
+            evento_ids = {}
+            if titulos:
+                for id, titulo in await db.exec(select(Evento.id, Evento.titulo).where(Evento.titulo.in_(titulos)).order_by(Evento.id)):
+                    evento_ids.setdefault(titulo, id)
+
+            numeros, registros, tags_por_registro = [], [], []
+            for numero, problema in validos:
+                faltando = [nome for nome in problema.tags if nome not in tag_ids]
+                if faltando:
+                    erros.append({ 'linha': numero, 'erro': "Tags não encontradas: " + ', '.join(faltando) })
+                    continue
+
+                if problema.evento and problema.evento not in evento_ids:
+                    erros.append({ 'linha': numero, 'erro': "Evento não encontrado: " + problema.evento })
+                    continue
+
+                numeros.append(numero)
+                registros.append({
+                    **problema.model_dump(exclude = {'evento', 'tags'}),
+                    'evento_id': evento_ids.get(problema.evento),
+                })
+                tags_por_registro.append({ tag_ids[nome] for nome in problema.tags })
+
+            if not registros:
+                continue
+
+            try:
+                ids = (await db.exec(
+                    insert(Problema).returning(Problema.id, sort_by_parameter_order = True),
+                    params = registros
+                )).scalars().all()
+
+                ligacoes = [
+                    { 'problema_id': id, 'tag_id': tag_id }
+                    for id, tags in zip(ids, tags_por_registro) for tag_id in tags
+                ]
+                if ligacoes:
+                    await db.exec(insert(Problema_Tag), params = ligacoes)
+
+                if uploader is not None:
+                    await db.exec(insert(Problema_User), params = [{ 'problema_id': id, 'user_id': uploader.id } for id in ids])
+
+                await db.commit()
+            except SQLAlchemyError as error:
+                await db.rollback()
+                erros.extend({ 'linha': numero, 'erro': f"Lote não inserido: {getattr(error, 'orig', error)}" } for numero in numeros)
+                continue
+
+            for id, registro, tags in zip(ids, registros, tags_por_registro):
+                tag_index.set_problema(id, tags)
+                similar_index.set_problema(id, registro['categoria'], registro.get('dificuldade'), tags)
+                duplicate_index.set_problema(id, registro['titulo'], registro['enunciado'])
+            inseridos += len(ids)
+
+        erros.sort(key = lambda erro: erro['linha'])
+        return { 'inseridos': inseridos, 'erros': erros }
+
+    def filtrar(*,
+        query,
         problema: ProblemaRead | None = None,
         eventos: list[EventoRead] | None = None,
-        tags: list[TagRead] | None = None,
-        skip: int = 0,
-        limit: int = 100,
-        db: DBSessionDep
-    ) -> list[Problema]:
-
-        query = select(Problema)
+    ):
+        '''Filtros de coluna de ProblemaListQueryParams, compartilhados pela listagem e pelas facetas.'''
         if problema is not None:
             if problema.titulo:
                 query = query.where(Problema.titulo.like('%'+problema.titulo+'%'))
@@ -127,11 +247,11 @@ class Problemas:
                 )
             if problema.limite_memoria_inf:
                 query = query.where(
-                    Problema.limite_memoria >= problema.limite_memoria_inf
+                    Problema.limite_memoria_mb >= problema.limite_memoria_inf
                 )
             if problema.limite_memoria_sup:
                 query = query.where(
-                    Problema.limite_memoria <= problema.limite_memoria_sup
+                    Problema.limite_memoria_mb <= problema.limite_memoria_sup
                 )
             if problema.categoria:
                 query = query.where(
@@ -148,27 +268,432 @@ class Problemas:
 
         if eventos is not None:
             query = query.join(Evento).where(Evento.titulo.in_(eventos))
-        
-        if tags is not None:
-            query = query.join(Problema_Tag).join(Tag).where(
-                Tag.nome.in_(tags)
+
+        return query
+
+    def tem_filtros_sql(*,
+        problema: ProblemaRead | None = None,
+        eventos: list[EventoRead] | None = None,
+        busca: str | None = None,
+    ) -> bool:
+        '''Se há filtros além das tags, que são resolvidas no índice em memória.'''
+        return eventos is not None or bool(busca) or (
+            problema is not None and bool(problema.model_dump(exclude_none = True))
+        )
+
+    async def filtro_tags(*,
+        tags: list[TagRead] | None = None,
+        tags_expr: str | None = None,
+        outros_filtros: bool = False,
+        db: AsyncDBSessionDep
+    ):
+        '''
+        Predicado das tags: IN com os ids do índice quando são até MAX_IDS_IN
+        e não há outros filtros; senão subqueries em problema_tag, que o
+        banco combina com os outros predicados sem receber o bitmap inteiro.
+        '''
+        if not outros_filtros:
+            await tag_index.ensure_loaded(db)
+            ids = tag_index.matching(nomes = tags, expression = tags_expr)
+            if len(ids) <= MAX_IDS_IN:
+                return Problema.id.in_(list(ids))
+
+        return tag_predicate(nomes = tags, expression = tags_expr)
+
+    async def contar(*,
+        problema: ProblemaRead | None = None,
+        eventos: list[EventoRead] | None = None,
+        tags: list[TagRead] | None = None,
+        tags_expr: str | None = None,
+        busca: str | None = None,
+        db: AsyncDBSessionDep
+    ) -> tuple[int, bool]:
+        '''(total, exato) da listagem com esses filtros; só tags: o tamanho do bitmap.'''
+        if (tags is not None or tags_expr) and not Problemas.tem_filtros_sql(problema = problema, eventos = eventos, busca = busca):
+            await tag_index.ensure_loaded(db)
+            return len(tag_index.matching(nomes = tags, expression = tags_expr)), True
+
+        query = await Problemas.aplicar_filtros(
+            query = select(Problema.id),
+            problema = problema,
+            eventos = eventos,
+            tags = tags,
+            tags_expr = tags_expr,
+            busca = busca,
+            db = db
+        )
+
+        return await count_rows(query, tables = PROBLEMA_FILTER_TABLES, db = db)
+
+    async def aplicar_filtros(*,
+        query,
+        problema: ProblemaRead | None = None,
+        eventos: list[EventoRead] | None = None,
+        tags: list[TagRead] | None = None,
+        tags_expr: str | None = None,
+        busca: str | None = None,
+        db: AsyncDBSessionDep
+    ):
+        '''Todos os filtros da listagem, sem paginação: colunas, tags (pelo índice) e busca textual.'''
+        query = Problemas.filtrar(query = query, problema = problema, eventos = eventos)
+
+        if tags is not None or tags_expr:
+            query = query.where(await Problemas.filtro_tags(
+                tags = tags,
+                tags_expr = tags_expr,
+                outros_filtros = Problemas.tem_filtros_sql(problema = problema, eventos = eventos, busca = busca),
+                db = db
+            ))
+
+        if busca:
+            query = apply_search(query, busca, db.get_bind().dialect.name)
+
+        return query
+
+    async def alterar_tags_em_lote(*,
+        acao: str,
+        tag_ids: list[int],
+        problema_ids: list[int] | None = None,
+        filtro: ProblemaListQueryParams | None = None,
+        restrito_a: User | None = None,
+        db: AsyncDBSessionDep
+    ) -> dict:
+        '''
+        Atribui ('atribuir') ou desvincula ('desvincular') as tags de todos os
+        problemas selecionados por id ou pelo filtro da listagem com um único
+        INSERT ... SELECT (ignorando pares existentes) ou DELETE em problema_tag.
+        'restrito_a' limita a seleção aos problemas de que o usuário é uploader.
+        '''
+        alvo = select(Problema.id)
+        if problema_ids is not None:
+            alvo = alvo.where(Problema.id.in_(problema_ids))
+
+        if filtro is not None:
+            alvo = await Problemas.aplicar_filtros(
+                query = alvo,
+                problema = ProblemaRead(**filtro.model_dump(exclude = {'skip', 'limit', 'cursor', 'ordenar'})),
+                eventos = filtro.eventos,
+                tags = filtro.tags,
+                tags_expr = filtro.tags_expr,
+                busca = filtro.q,
+                db = db
             )
+            alvo = alvo.order_by(None)
 
-        query = query.limit(limit).offset(skip)
+        if restrito_a is not None:
+            alvo = alvo.where(Problema.id.in_(
+                select(Problema_User.problema_id).where(Problema_User.user_id == restrito_a.id)
+            ))
+
+        tags_encontradas = (await db.exec(select(Tag.id).where(Tag.id.in_(tag_ids)))).all()
+        ids = (await db.exec(alvo)).all()
+
+        resultado = {
+            'problemas': len(ids),
+            'tags_nao_encontradas': sorted(set(tag_ids) - set(tags_encontradas)),
+            'alterados': 0,
+        }
+        if not ids or not tags_encontradas:
+            return resultado
+
+        alvo = alvo.subquery()
+        if acao == 'atribuir':
+            statement = insert(Problema_Tag).from_select(
+                ['problema_id', 'tag_id'],
+                select(alvo.c.id, Tag.id).join(Tag, true()).where(Tag.id.in_(tags_encontradas))
+            ).prefix_with('OR IGNORE', dialect = 'sqlite').prefix_with('IGNORE', dialect = 'mysql')
+        else:
+            statement = delete(Problema_Tag).where(
+                Problema_Tag.tag_id.in_(tags_encontradas),
+                Problema_Tag.problema_id.in_(select(alvo.c.id)),
+            )
 
         try:
-            problemas = db.exec(query)
+            resultado['alterados'] = (await db.exec(statement)).rowcount
+            await db.commit()
         except:
+            await db.rollback()
             raise
-        
-        return problemas if problemas else False
 
-    def update(*,
+        for id in ids:
+            if acao == 'atribuir':
+                tag_index.attach(id, tags_encontradas)
+                similar_index.attach(id, tags_encontradas)
+            else:
+                tag_index.detach(id, tags_encontradas)
+                similar_index.detach(id, tags_encontradas)
+
+        return resultado
+
+    async def similares(*,
+        problema: Problema,
+        k: int = 10,
+        db: AsyncDBSessionDep,
+    ) -> list[dict]:
+        '''Os k problemas mais parecidos, pelo índice LSH (sem comparar com o catálogo todo).'''
+        await similar_index.ensure_loaded(db)
+
+        if problema.id not in similar_index.problemas:
+            # criado por outro worker depois da última reconstrução
+            tag_ids = (await db.exec(select(Problema_Tag.tag_id).where(Problema_Tag.problema_id == problema.id))).all()
+            similar_index.set_problema(problema.id, problema.categoria, problema.dificuldade, tag_ids)
+
+        ranking = similar_index.top(problema.id, k)
+
+        try:
+            encontrados = (await db.exec(select(Problema).where(Problema.id.in_([id for id, _ in ranking])))).all()
+        except:
+            raise
+
+        por_id = { encontrado.id: encontrado for encontrado in encontrados }
+        return [
+            { 'problema': por_id[id], 'similaridade': round(score, 4) }
+            for id, score in ranking if id in por_id
+        ]
+
+    async def duplicados(*,
+        problema: Problema,
+        limiar: float = LIMIAR_DUPLICADO,
+        k: int = 10,
+        esperar: bool = True,
+        db: AsyncDBSessionDep,
+    ) -> list[dict]:
+        '''
+        Possíveis duplicatas de 'problema' (titulo + enunciado), com a
+        similaridade estimada. esperar = False (create) não espera a
+        reconstrução do índice: consulta o carregado, ou nenhum, e agenda a
+        recarga em background.
+        '''
+        if esperar:
+            await duplicate_index.ensure_loaded(db)
+        else:
+            duplicate_index.recarregar_em_background()
+            if not duplicate_index.carregado:
+                return []
+
+        if problema.id not in duplicate_index.index:
+            duplicate_index.set_problema(problema.id, problema.titulo, problema.enunciado)
+
+        candidatos = duplicate_index.candidatos(problema.id, limiar = limiar, k = k)
+        titulos = await Problemas._titulos([id for id, _ in candidatos], db = db)
+
+        return [
+            { 'id': id, 'titulo': titulos[id], 'similaridade': round(similaridade, 4) }
+            for id, similaridade in candidatos if id in titulos
+        ]
+
+    async def clusters_duplicados(*,
+        limiar: float = LIMIAR_DUPLICADO,
+        limit: int = 100,
+        db: AsyncDBSessionDep,
+    ) -> list[dict]:
+        '''
+        Grupos de possíveis duplicatas no catálogo inteiro, a partir dos
+        buckets do LSH. A similaridade de cada membro é em relação ao
+        primeiro (menor id) do grupo.
+        '''
+        await duplicate_index.ensure_loaded(db)
+
+        grupos = duplicate_index.clusters(limiar)[:limit]
+        titulos = await Problemas._titulos([id for grupo in grupos for id in grupo], db = db)
+        signatures = duplicate_index.index.signatures
+
+        clusters = []
+        for grupo in grupos:
+            # ids apagados por outro worker desde a última reconstrução ficam de fora
+            membros = [
+                { 'id': id, 'titulo': titulos[id], 'similaridade': round(estimate(signatures[grupo[0]], signatures[id]), 4) }
+                for id in grupo if id in titulos
+            ]
+            if len(membros) > 1:
+                clusters.append({ 'problemas': membros })
+
+        return clusters
+
+    async def _titulos(ids: list[int], *, db: AsyncDBSessionDep) -> dict[int, str]:
+        if not ids:
+            return {}
+
+        try:
+            return dict((await db.exec(select(Problema.id, Problema.titulo).where(Problema.id.in_(ids)))).all())
+        except:
+            raise
+
+    async def facetas(*,
+        problema: ProblemaRead | None = None,
+        eventos: list[EventoRead] | None = None,
+        tags: list[TagRead] | None = None,
+        tags_expr: str | None = None,
+        busca: str | None = None,
+        db: AsyncDBSessionDep
+    ) -> dict[str, dict[str, int]]:
+        '''
+        Contagem por valor de categoria, dificuldade, autor, tag e evento dos
+        problemas que passam pelos filtros. Uma única query: os agrupamentos
+        são unidos com UNION ALL sobre o mesmo conjunto filtrado.
+        '''
+        filtrados = await Problemas.aplicar_filtros(
+            query = select(Problema.id),
+            problema = problema,
+            eventos = eventos,
+            tags = tags,
+            tags_expr = tags_expr,
+            busca = busca,
+            db = db
+        )
+        filtrados = filtrados.order_by(None).subquery()
+
+        def agrupar(faceta: str, valor, query):
+            return query.add_columns(
+                literal(faceta).label('faceta'), valor.label('valor'), func.count().label('total')
+            ).group_by(valor)
+
+        problemas = select().select_from(Problema).join(filtrados, filtrados.c.id == Problema.id)
+        query = union_all(
+            agrupar('categoria', Problema.categoria, problemas),
+            agrupar('dificuldade', Problema.dificuldade, problemas),
+            agrupar('autor', Problema.autor, problemas),
+            agrupar('tag', Tag.nome, select().select_from(Tag).join(Problema_Tag).join(filtrados, filtrados.c.id == Problema_Tag.problema_id)),
+            agrupar('evento', Evento.titulo, select().select_from(Evento).join(Problema).join(filtrados, filtrados.c.id == Problema.id)),
+        )
+
+        facetas = { faceta: {} for faceta in ('categoria', 'dificuldade', 'autor', 'tag', 'evento') }
+        try:
+            for faceta, valor, total in await db.exec(query):
+                if valor is not None:
+                    # nome de tag não é único: tags homônimas somam
+                    facetas[faceta][valor] = facetas[faceta].get(valor, 0) + total
+        except:
+            raise
+
+        return facetas
+
+    async def exportar(*,
+        problema: ProblemaRead | None = None,
+        eventos: list[EventoRead] | None = None,
+        tags: list[TagRead] | None = None,
+        tags_expr: str | None = None,
+        busca: str | None = None,
+        lote: int = 500,
+    ) -> AsyncIterator[str]:
+        '''
+        Todos os problemas filtrados em NDJSON (uma linha por ProblemaFullResponse).
+
+        Lê com cursor no servidor (yield_per): a cada lote de 'lote' linhas as
+        tags e os uploaders vêm em uma query IN cada. O identity map guarda
+        referências fracas a objetos não modificados, então cada lote é
+        liberado depois de serializado e a memória não cresce com o catálogo.
+        Usa sessão própria: a resposta continua sendo enviada depois da rota.
+        '''
+        async with async_session_maker() as db:
+            query = await Problemas.aplicar_filtros(
+                query = select(Problema),
+                problema = problema,
+                eventos = eventos,
+                tags = tags,
+                tags_expr = tags_expr,
+                busca = busca,
+                db = db
+            )
+            if not busca:
+                query = query.order_by(Problema.id)
+
+            query = query.options(*loader_options(Problema, ProblemaFullResponse)).execution_options(yield_per = lote)
+
+            result = await db.stream_scalars(query)
+            async for problemas in result.partitions():
+                yield ''.join(
+                    ProblemaFullResponse.model_validate(problema).model_dump_json() + '\n'
+                    for problema in problemas
+                )
+
+    async def get(*,
+        problema: ProblemaRead | None = None,
+        eventos: list[EventoRead] | None = None,
+        tags: list[TagRead] | None = None,
+        tags_expr: str | None = None,
+        busca: str | None = None,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: str | None = None,
+        ordenar: str = 'id',
+        campos: frozenset[str] | None = None,
+        resumo: bool = False,
+        revalidar: bool = True,
+        db: AsyncDBSessionDep
+    ) -> list[Problema] | list[ProblemaResumo]:
+        '''
+        campos: projeção de ?fields= (só essas colunas e relacionamentos são carregados).
+        resumo: registros ProblemaResumo a partir de um select só de colunas.
+        revalidar: refazer a consulta com o índice de tags reconstruído se a
+        página tirada do bitmap vier incompleta.
+        '''
+        pedido = dict(
+            problema = problema, eventos = eventos, tags = tags, tags_expr = tags_expr, busca = busca,
+            skip = skip, limit = limit, cursor = cursor, ordenar = ordenar, campos = campos, resumo = resumo
+        )
+        base = select(*colunas(ProblemaResumo)) if resumo else select(Problema)
+        query = Problemas.filtrar(query = base, problema = problema, eventos = eventos)
+        pagina = None
+
+        # tags: resolvidas no índice em memória (sem join, sem linhas duplicadas)
+        if tags is not None or tags_expr:
+            filtros_sql = Problemas.tem_filtros_sql(problema = problema, eventos = eventos, busca = busca)
+            if not filtros_sql and ordenar == 'id':
+                # apenas tags: a página sai direto do bitmap
+                await tag_index.ensure_loaded(db)
+                ids = tag_index.matching(nomes = tags, expression = tags_expr)
+                if cursor is not None:
+                    after = decode_cursor(cursor, 'id')[1]
+                    pagina = list(islice(ids.iter_from(after), limit))
+                else:
+                    pagina = list(islice(ids, skip, skip + limit))
+
+                # o predicado em SQL confere a página: ids que outro worker
+                # removeu ou desvinculou deixam a página curta (ver abaixo)
+                query = query.where(Problema.id.in_(pagina), tag_predicate(nomes = tags, expression = tags_expr))
+                skip, cursor = 0, None
+            else:
+                query = query.where(await Problemas.filtro_tags(tags = tags, tags_expr = tags_expr, outros_filtros = filtros_sql, db = db))
+
+        if busca:
+            if cursor is not None:
+                raise HTTPException(
+                    status_code = status.HTTP_400_BAD_REQUEST,
+                    detail = "Busca textual é ordenada por relevância: pagine com skip"
+                )
+            query = apply_search(query, busca, db.get_bind().dialect.name)
+
+        if resumo:
+            query = paginate(query, model = Problema, sort = ordenar, cursor = cursor, skip = skip, limit = limit)
+            problemas = await buscar(query, ProblemaResumo, db)
+        else:
+            if campos is not None:
+                # a coluna de ordenação entra para o cursor da próxima página
+                query = query.options(*projection_options(Problema, ProblemaFullResponse, campos | {ordenar}))
+            else:
+                query = query.options(*loader_options(Problema, ProblemaFullResponse))
+            query = paginate(query, model = Problema, sort = ordenar, cursor = cursor, skip = skip, limit = limit)
+
+            try:
+                problemas = (await db.exec(query)).all()
+            except:
+                raise
+
+        # página curta: o bitmap está desatualizado e a paginação terminaria
+        # antes da hora; reconstrói o índice e refaz a página uma vez
+        if pagina is not None and len(problemas) < len(pagina) and revalidar:
+            tag_index.invalidar()
+            return await Problemas.get(**pedido, revalidar = False, db = db)
+
+        return problemas
+
+    async def update(*,
         problema: Problema,
         problema_update: ProblemaUpdate | None = None,
         evento_update: EventoRead | None = None,
         tags: list[TagRead] | None = None,
-        db: DBSessionDep,
+        db: AsyncDBSessionDep,
     ):
         if problema_update is not None:
             if problema_update.titulo:
@@ -193,84 +718,108 @@ class Problemas:
                 problema.limite_memoria_mb = problema_update.limite_memoria_mb
 
         if evento_update is not None:
-            evento = db.get(Evento, evento_update.id)
+            evento = await db.get(Evento, evento_update.id)
             if evento is not None:
                 problema.evento = evento
         
         if tags is not None:
             tags_query = select(Tag).where(Tag.id.in_([tag.id for tag in tags]))
-            tags_found = db.exec(tags_query).all()
+            tags_found = (await db.exec(tags_query)).all()
             if tags_found:
                 problema.tags = tags_found
         
         try:
-            problema_updated = upsert_row(model_instance = problema, db = db)
+            problema_updated = await upsert_row(model_instance = problema, db = db, relations = PROBLEMA_RELATIONS)
         except:
             raise
 
+        if tags is not None:
+            tag_index.set_problema(problema_updated.id, [tag.id for tag in problema_updated.tags])
+        similar_index.set_problema(problema_updated.id, problema_updated.categoria, problema_updated.dificuldade, [tag.id for tag in problema_updated.tags])
+        duplicate_index.set_problema(problema_updated.id, problema_updated.titulo, problema_updated.enunciado)
+
         return problema_updated
     
-    def vincular_evento(*,
+    async def vincular_evento(*,
         problema: ProblemaDep,
         evento: EventoRead,
-        db: DBSessionDep
+        db: AsyncDBSessionDep
     ) -> Problema:
         
         try:
-            evento_db = db.get(Evento, evento.id)
+            evento_db = await db.get(Evento, evento.id)
             if evento_db is not None:
                 problema.evento = evento_db
         
-            problema = upsert_row(model_instance = problema, db = db)
+            problema = await upsert_row(model_instance = problema, db = db, relations = PROBLEMA_RELATIONS)
             return problema
         except:
             raise
 
 
-    def desvincular_evento(*,
+    async def desvincular_evento(*,
         problema: ProblemaDep,
-        db: DBSessionDep
+        db: AsyncDBSessionDep
     ) -> Problema:
         
         try:
             problema.evento = None
 
-            problema = upsert_row(model_instance = problema, db = db)
+            problema = await upsert_row(model_instance = problema, db = db, relations = PROBLEMA_RELATIONS)
         except:
             raise
     
 class Eventos:
 
-    def get(*,
+    def filtrar(*,
+        query,
+        evento: EventoRead | None = None,
+    ):
+        if evento is not None:
+            if evento.titulo:
+                query = query.where(Evento.titulo.like("%"+evento.titulo+"%"))
+
+        return query
+
+    async def contar(*,
+        evento: EventoRead | None = None,
+        db: AsyncDBSessionDep,
+    ) -> tuple[int, bool]:
+        query = Eventos.filtrar(query = select(Evento.id), evento = evento)
+        return await count_rows(query, tables = ('evento',), db = db)
+
+    async def get(*,
         evento: EventoRead | None = None,
         skip: int = 0,
         limit: int = 100,
-        db: DBSessionDep,      
+        cursor: str | None = None,
+        ordenar: str = 'id',
+        resumo: bool = False,
+        db: AsyncDBSessionDep,      
     ) -> Evento:
         
-        query = select(Evento)
-        if evento is not None:
-            if evento.titulo:
-                query = query.where(Evento.titulo.like("%"+evento.titulo+"%"))
+        query = Eventos.filtrar(query = select(*colunas(EventoResumo)) if resumo else select(Evento), evento = evento)
+        query = paginate(query, model = Evento, sort = ordenar, cursor = cursor, skip = skip, limit = limit)
+        if resumo:
+            return await buscar(query, EventoResumo, db)
 
-        query = query.limit(limit).offset(skip)
         try:
-            evento_results = db.exec(query)
+            evento_results = (await db.exec(query)).all()
         except:
             raise
 
         return evento_results
     
-    def update(*,
+    async def update(*,
         evento: EventoDep,
         evento_update: EventoCreate | None = None,
-        db: DBSessionDep,
+        db: AsyncDBSessionDep,
     ):  
         if evento.titulo != evento_update.titulo:
             evento.titulo = evento_update.titulo
         
         try:
-            evento_updated = upsert_row(model_instance = evento, db = db)
+            evento_updated = await upsert_row(model_instance = evento, db = db)
         except:
             raise
 
@@ -278,35 +827,54 @@ class Eventos:
 
 class Tags:
 
-    def get(*,
+    def filtrar(*,
+        query,
+        tag: TagRead | None = None,
+    ):
+        if tag is not None:
+            if tag.nome is not None:
+                query = query.where(Tag.nome.like("%"+tag.nome+"%"))
+
+        return query
+
+    async def contar(*,
+        tag: TagRead | None = None,
+        db: AsyncDBSessionDep,
+    ) -> tuple[int, bool]:
+        query = Tags.filtrar(query = select(Tag.id), tag = tag)
+        return await count_rows(query, tables = ('tag',), db = db)
+
+    async def get(*,
         tag: TagRead | None = None,
         skip: int = 0,
         limit: int = 100,
-        db: DBSessionDep,      
+        cursor: str | None = None,
+        ordenar: str = 'id',
+        resumo: bool = False,
+        db: AsyncDBSessionDep,      
     ) -> Tag:
         
-        query = select(Tag)
-        if tag is not None:
-            if tag.nome is not None:
-                query = query.where(Tag.nome.like("%"+tag.nome+"%"))
+        query = Tags.filtrar(query = select(*colunas(TagResumo)) if resumo else select(Tag), tag = tag)
+        query = paginate(query, model = Tag, sort = ordenar, cursor = cursor, skip = skip, limit = limit)
+        if resumo:
+            return await buscar(query, TagResumo, db)
 
-        query = query.limit(limit).offset(skip)
         try:
-            tag_results = db.exec(query)
+            tag_results = (await db.exec(query)).all()
             return tag_results
         except:
             raise
     
-    def update(*,
+    async def update(*,
         tag: TagDep,
         tag_update: TagCreate | None = None,
-        db: DBSessionDep,
+        db: AsyncDBSessionDep,
     ):  
         if tag.nome != tag_update.nome:
             tag.nome = tag_update.nome
         
         try:
-            tag_updated = upsert_row(model_instance = tag, db = db)
+            tag_updated = await upsert_row(model_instance = tag, db = db)
         except:
             raise
 
@@ -315,34 +883,30 @@ class Tags:
 
 class Sugestoes:
 
-    def create(*,
+    async def create(*,
         sugestao: SugestaoCreate,
         problema: Problema,
         current_user: DBCurrentUserDep,
-        db: DBSessionDep,
+        db: AsyncDBSessionDep,
     ) -> Sugestao:
         
         sugestao = Sugestao(**sugestao.model_dump())
         sugestao.problema = problema
         sugestao.autor = current_user
         sugestao.autor_id = current_user.id
-        sugestao.ativa = True
+        sugestao.status = Status_Sugestao.ativa
 
         try:
-            sugestao_updated = upsert_row(model_instance = sugestao, db = db)
+            sugestao_updated = await upsert_row(model_instance = sugestao, db = db)
         except:
             raise
 
         return sugestao_updated
     
-    def get(*,
+    def filtrar(*,
+        query,
         sugestao: SugestaoRead | None = None,
-        skip: int = 0,
-        limit: int = 100,
-        db: DBSessionDep
-    ) -> list[Sugestao]:
-
-        query = select(Sugestao)
+    ):
         if sugestao is not None:
             if sugestao.problema_id:
                 query = query.where(
@@ -360,85 +924,308 @@ class Sugestoes:
                 query = query.where(
                     Sugestao.status == sugestao.status.value
                 )
-            if sugestao.upvotes_limite_inf:
+            # contadores em colunas indexadas (ix_sugestao_upvotes_count / downvotes_count)
+            if sugestao.upvotes_limite_inf is not None:
                 query = query.where(
-                    Sugestao.upvotes_count() >= sugestao.upvotes_limite_inf
+                    Sugestao.upvotes_count >= sugestao.upvotes_limite_inf
                 )
-            if sugestao.upvotes_limite_sup:
+            if sugestao.upvotes_limite_sup is not None:
                 query = query.where(
-                    Sugestao.upvotes_count() <= sugestao.upvotes_limite_sup
+                    Sugestao.upvotes_count <= sugestao.upvotes_limite_sup
                 )
-            if sugestao.downvotes_limite_inf:
+            if sugestao.downvotes_limite_inf is not None:
                 query = query.where(
-                    Sugestao.downvotes_count() >= sugestao.downvotes_limite_inf
+                    Sugestao.downvotes_count >= sugestao.downvotes_limite_inf
                 )
-            if sugestao.downvotes_limite_sup:
+            if sugestao.downvotes_limite_sup is not None:
                 query = query.where(
-                    Sugestao.downvotes_count() <= sugestao.downvotes_limite_sup
+                    Sugestao.downvotes_count <= sugestao.downvotes_limite_sup
                 )
 
-        query = query.limit(limit).offset(skip)
+        return query
+
+    async def contar(*,
+        sugestao: SugestaoRead | None = None,
+        db: AsyncDBSessionDep
+    ) -> tuple[int, bool]:
+        query = Sugestoes.filtrar(query = select(Sugestao.id), sugestao = sugestao)
+        return await count_rows(query, tables = SUGESTAO_FILTER_TABLES, db = db)
+
+    async def get(*,
+        sugestao: SugestaoRead | None = None,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: str | None = None,
+        ordenar: str = 'id',
+        db: AsyncDBSessionDep
+    ) -> list[Sugestao]:
+
+        query = Sugestoes.filtrar(query = select(Sugestao), sugestao = sugestao)
+        # score: maior primeiro; com problema_id e status vem de ix_sugestao_problema_id_status_score
+        query = paginate(query, model = Sugestao, sort = ordenar, cursor = cursor, skip = skip, limit = limit, descending = ordenar == 'score')
 
         try:
-            sugestoes_results = db.exec(query)
+            sugestoes_results = (await db.exec(query)).all()
         except:
             raise
         
-        return sugestoes_results if sugestoes_results else False
+        return sugestoes_results
 
-    def votar(*,
+    async def votar(*,
         sugestao: Sugestao,
         voto: bool,
         user: User,
-        db: DBSessionDep,
-    ) -> Sugestao:
-            
-        voto_link = Sugestoes.get_voto(sugestao = sugestao, user = user, db = db).one()
-        if voto_link is None:
-            voto_link = Sugestao_User(
-                sugestao = sugestao,
-                user = user,
-            )
+        db: AsyncDBSessionDep,
+    ) -> tuple[int, int]:
+        '''
+        Registra o voto e devolve (upvotes, downvotes), com uma transação e
+        sem ler o voto anterior: o INSERT IGNORE diz se o voto é novo e, se
+        não for, o UPDATE condicional diz se ele mudou. Os contadores recebem
+        o delta no mesmo commit.
+        '''
+        try:
+            delta = await Sugestoes._gravar_voto(sugestao_id = sugestao.id, user_id = user.id, voto = voto, db = db)
+            tallies = await Sugestoes._aplicar_delta(sugestao_id = sugestao.id, delta = delta, db = db)
+            await db.commit()
+        except:
+            await db.rollback()
+            raise
 
-        voto_link.voto = voto
+        votos_fanout.publicar(sugestao_id = sugestao.id, problema_id = sugestao.problema_id, upvotes = tallies[0], downvotes = tallies[1])
+        return tallies
 
+    async def votar_lote(*,
+        votos: dict[tuple[int, int], bool],
+        db: AsyncDBSessionDep,
+    ) -> int:
+        '''
+        Grava votos {(sugestao_id, user_id): voto} numa transação (o flush do
+        vote_buffer): um INSERT IGNORE / UPDATE por voto e um UPDATE de
+        contadores por sugestão. Votos em sugestões removidas ou que deixaram
+        de estar ativas são descartados. Retorna os votos gravados.
+        '''
+        ids = { sugestao_id for sugestao_id, _ in votos }
         try:
-            sugestao_user = upsert_row(model_instance = voto_link, db = db)
-            
-            if sugestao_user not in sugestao.votantes:
-                sugestao.votantes.append(sugestao_user)
-                sugestao = upsert_row(model_instance = sugestao, db = db)
+            # sugestao_id -> problema_id das que ainda recebem votos
+            ativas = dict((await db.exec(
+                select(Sugestao.id, Sugestao.problema_id).where(col(Sugestao.id).in_(ids), Sugestao.status == Status_Sugestao.ativa)
+            )).all())
 
-            return sugestao
-            
+            deltas: dict[int, tuple[int, int]] = {}
+            for (sugestao_id, user_id), voto in votos.items():
+                if sugestao_id not in ativas:
+                    continue
+                up, down = await Sugestoes._gravar_voto(sugestao_id = sugestao_id, user_id = user_id, voto = voto, db = db)
+                soma = deltas.get(sugestao_id, (0, 0))
+                deltas[sugestao_id] = (soma[0] + up, soma[1] + down)
+
+            tallies = {
+                sugestao_id: await Sugestoes._aplicar_delta(sugestao_id = sugestao_id, delta = delta, db = db)
+                for sugestao_id, delta in deltas.items() if delta != (0, 0)
+            }
+            await db.commit()
         except:
+            await db.rollback()
             raise
 
+        for sugestao_id, (upvotes, downvotes) in tallies.items():
+            votos_fanout.publicar(sugestao_id = sugestao_id, problema_id = ativas[sugestao_id], upvotes = upvotes, downvotes = downvotes)
+
+        return sum(1 for sugestao_id, _ in votos if sugestao_id in ativas)
+
+    async def contadores(*,
+        sugestao: Sugestao,
+        user: User,
+        pendente: bool | None,
+        db: AsyncDBSessionDep,
+    ) -> tuple[int, int]:
+        '''
+        (upvotes, downvotes) vistos por 'user': os contadores gravados mais o
+        efeito do seu voto ainda no vote_buffer ('pendente'), se houver.
+        '''
+        if pendente is None:
+            return sugestao.upvotes_count, sugestao.downvotes_count
+
+        upvotes, downvotes, gravado = (await Sugestoes._com_voto(sugestao_ids = [sugestao.id], user = user, db = db))[sugestao.id]
+        up, down = Sugestoes._delta(gravado, pendente)
+        return upvotes + up, downvotes + down
+
+    async def _com_voto(*,
+        sugestao_ids: list[int],
+        user: User,
+        db: AsyncDBSessionDep,
+    ) -> dict[int, tuple[int, int, bool | None]]:
+        '''
+        {sugestao_id: (upvotes, downvotes, voto gravado de 'user')} num único
+        SELECT: um flush que grave o voto pendente entre duas leituras
+        separadas somaria o voto duas vezes (ou nenhuma).
+        '''
+        linhas = await db.exec(
+            select(Sugestao.id, Sugestao.upvotes_count, Sugestao.downvotes_count, Sugestao_User.voto)
+            .outerjoin(Sugestao_User, (Sugestao_User.sugestao_id == Sugestao.id) & (Sugestao_User.user_id == user.id))
+            .where(col(Sugestao.id).in_(sugestao_ids))
+        )
+        return { id: (upvotes, downvotes, voto) for id, upvotes, downvotes, voto in linhas }
+
+    async def com_pendentes(*,
+        sugestoes: list[Sugestao],
+        user: User,
+        pendentes: dict[int, bool],
+        db: AsyncDBSessionDep,
+    ) -> list[Sugestao] | list[SugestaoSingleResponse]:
+        '''
+        Listagem como 'user' a vê: nas sugestões com voto dele ainda no
+        vote_buffer ('pendentes', sugestao_id -> voto), contadores e score
+        somam o efeito desse voto. Contadores e votos gravados dessas
+        sugestões são relidos juntos numa query só.
+        '''
+        if not pendentes:
+            return sugestoes
+
+        atuais = await Sugestoes._com_voto(sugestao_ids = list(pendentes), user = user, db = db)
+
+        resultado = []
+        for sugestao in sugestoes:
+            resposta = SugestaoSingleResponse.model_validate(sugestao)
+            if sugestao.id in atuais:
+                upvotes, downvotes, gravado = atuais[sugestao.id]
+                up, down = Sugestoes._delta(gravado, pendentes[sugestao.id])
+                upvotes, downvotes = upvotes + up, downvotes + down
+                resposta = resposta.model_copy(update = {
+                    'upvotes_count': upvotes,
+                    'downvotes_count': downvotes,
+                    'score': wilson_score(upvotes, downvotes),
+                })
+            resultado.append(resposta)
+
+        return resultado
+
+    def _delta(anterior: bool | None, voto: bool) -> tuple[int, int]:
+        '''Efeito nos contadores de trocar o voto 'anterior' (None: sem voto) por 'voto'.'''
+        return int(voto is True) - int(anterior is True), int(voto is False) - int(anterior is False)
+
+    async def _gravar_voto(*,
+        sugestao_id: int,
+        user_id: int,
+        voto: bool,
+        db: AsyncDBSessionDep,
+    ) -> tuple[int, int]:
+        '''Grava o voto (INSERT IGNORE, senão UPDATE condicional) e devolve o delta dos contadores.'''
+        novo = (await db.exec(
+            insert(Sugestao_User).values(sugestao_id = sugestao_id, user_id = user_id, voto = voto)
+            .prefix_with('OR IGNORE', dialect = 'sqlite').prefix_with('IGNORE', dialect = 'mysql')
+        )).rowcount
+        if novo:
+            return Sugestoes._delta(None, voto)
+
+        mudou = (await db.exec(
+            update(Sugestao_User).where(
+                Sugestao_User.sugestao_id == sugestao_id,
+                Sugestao_User.user_id == user_id,
+                Sugestao_User.voto != voto,
+            ).values(voto = voto).execution_options(synchronize_session = False)
+        )).rowcount
+        return Sugestoes._delta(not voto, voto) if mudou else (0, 0)
+
+    async def _aplicar_delta(*,
+        sugestao_id: int,
+        delta: tuple[int, int],
+        db: AsyncDBSessionDep,
+    ) -> tuple[int, int]:
+        '''
+        Soma o delta aos contadores (incremento relativo no banco), regrava o
+        score a partir dos valores novos e os devolve. A linha fica travada
+        pelo primeiro UPDATE até o commit: o score não se perde entre votos
+        simultâneos.
+        '''
+        contadores = (Sugestao.upvotes_count, Sugestao.downvotes_count)
+
+        if delta == (0, 0):
+            return tuple((await db.exec(select(*contadores).where(Sugestao.id == sugestao_id))).one())
+
+        statement = update(Sugestao).where(Sugestao.id == sugestao_id).values(
+            upvotes_count = Sugestao.upvotes_count + delta[0],
+            downvotes_count = Sugestao.downvotes_count + delta[1],
+        ).execution_options(synchronize_session = False)
+
+        # UPDATE ... RETURNING onde existe (SQLite); MariaDB lê na mesma transação
+        if db.get_bind().dialect.update_returning:
+            tallies = tuple((await db.exec(statement.returning(*contadores))).one())
+        else:
+            await db.exec(statement)
+            tallies = tuple((await db.exec(select(*contadores).where(Sugestao.id == sugestao_id))).one())
+
+        await db.exec(
+            update(Sugestao).where(Sugestao.id == sugestao_id).values(score = wilson_score(*tallies))
+            .execution_options(synchronize_session = False)
+        )
+        return tallies
+
+    async def reconciliar_votos(*,
+        db: AsyncDBSessionDep,
+    ) -> int:
+        '''
+        Reconstrói os contadores a partir de Sugestao_User (votos removidos
+        em cascata, escritas fora da API) e recalcula o score onde ele
+        diverge. Retorna as sugestões com contadores corrigidos.
+        '''
+        def contagem(voto: bool):
+            return select(func.count()).select_from(Sugestao_User).where(
+                Sugestao_User.sugestao_id == Sugestao.id,
+                Sugestao_User.voto == voto,
+            ).scalar_subquery()
+
+        statement = update(Sugestao).where(or_(
+            Sugestao.upvotes_count != contagem(True),
+            Sugestao.downvotes_count != contagem(False),
+        )).values(
+            upvotes_count = contagem(True),
+            downvotes_count = contagem(False),
+        ).execution_options(synchronize_session = False)
+
+        try:
+            corrigidas = (await db.exec(statement)).rowcount
+
+            # score de quem teve os contadores corrigidos (ou gravado fora de _aplicar_delta)
+            scores = [
+                { 'id': id, 'score': wilson_score(up, down) }
+                for id, up, down, score in await db.exec(select(Sugestao.id, Sugestao.upvotes_count, Sugestao.downvotes_count, Sugestao.score))
+                if score != wilson_score(up, down)
+            ]
+            if scores:
+                await db.exec(update(Sugestao), params = scores)
+            await db.commit()
+        except:
+            await db.rollback()
+            raise
+
+        return corrigidas
+
     
-    def get_voto(*,
+    async def get_voto(*,
         sugestao: Sugestao,
         user: User,
-        db: DBSessionDep
-    ) -> Sugestao_User:
+        db: AsyncDBSessionDep
+    ) -> Sugestao_User | None:
 
         query = select(Sugestao_User).where(Sugestao_User.user_id == user.id).where(Sugestao_User.sugestao_id == sugestao.id)
 
         try:
-            sugestao_user = db.exec(query)
+            sugestao_user = (await db.exec(query)).first()
             return sugestao_user
         except:
             raise
     
-    def update_status(*,
+    async def update_status(*,
         sugestao: Sugestao,
         status: Status_Sugestao,
-        db = DBSessionDep,
+        db: AsyncDBSessionDep,
     ) -> Sugestao:
         
         sugestao.status = status.value
         
         try:
-            sugestao_result = upsert_row(model_instance = sugestao, db = db)
+            sugestao_result = await upsert_row(model_instance = sugestao, db = db)
         except:
             raise
 
@@ -0,0 +1,236 @@
+import asyncio
+import fcntl
+import glob
+import json
+import logging
+import os
+import time
+from itertools import islice
+
+from config import settings
+from database.connection import async_session_maker
+from apps.problemas.utils import Sugestoes
+
+'''
+''  Votos com escrita adiada (VOTOS_BUFFER)
+''
+''  O voto entra num dicionário em memória por (sugestao_id, user_id), onde
+''  o último vence, e no journal do worker, com fsync antes da resposta
+''  (requisições simultâneas dividem o mesmo fsync). O flush grava os
+''  pendentes em lotes de VOTOS_BUFFER_MAX votos, uma transação por lote,
+''  quando a fila enche ou a cada VOTOS_BUFFER_INTERVALO segundos, e então
+''  reescreve o journal só com o que chegou depois.
+''
+''  Cada worker mantém flock no seu journal. No startup, journals sem dono
+''  (worker que morreu) são adotados: o voto mais recente de cada chave
+''  entra no journal deste worker e vai para o banco no próximo flush.
+''  Um voto adotado pode sobrescrever um voto posterior do mesmo usuário
+''  que outro worker já gravou: a janela é o intervalo de flush do worker
+''  que morreu.
+'''
+class VoteBuffer:
+
+    def __init__(self, diretorio: str, max_pendentes: int, intervalo: float):
+        self.diretorio = diretorio
+        self.max_pendentes = max_pendentes
+        self.intervalo = intervalo
+        self.caminho: str | None = None
+
+        # (sugestao_id, user_id) -> (voto, timestamp)
+        self.pendentes: dict[tuple[int, int], tuple[bool, float]] = {}
+        self.em_voo: dict[tuple[int, int], tuple[bool, float]] = {} # lote sendo gravado
+
+        self._journal = None
+        self._escritas = 0
+        self._sincronizado = 0
+        self._sync_task: asyncio.Task | None = None
+        self._cheio = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._loop_task: asyncio.Task | None = None
+
+    # ciclo de vida (lifespan)
+    async def start(self):
+        # pid do worker, não do processo que importou o módulo
+        self.caminho = os.path.join(self.diretorio, f'votos-{os.getpid()}.jsonl')
+        os.makedirs(self.diretorio, exist_ok = True)
+        adotados = self._adotar()
+        self._compactar()
+
+        for journal, caminho in adotados:
+            if caminho != self.caminho:
+                os.remove(caminho)
+            journal.close()
+        if adotados:
+            logging.info(f"Votos pendentes adotados de {len(adotados)} journal(s): {len(self.pendentes)}")
+
+        self._loop_task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+
+        await self.flush()
+        self._journal.close()
+
+        # journal vazio não precisa ser adotado por ninguém
+        if not self.pendentes:
+            os.remove(self.caminho)
+
+    # escrita
+    async def add(self, sugestao_id: int, user_id: int, voto: bool):
+        '''Enfileira o voto; retorna quando ele está no disco.'''
+        registro = (voto, time.time())
+        self.pendentes[(sugestao_id, user_id)] = registro
+        self._journal.write(json.dumps([sugestao_id, user_id, *registro]) + '\n')
+        self._escritas += 1
+
+        if len(self.pendentes) >= self.max_pendentes:
+            self._cheio.set()
+
+        await self._durable(self._escritas)
+
+    def voto_pendente(self, sugestao_id: int, user_id: int) -> bool | None:
+        '''Voto do usuário ainda não gravado no banco (None se não houver).'''
+        registro = self.pendentes.get((sugestao_id, user_id)) or self.em_voo.get((sugestao_id, user_id))
+        return registro[0] if registro is not None else None
+
+    def pendentes_do_usuario(self, sugestao_ids: list[int], user_id: int) -> dict[int, bool]:
+        '''Votos do usuário ainda não gravados entre 'sugestao_ids' (sugestao_id -> voto).'''
+        votos = {}
+        for sugestao_id in sugestao_ids:
+            voto = self.voto_pendente(sugestao_id, user_id)
+            if voto is not None:
+                votos[sugestao_id] = voto
+        return votos
+
+    async def _durable(self, escrita: int):
+        # fsync em grupo: quem chega durante um fsync espera o próximo, que cobre todos
+        while self._sincronizado < escrita:
+            if self._sync_task is None:
+                self._sync_task = asyncio.create_task(self._sync())
+            await asyncio.shield(self._sync_task)
+
+    async def _sync(self):
+        try:
+            ate = self._escritas
+            self._journal.flush()
+            await asyncio.to_thread(os.fsync, self._journal.fileno())
+            self._sincronizado = max(self._sincronizado, ate)
+        finally:
+            self._sync_task = None
+
+    # flush
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._cheio.wait(), self.intervalo)
+            except TimeoutError:
+                pass
+            self._cheio.clear()
+            await self.flush()
+
+    async def flush(self):
+        '''
+        Grava os votos pendentes no início do flush; os que chegarem durante
+        ficam para o próximo. Em erro o lote volta para a fila (sem
+        sobrescrever votos mais novos) e o journal fica intacto.
+        '''
+        async with self._flush_lock:
+            if not self.pendentes:
+                return
+
+            lotes = -(-len(self.pendentes) // self.max_pendentes)
+            for _ in range(lotes):
+                self.em_voo = dict(islice(self.pendentes.items(), self.max_pendentes))
+                for chave in self.em_voo:
+                    del self.pendentes[chave]
+
+                try:
+                    async with async_session_maker() as db:
+                        db.info['primary'] = True
+                        await Sugestoes.votar_lote(votos = { chave: voto for chave, (voto, _) in self.em_voo.items() }, db = db)
+                except Exception:
+                    logging.exception("Falha ao gravar votos pendentes; nova tentativa no próximo flush")
+                    for chave, registro in self.em_voo.items():
+                        self.pendentes.setdefault(chave, registro)
+                    self.em_voo = {}
+                    return
+
+                self.em_voo = {}
+
+            # o fsync em andamento usa o descritor que a compactação fecha
+            while self._sync_task is not None:
+                await asyncio.wait([self._sync_task])
+            try:
+                self._compactar()
+            except OSError:
+                logging.exception("Falha ao compactar o journal de votos")
+
+    # journal
+    def _compactar(self):
+        '''
+        Reescreve o journal só com os votos ainda não gravados: arquivo
+        temporário, fsync e rename atômico. Síncrona de propósito: nenhum
+        add() escreve no journal antigo entre a cópia e a troca.
+        '''
+        temporario = self.caminho + '.tmp'
+        journal = open(temporario, 'w')
+        fcntl.flock(journal.fileno(), fcntl.LOCK_EX)
+        for (sugestao_id, user_id), registro in { **self.em_voo, **self.pendentes }.items():
+            journal.write(json.dumps([sugestao_id, user_id, *registro]) + '\n')
+        journal.flush()
+        os.fsync(journal.fileno())
+
+        os.replace(temporario, self.caminho)
+        diretorio = os.open(self.diretorio, os.O_RDONLY)
+        try:
+            os.fsync(diretorio)
+        finally:
+            os.close(diretorio)
+
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = journal
+        self._sincronizado = self._escritas
+
+    def _adotar(self) -> list:
+        '''
+        Lê os journals sem flock (o deste pid inclusive, de uma execução
+        anterior) para os pendentes, ficando com o voto mais recente de cada
+        chave. Retorna (arquivo, caminho) ainda travados, para remoção depois
+        que os votos estiverem no journal deste worker.
+        '''
+        adotados = []
+        for caminho in sorted(glob.glob(os.path.join(self.diretorio, 'votos-*.jsonl'))):
+            journal = open(caminho)
+            try:
+                fcntl.flock(journal.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                # travou um arquivo já substituído pela compactação do dono
+                if os.fstat(journal.fileno()).st_ino != os.stat(caminho).st_ino:
+                    raise BlockingIOError
+            except (BlockingIOError, FileNotFoundError):
+                journal.close()
+                continue
+
+            for linha in journal:
+                try:
+                    sugestao_id, user_id, voto, momento = json.loads(linha)
+                except ValueError:
+                    continue # última linha incompleta
+                atual = self.pendentes.get((sugestao_id, user_id))
+                if atual is None or atual[1] <= momento:
+                    self.pendentes[(sugestao_id, user_id)] = (voto, momento)
+
+            adotados.append((journal, caminho))
+
+        return adotados
+
+vote_buffer = VoteBuffer(
+    diretorio = settings.VOTOS_BUFFER_DIR,
+    max_pendentes = settings.VOTOS_BUFFER_MAX,
+    intervalo = settings.VOTOS_BUFFER_INTERVALO,
+) if settings.VOTOS_BUFFER else None
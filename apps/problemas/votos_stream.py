@@ -0,0 +1,171 @@
+import asyncio
+import json
+import logging
+from typing import AsyncIterator
+
+from sqlmodel import select, col
+from sqlalchemy import or_
+
+from config import settings
+from database.connection import AsyncDBSessionDep, async_session_maker
+from database.schemas.problemas import Sugestao, Status_Sugestao, wilson_score
+
+'''
+''  Contagem de votos ao vivo (SSE)
+''
+''  Cada conexão assina um tópico, ('sugestao', id) ou ('problema', id), e
+''  recebe os contadores novos a cada voto. A fila de cada assinante guarda
+''  só o último estado de cada sugestão: rajadas de votos viram um evento
+''  por sugestão a cada INTERVALO_MINIMO segundos. Um assinante que junta
+''  mais de MAX_PENDENTES sugestões sem ler recebe 'reset' e deve recarregar.
+''
+''  O fanout é do processo: votos deste worker são publicados na hora
+''  (Sugestoes.votar e o flush do vote_buffer); os de outros workers chegam
+''  por uma leitura a cada VOTOS_STREAM_SYNC segundos dos contadores das
+''  sugestões assinadas, uma query por worker e não por conexão.
+'''
+KEEPALIVE = 15 # segundos entre comentários ': ping' (proxies fecham conexões ociosas)
+INTERVALO_MINIMO = 0.25
+MAX_PENDENTES = 256
+
+def evento_sse(evento: str, dados: dict) -> str:
+    return f"event: {evento}\ndata: {json.dumps(dados, separators = (',', ':'))}\n\n"
+
+class Assinante:
+    __slots__ = ('pendentes', 'sinal', 'transbordou')
+
+    def __init__(self):
+        self.pendentes: dict[int, dict] = {} # sugestao_id -> último estado
+        self.sinal = asyncio.Event()
+        self.transbordou = False
+
+    def put(self, sugestao_id: int, dados: dict):
+        if sugestao_id not in self.pendentes and len(self.pendentes) >= MAX_PENDENTES:
+            self.pendentes.clear()
+            self.transbordou = True
+        else:
+            self.pendentes[sugestao_id] = dados
+        self.sinal.set()
+
+    def drenar(self) -> tuple[bool, list[dict]]:
+        transbordou, pendentes = self.transbordou, list(self.pendentes.values())
+        self.pendentes.clear()
+        self.transbordou = False
+        self.sinal.clear()
+        return transbordou, pendentes
+
+class VotosFanout:
+
+    def __init__(self, sync_interval: float):
+        self.sync_interval = sync_interval
+        self.topicos: dict[tuple[str, int], set[Assinante]] = {}
+        # últimos contadores publicados das sugestões assinadas: votos que não mudam nada não saem
+        self.ultimos: dict[int, tuple[int, int]] = {}
+        self._sync_task: asyncio.Task | None = None
+
+    # publicação
+    def publicar(self, *, sugestao_id: int, problema_id: int, upvotes: int, downvotes: int):
+        topicos = [
+            self.topicos[topico] for topico in (('sugestao', sugestao_id), ('problema', problema_id))
+            if topico in self.topicos
+        ]
+        if not topicos or self.ultimos.get(sugestao_id) == (upvotes, downvotes):
+            return
+
+        self.ultimos[sugestao_id] = (upvotes, downvotes)
+        dados = {
+            'sugestao_id': sugestao_id,
+            'problema_id': problema_id,
+            'upvotes': upvotes,
+            'downvotes': downvotes,
+            'score': wilson_score(upvotes, downvotes),
+        }
+        for assinantes in topicos:
+            for assinante in assinantes:
+                assinante.put(sugestao_id, dados)
+
+    # assinatura
+    async def snapshot(self, topico: tuple[str, int], db: AsyncDBSessionDep) -> list[dict]:
+        '''
+        Contadores atuais do tópico: o primeiro evento de cada conexão. Lidos
+        do primário, como a sincronização, e guardados como já publicados
+        quando ainda não há registro (o que existe já foi enviado a alguém).
+        '''
+        tipo, id = topico
+        db.info['primary'] = True
+        query = select(Sugestao.id, Sugestao.problema_id, Sugestao.upvotes_count, Sugestao.downvotes_count)
+        if tipo == 'sugestao':
+            query = query.where(Sugestao.id == id)
+        else:
+            query = query.where(Sugestao.problema_id == id, Sugestao.status == Status_Sugestao.ativa)
+
+        inicial = []
+        for sugestao_id, problema_id, up, down in await db.exec(query):
+            self.ultimos.setdefault(sugestao_id, (up, down))
+            inicial.append({ 'sugestao_id': sugestao_id, 'problema_id': problema_id, 'upvotes': up, 'downvotes': down, 'score': wilson_score(up, down) })
+        return inicial
+
+    async def stream(self, topico: tuple[str, int], inicial: list[dict]) -> AsyncIterator[str]:
+        assinante = Assinante()
+        self.topicos.setdefault(topico, set()).add(assinante)
+        if self.sync_interval and self._sync_task is None:
+            self._sync_task = asyncio.create_task(self._sincronizar())
+
+        try:
+            for dados in inicial:
+                yield evento_sse('votos', dados)
+
+            while True:
+                try:
+                    await asyncio.wait_for(assinante.sinal.wait(), KEEPALIVE)
+                except TimeoutError:
+                    yield ': ping\n\n'
+                    continue
+
+                # junta a rajada antes de enviar
+                await asyncio.sleep(INTERVALO_MINIMO)
+                transbordou, pendentes = assinante.drenar()
+                if transbordou:
+                    yield evento_sse('reset', {})
+                for dados in pendentes:
+                    yield evento_sse('votos', dados)
+        finally:
+            assinantes = self.topicos.get(topico)
+            if assinantes is not None:
+                assinantes.discard(assinante)
+                if not assinantes:
+                    del self.topicos[topico]
+                    if topico[0] == 'sugestao':
+                        self.ultimos.pop(topico[1], None)
+
+    async def _sincronizar(self):
+        '''Enquanto houver assinantes, publica os contadores gravados por outros workers.'''
+        try:
+            while self.topicos:
+                await asyncio.sleep(self.sync_interval)
+
+                sugestoes = [id for tipo, id in self.topicos if tipo == 'sugestao']
+                problemas = [id for tipo, id in self.topicos if tipo == 'problema']
+                try:
+                    async with async_session_maker() as db:
+                        # réplica atrasada faria contadores voltarem depois de uma publicação local
+                        db.info['primary'] = True
+                        linhas = (await db.exec(
+                            select(Sugestao.id, Sugestao.problema_id, Sugestao.upvotes_count, Sugestao.downvotes_count)
+                            .where(or_(col(Sugestao.id).in_(sugestoes), col(Sugestao.problema_id).in_(problemas)))
+                        )).all()
+                except Exception:
+                    logging.exception("Falha ao sincronizar contadores de votos assinados")
+                    continue
+
+                for sugestao_id, problema_id, up, down in linhas:
+                    self.publicar(sugestao_id = sugestao_id, problema_id = problema_id, upvotes = up, downvotes = down)
+
+                # esquece sugestões que ninguém mais assina
+                assinadas = { linha[0] for linha in linhas }
+                for sugestao_id in self.ultimos.keys() - assinadas:
+                    del self.ultimos[sugestao_id]
+        finally:
+            self._sync_task = None
+
+votos_fanout = VotosFanout(sync_interval = settings.VOTOS_STREAM_SYNC)
@@ -2,5 +2,10 @@ from typing import Annotated
 from fastapi import Depends
 from database.schemas.users import User
 from database.utils import ModelGetter
+from database.loaders import loader_options
+from apps.users.models.responses import UserRead
 
-UserDep = Annotated[User, Depends(ModelGetter(User))]
\ No newline at end of file
+# relacionamentos serializados por UserRead
+user_read_options = loader_options(User, UserRead)
+
+UserDep = Annotated[User, Depends(ModelGetter(User, options = user_read_options))]
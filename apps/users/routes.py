@@ -1,15 +1,17 @@
 # Base
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from typing import Annotated
 from pydantic import BaseModel
 
 # Database
-from database.connection import DBSessionDep
+from database.connection import AsyncDBSessionDep
 from database.utils import get_index, upsert_row, get_by_id, delete_row
+from database.loaders import relation_names
+from database.pagination import set_next_cursor
 
 # Dependencies
 from apps.auth.utils import DBCurrentUserDep, get_password_hash
-from apps.users.dependencies import UserDep
+from apps.users.dependencies import UserDep, user_read_options
 
 # Models
 from apps.users.utils import Users
@@ -36,9 +38,14 @@ Roles
 async def list_papeis(*,
     skip: int = 0,
     limit: int = 100,
-    db: DBSessionDep,
+    cursor: str | None = None,
+    response: Response,
+    db: AsyncDBSessionDep,
 )-> list[RoleBase]:
-    return get_index(model = Role, skip = skip, limit = limit, db = db)
+    papeis = await get_index(model = Role, skip = skip, limit = limit, cursor = cursor, db = db)
+    set_next_cursor(response, papeis, limit = limit)
+
+    return papeis
     
 '''
 Users
@@ -47,11 +54,11 @@ Users
 async def store_user(
     user: UserCreate,
     role: RoleOptions,
-    db: DBSessionDep,
+    db: AsyncDBSessionDep,
 ) -> UserBase:
 
     try:
-        user = Users.create_user(user_data = user, role = role, db = db)
+        user = await Users.create_user(user_data = user, role = role, db = db)
     except:
         raise
 
@@ -61,7 +68,10 @@ async def store_user(
 @router.get("/me")
 async def read_user_me(
     current_user: DBCurrentUserDep,
+    db: AsyncDBSessionDep,
 ) -> UserRead:
+    await db.refresh(current_user, attribute_names = relation_names(User, UserRead))
+
     return current_user
 
 @router.get("/{id}", dependencies=[Depends(Authorizer('user', 'read'))])
@@ -78,16 +88,21 @@ async def read_user(
 async def list_users(*,
     skip: int = 0,
     limit: int = 100,
-    db: DBSessionDep,
+    cursor: str | None = None,
+    response: Response,
+    db: AsyncDBSessionDep,
 ) -> list[UserRead]:
 
-    return get_index(model = User, skip = skip, limit = limit, db = db)
+    users = await get_index(model = User, skip = skip, limit = limit, cursor = cursor, db = db, options = user_read_options)
+    set_next_cursor(response, users, limit = limit)
+
+    return users
 
 @router.delete("/{id}", dependencies=[Depends(Authorizer('user', 'delete'))])
 async def delete_user(*,
     user: UserDep,
     current_user: DBCurrentUserDep,
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ) -> dict[str, bool]:
     
     should_force_delete = not user.ativo
@@ -97,9 +112,9 @@ async def delete_user(*,
     
     try:
         if not should_force_delete:
-            Users.deactivate(user = user, db = db)
+            await Users.deactivate(user = user, db = db)
         else:
-            delete_row(model_instance = user, db = db)
+            await delete_row(model_instance = user, db = db)
     except:
         raise
 
@@ -110,13 +125,13 @@ async def delete_user(*,
 async def restore_user(*,
     user: UserDep,
     current_user: DBCurrentUserDep,
-    db: DBSessionDep,
+    db: AsyncDBSessionDep,
 ) -> UserRestoreResponse:
 
     check_permissions(model = 'user', ability = 'restore', user = current_user, object_user = user)
 
     try:
-        user = Users.restore(user = user, db = db)
+        user = await Users.restore(user = user, db = db)
     except:
         raise
 
@@ -128,9 +143,9 @@ Problemas de autor
 @router.get("/{id}/problemas")
 async def index_problemas_autor(
     user: UserDep,
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ) -> list[ProblemaFullResponse]:  
     
-    problemas = user.problemas
+    problemas = await Users.get_problemas(user = user, db = db)
 
     return problemas
\ No newline at end of file
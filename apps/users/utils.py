@@ -3,8 +3,9 @@ from fastapi import HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 
 # Database
-from database.connection import DBSessionDep
+from database.connection import AsyncDBSessionDep
 from sqlmodel import select
+from database.loaders import loader_options
 
 # Dependencies
 from apps.auth.utils import get_password_hash
@@ -12,17 +13,19 @@ from database.utils import upsert_row
 
 # Schemas
 from database.schemas.users import Pessoa, Role, User, RoleEnum
+from database.schemas.problemas import Problema, Problema_User
 from apps.users.models.requests import UserCreate, RoleOptions
+from apps.problemas.models.responses import ProblemaFullResponse
 
 # Exceptions
 from sqlalchemy.exc import IntegrityError
 
 class Users:
 
-    def create_user(*,
+    async def create_user(*,
         user_data: UserCreate | OAuth2PasswordRequestForm,
         role: RoleOptions = RoleOptions.leitor,
-        db: DBSessionDep,
+        db: AsyncDBSessionDep,
     ):
         role_name = getattr(RoleEnum, role.name)
         
@@ -30,7 +33,7 @@ class Users:
         user_data = User(username=user_data.username, password=hashed_password, role_id = role_name.value)
 
         try:
-            user = upsert_row(model_instance = user_data, db = db)
+            user = await upsert_row(model_instance = user_data, db = db)
         except IntegrityError:
             raise HTTPException(
                 status_code = status.HTTP_409_CONFLICT,
@@ -40,25 +43,25 @@ class Users:
         return user
 
 
-    def deactivate(*,
+    async def deactivate(*,
         user: User,
-        db: DBSessionDep,
+        db: AsyncDBSessionDep,
     ) -> bool:
         user.ativo = False
         try:
             db.add(user)
-            db.commit()
+            await db.commit()
         except:
             raise
 
         return True
 
-    def get_by_username(*,
+    async def get_by_username(*,
         username: str,
-        db: DBSessionDep
+        db: AsyncDBSessionDep
     ) -> User:
         query = select(User).where(User.username == username)
-        user = db.exec(query).first()
+        user = (await db.exec(query)).first()
 
         if user is None:
             raise HTTPException(
@@ -69,9 +72,9 @@ class Users:
         return user
         
 
-    def restore(*,
+    async def restore(*,
         user: User,
-        db: DBSessionDep,
+        db: AsyncDBSessionDep,
     ) -> User:    
         if user.ativo:
             raise HTTPException(
@@ -83,26 +86,41 @@ class Users:
 
         try:
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
         except:
             raise
 
         return user
 
     
-    def update_password(
+    async def update_password(
         user: User,
         password: str,
-        db: DBSessionDep,
+        db: AsyncDBSessionDep,
     ) -> User:
         hashed_password = get_password_hash(password)
         user.password = hashed_password
         try:
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
         except:
             raise
 
-        return user
\ No newline at end of file
+        return user
+
+    async def get_problemas(*,
+        user: User,
+        db: AsyncDBSessionDep,
+    ) -> list[Problema]:
+        query = select(Problema).join(Problema_User).where(Problema_User.user_id == user.id).options(
+            *loader_options(Problema, ProblemaFullResponse)
+        )
+
+        try:
+            problemas = (await db.exec(query)).all()
+        except:
+            raise
+
+        return problemas
@@ -0,0 +1,85 @@
+'''
+Benchmark de latência sob carga concorrente.
+
+Dispara requisições concorrentes contra uma instância em execução da API e
+reporta p50/p95/p99 por rota. A rota '/' não acessa o banco: se sua latência
+sobe junto com a das rotas de listagem, o event loop está sendo bloqueado.
+
+Para comparar antes/depois, rode o mesmo comando contra cada versão:
+
+    uvicorn main:app --port 8000
+    python benchmarks/latency.py --url http://localhost:8000 --concurrency 64 --requests 2000
+
+Requer httpx (pip install httpx).
+'''
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+ROUTES = [
+    '/',
+    '/problemas/?limit=100',
+    '/eventos/?limit=100',
+]
+
+HEADERS = {}
+
+def percentile(samples: list[float], p: float) -> float:
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+    return samples[index]
+
+async def worker(client: httpx.AsyncClient, queue: asyncio.Queue, results: dict[str, list[float]], errors: dict[str, int]):
+    while True:
+        try:
+            route = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+
+        start = time.perf_counter()
+        try:
+            response = await client.get(route, headers = HEADERS)
+            if response.status_code >= 400:
+                errors[route] += 1
+        except httpx.HTTPError:
+            errors[route] += 1
+        results[route].append((time.perf_counter() - start) * 1000)
+
+async def run(url: str, concurrency: int, total: int, routes: list[str]):
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(routes[i % len(routes)])
+
+    results = { route: [] for route in routes }
+    errors = { route: 0 for route in routes }
+
+    limits = httpx.Limits(max_connections = concurrency)
+    async with httpx.AsyncClient(base_url = url, limits = limits, timeout = 60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(client, queue, results, errors) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+    print(f"{total} requisições, concorrência {concurrency}, {elapsed:.2f}s ({total / elapsed:.0f} req/s)")
+    print(f"{'rota':<30} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'média':>9} {'erros':>6}")
+    for route, samples in results.items():
+        print(
+            f"{route:<30} {percentile(samples, 50):>9.1f} {percentile(samples, 95):>9.1f} "
+            f"{percentile(samples, 99):>9.1f} {statistics.mean(samples):>9.1f} {errors[route]:>6}"
+        )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Latência da API sob carga concorrente')
+    parser.add_argument('--url', default = 'http://localhost:8000')
+    parser.add_argument('--concurrency', type = int, default = 64)
+    parser.add_argument('--requests', type = int, default = 2000)
+    parser.add_argument('--route', action = 'append', help = 'rota a testar (pode repetir); padrão: ' + ', '.join(ROUTES))
+    parser.add_argument('--token', help = 'bearer token para rotas autenticadas')
+    args = parser.parse_args()
+
+    if args.token:
+        HEADERS['Authorization'] = 'Bearer ' + args.token
+
+    asyncio.run(run(args.url, args.concurrency, args.requests, args.route or ROUTES))
@@ -0,0 +1,81 @@
+'''
+Benchmark de paginação: skip/limit contra cursor na página 1 e em páginas profundas.
+
+Usa o banco configurado no .env (rode contra um banco descartável): aplica as
+migrations, insere --rows problemas se a tabela tiver menos que isso e mede
+Problemas.get em cada página com os dois modos.
+
+    python benchmarks/pagination.py --rows 120000 --pages 1 10 100 1000
+'''
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert
+from sqlmodel import select
+
+from database.connection import engine, async_engine, async_session_maker
+from database.migrations import apply_pending
+from database.pagination import next_cursor
+from database.schemas.problemas import Problema
+from apps.problemas.utils import Problemas
+
+async def seed(rows: int):
+    async with async_session_maker() as db:
+        existing = (await db.exec(select(func.count()).select_from(Problema))).one()
+        batch = []
+        for i in range(existing, rows):
+            batch.append({ 'titulo': f'Problema {i}', 'enunciado': 'enunciado', 'categoria': f'categoria {i % 20}' })
+            if len(batch) == 5000:
+                await db.exec(insert(Problema), params = batch)
+                batch = []
+        if batch:
+            await db.exec(insert(Problema), params = batch)
+        await db.commit()
+
+async def timed(db, repeat: int, **kwargs) -> tuple[float, list]:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = await Problemas.get(db = db, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, rows
+
+async def cursor_for_page(db, page: int, limit: int, sort: str) -> str | None:
+    '''Cursor que aponta para o início de 'page' (percorre só as chaves).'''
+    if page == 1:
+        return None
+    column = getattr(Problema, sort)
+    query = select(column, Problema.id).order_by(column, Problema.id).offset((page - 1) * limit - 1).limit(1)
+    last = (await db.exec(query)).first()
+    return next_cursor([type('Row', (), { sort: last[0], 'id': last[1] })], sort, 1)
+
+async def run(rows: int, pages: list[int], limit: int, sort: str, repeat: int):
+    apply_pending(engine)
+    await seed(rows)
+
+    print(f"{'página':>8} {'skip/limit ms':>14} {'cursor ms':>10}")
+    async with async_session_maker() as db:
+        for page in pages:
+            offset_ms, offset_rows = await timed(db, repeat, skip = (page - 1) * limit, limit = limit, ordenar = sort)
+            cursor = await cursor_for_page(db, page, limit, sort)
+            cursor_ms, cursor_rows = await timed(db, repeat, cursor = cursor, limit = limit, ordenar = sort)
+            assert [p.id for p in offset_rows] == [p.id for p in cursor_rows]
+            print(f"{page:>8} {offset_ms:>14.2f} {cursor_ms:>10.2f}")
+
+    await async_engine.dispose()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'skip/limit vs cursor')
+    parser.add_argument('--rows', type = int, default = 120000)
+    parser.add_argument('--pages', type = int, nargs = '+', default = [1, 10, 100, 1000])
+    parser.add_argument('--limit', type = int, default = 100)
+    parser.add_argument('--sort', default = 'id', choices = ['id', 'titulo', 'categoria'])
+    parser.add_argument('--repeat', type = int, default = 5)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.rows, args.pages, args.limit, args.sort, args.repeat))
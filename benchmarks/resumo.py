@@ -0,0 +1,75 @@
+'''
+Benchmark do modo resumo: listagem completa (ORM + ProblemaFullResponse)
+contra ?resumo=true (select de colunas + registros com __slots__), incluindo
+a serialização para JSON que a rota faz.
+
+Usa o banco configurado no .env (rode contra um banco descartável): aplica as
+migrations, insere problemas até o maior --sizes e mede uma página de cada
+tamanho nos dois modos (tempo: melhor de --repeat; memória: pico do tracemalloc).
+
+    python benchmarks/resumo.py --sizes 1000 10000
+'''
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+from database.connection import engine, async_engine, async_session_maker
+from database.migrations import apply_pending
+from apps.problemas.models.responses import ProblemaFullResponse
+from apps.problemas.utils import Problemas
+
+from pagination import seed
+
+completo = TypeAdapter(list[ProblemaFullResponse])
+
+async def listagem_completa(limit: int) -> bytes:
+    async with async_session_maker() as db:
+        problemas = await Problemas.get(limit = limit, db = db)
+        # o que o FastAPI faz com o retorno da rota: valida e serializa
+        return completo.dump_json(completo.validate_python(problemas, from_attributes = True))
+
+async def listagem_resumo(limit: int) -> bytes:
+    async with async_session_maker() as db:
+        return to_json(await Problemas.get(limit = limit, resumo = True, db = db))
+
+async def medir(listagem, limit: int, repeat: int) -> tuple[float, float, int]:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        corpo = await listagem(limit)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    await listagem(limit)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best * 1000, peak / 2**20, len(corpo)
+
+async def run(sizes: list[int], repeat: int):
+    apply_pending(engine)
+    await seed(max(sizes))
+
+    print(f"{'linhas':>8} {'modo':>9} {'ms':>9} {'pico MB':>9} {'bytes':>10}")
+    for size in sizes:
+        for nome, listagem in (('completo', listagem_completa), ('resumo', listagem_resumo)):
+            ms, pico, tamanho = await medir(listagem, size, repeat)
+            print(f"{size:>8} {nome:>9} {ms:>9.2f} {pico:>9.2f} {tamanho:>10}")
+
+    await async_engine.dispose()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'listagem completa vs modo resumo')
+    parser.add_argument('--sizes', type = int, nargs = '+', default = [1000, 10000])
+    parser.add_argument('--repeat', type = int, default = 5)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.sizes, args.repeat))
@@ -0,0 +1,146 @@
+'''
+Benchmark de votos: Sugestoes.votar (INSERT IGNORE / UPDATE condicional +
+delta nos contadores, um commit) contra o caminho anterior pelo ORM (lê o
+voto, grava a linha, atualiza os contadores e recarrega a sugestão) e contra
+o VoteBuffer (journal com fsync em grupo e flush em lote; o tempo inclui o
+flush final).
+
+Usa o banco configurado no .env (rode contra um banco descartável): aplica as
+migrations, cria --users usuários e uma sugestão, e dispara --votes votos
+aleatórios com --concurrency sessões simultâneas, como requisições paralelas.
+
+    python benchmarks/votos.py --votes 5000 --users 1000 --concurrency 16
+
+No SQLite (uso local) as escritas são serializadas e o fsync de cada commit
+domina: use --concurrency 1 e compare só a ordem de grandeza.
+'''
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+
+from database.connection import engine, async_engine, async_session_maker
+from database.migrations import apply_pending
+from database.schemas.problemas import Problema, Sugestao, Sugestao_User
+from database.schemas.users import User
+from apps.problemas.utils import Sugestoes
+from apps.problemas.votos_buffer import VoteBuffer
+
+async def seed(users: int) -> tuple[int, list[User]]:
+    async with async_session_maker() as db:
+        prefixo = f'bench{time.time_ns()}_'
+        await db.exec(insert(User), params = [
+            { 'username': prefixo + str(i), 'password': 'x' * 8, 'role_id': None } for i in range(users)
+        ])
+        usuarios = (await db.exec(select(User).where(User.username.like(prefixo + '%')))).all()
+
+        problema = Problema(titulo = 'Problema de benchmark', enunciado = 'enunciado', categoria = 'benchmark')
+        db.add(problema)
+        await db.flush()
+        sugestao = Sugestao(descricao = 'sugestão de benchmark', problema_id = problema.id, autor_id = usuarios[0].id)
+        db.add(sugestao)
+        await db.commit()
+
+        return sugestao.id, usuarios
+
+async def votar(sugestao_id: int, user: User, voto: bool):
+    async with async_session_maker() as db:
+        sugestao = await db.get(Sugestao, sugestao_id)
+        await Sugestoes.votar(sugestao = sugestao, voto = voto, user = user, db = db)
+
+async def votar_orm(sugestao_id: int, user: User, voto: bool):
+    '''
+    O caminho anterior: leitura do voto, escrita pelo ORM, contadores e
+    refresh. Dois votos simultâneos do mesmo usuário colidem na chave primária.
+    '''
+    async with async_session_maker() as db:
+        sugestao = await db.get(Sugestao, sugestao_id)
+        voto_link = await Sugestoes.get_voto(sugestao = sugestao, user = user, db = db)
+        anterior = voto_link.voto if voto_link is not None else None
+        if voto_link is None:
+            voto_link = Sugestao_User(sugestao_id = sugestao_id, user_id = user.id, voto = voto)
+            db.add(voto_link)
+        voto_link.voto = voto
+        try:
+            if anterior != voto:
+                await db.exec(update(Sugestao).where(Sugestao.id == sugestao_id).values(
+                    upvotes_count = Sugestao.upvotes_count + int(voto is True) - int(anterior is True),
+                    downvotes_count = Sugestao.downvotes_count + int(voto is False) - int(anterior is False),
+                ))
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            return False
+        await db.refresh(sugestao)
+
+def votar_buffer(buffer: VoteBuffer):
+    async def funcao(sugestao_id: int, user: User, voto: bool):
+        await buffer.add(sugestao_id, user.id, voto)
+    return funcao
+
+async def run_mode(funcao, sugestao_id: int, usuarios: list[User], votes: int, concurrency: int, seed: int) -> tuple[float, int]:
+    rng = random.Random(seed)
+    fila = asyncio.Queue()
+    for _ in range(votes):
+        fila.put_nowait((rng.choice(usuarios), rng.random() < 0.7))
+
+    conflitos = 0
+    async def worker():
+        nonlocal conflitos
+        while not fila.empty():
+            user, voto = fila.get_nowait()
+            if await funcao(sugestao_id, user, voto) is False:
+                conflitos += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, conflitos
+
+async def check(sugestao_id: int):
+    async with async_session_maker() as db:
+        sugestao = await db.get(Sugestao, sugestao_id)
+        votos = (await db.exec(select(Sugestao_User.voto).where(Sugestao_User.sugestao_id == sugestao_id))).all()
+        assert (sugestao.upvotes_count, sugestao.downvotes_count) == (votos.count(True), votos.count(False)), 'contadores divergentes'
+
+async def run(votes: int, users: int, concurrency: int):
+    apply_pending(engine)
+
+    print(f"{'modo':>8} {'votos':>7} {'s':>7} {'votos/s':>9} {'conflitos':>10}")
+    for nome, funcao in (('orm', votar_orm), ('upsert', votar)):
+        sugestao_id, usuarios = await seed(users)
+        segundos, conflitos = await run_mode(funcao, sugestao_id, usuarios, votes, concurrency, seed = 1)
+        await check(sugestao_id)
+        print(f"{nome:>8} {votes:>7} {segundos:>7.2f} {votes / segundos:>9.0f} {conflitos:>10}")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        buffer = VoteBuffer(diretorio, max_pendentes = 500, intervalo = 1)
+        await buffer.start()
+        sugestao_id, usuarios = await seed(users)
+
+        start = time.perf_counter()
+        await run_mode(votar_buffer(buffer), sugestao_id, usuarios, votes, concurrency, seed = 1)
+        await buffer.stop()
+        segundos = time.perf_counter() - start
+
+        await check(sugestao_id)
+        print(f"{'buffer':>8} {votes:>7} {segundos:>7.2f} {votes / segundos:>9.0f} {0:>10}")
+
+    await async_engine.dispose()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'votos por segundo: upsert vs ORM vs buffer')
+    parser.add_argument('--votes', type = int, default = 5000)
+    parser.add_argument('--users', type = int, default = 1000)
+    parser.add_argument('--concurrency', type = int, default = 16)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.votes, args.users, args.concurrency))
@@ -9,12 +9,39 @@ allowed_origins = os.getenv('ALLOWED_ORIGINS', '').split(',')
 
 class DatabaseSettings(BaseSettings):
     CONNECTOR: str   = os.getenv('DATABASE_CONNECTOR')
+    ASYNC_CONNECTOR: str = os.getenv('DATABASE_ASYNC_CONNECTOR') or 'mariadb+asyncmy'
     HOST: str        = os.getenv('DATABASE_HOST')
     PORT: str        = os.getenv('DATABASE_PORT')
     DB_NAME: str     = os.getenv('DATABASE_DB_NAME')
     DB_USER: str     = os.getenv('DATABASE_USER')
     DB_PASSWORD: str = os.getenv('DATABASE_PASSWORD')
 
+    # pool de conexões
+    POOL_SIZE: int       = os.getenv('DATABASE_POOL_SIZE') or 5
+    MAX_OVERFLOW: int    = os.getenv('DATABASE_MAX_OVERFLOW') or 10
+    POOL_TIMEOUT: float  = os.getenv('DATABASE_POOL_TIMEOUT') or 30
+    POOL_RECYCLE: int    = os.getenv('DATABASE_POOL_RECYCLE') or 3600 # MariaDB encerra conexões ociosas (wait_timeout)
+    POOL_PRE_PING: bool  = os.getenv('DATABASE_POOL_PRE_PING') or True
+    ECHO: bool           = os.getenv('DATABASE_ECHO') or False # log de todo SQL; independente de DEBUG
+
+    # réplicas de leitura: urls assíncronas separadas por vírgula
+    REPLICA_URLS: str = os.getenv('DATABASE_REPLICA_URLS') or ''
+    READ_YOUR_WRITES_SECONDS: float = os.getenv('DATABASE_READ_YOUR_WRITES_SECONDS') or 5
+
+    # aplica migrations pendentes no startup (execução local); em produção use 'python migrate.py'
+    AUTO_MIGRATE: bool = os.getenv('DATABASE_AUTO_MIGRATE') or False
+
+    # contagem de queries por requisição (Server-Timing) e detecção de N+1
+    INSTRUMENTATION: bool     = os.getenv('DATABASE_INSTRUMENTATION') or True
+    N_PLUS_ONE_THRESHOLD: int = os.getenv('DATABASE_N_PLUS_ONE_THRESHOLD') or 5 # mesmo statement repetido mais vezes que isso
+
+    # X-Total-Count: contagem exata até esse número de linhas, estimada acima (MariaDB)
+    COUNT_EXACT_LIMIT: int = os.getenv('DATABASE_COUNT_EXACT_LIMIT') or 100000
+    COUNT_CACHE_TTL: float = os.getenv('DATABASE_COUNT_CACHE_TTL') or 30
+
+    # arquivo JSON lines com um exemplo de cada formato de SELECT, lido por index_advisor.py
+    QUERY_LOG: str = os.getenv('DATABASE_QUERY_LOG') or ''
+
 class AuthenticationSettings(BaseSettings):
     SECRET_KEY: str = os.getenv('SECRET_KEY')
     ALGORITHM: str  = os.getenv('ALGORITHM')
@@ -26,6 +53,24 @@ class CORSSettings(BaseSettings):
 class Settings(BaseSettings):
     DEBUG: bool = bool(os.getenv('DEBUG', True))
     APP_NAME: str = os.getenv('APP_NAME', 'CoPR - Contest Problem Radar')
+    TAG_INDEX_TTL: float = os.getenv('TAG_INDEX_TTL') or 60 # segundos até reconstruir o índice de tags em memória
+    FACETAS_CACHE_TTL: float = os.getenv('FACETAS_CACHE_TTL') or 300 # escritas de outros workers aparecem após esse prazo
+    SIMILARES_TTL: float = os.getenv('SIMILARES_TTL') or 300 # segundos até reconstruir o índice de problemas similares
+    DUPLICADOS_TTL: float = os.getenv('DUPLICADOS_TTL') or 300 # segundos até reconstruir o índice de quase duplicados
+
+    # votos com escrita adiada: fila em memória + journal local, gravados em lote
+    VOTOS_BUFFER: bool            = os.getenv('VOTOS_BUFFER') or False
+    VOTOS_BUFFER_DIR: str         = os.getenv('VOTOS_BUFFER_DIR') or './votos_journal' # um journal por worker; precisa sobreviver a reinícios
+    VOTOS_BUFFER_MAX: int         = os.getenv('VOTOS_BUFFER_MAX') or 500 # votos pendentes que disparam o flush (e tamanho do lote)
+    VOTOS_BUFFER_INTERVALO: float = os.getenv('VOTOS_BUFFER_INTERVALO') or 1 # segundos entre flushes
+
+    # streams SSE de votos: segundos entre leituras dos contadores assinados (votos de outros workers; 0 desliga)
+    VOTOS_STREAM_SYNC: float = os.getenv('VOTOS_STREAM_SYNC') or 5
+
+    # cache de respostas GET com ETag (leituras de problemas)
+    RESPONSE_CACHE: bool           = os.getenv('RESPONSE_CACHE') or True
+    RESPONSE_CACHE_MAX_BYTES: int  = os.getenv('RESPONSE_CACHE_MAX_BYTES') or 32 * 1024 * 1024
+    RESPONSE_CACHE_TTL: float      = os.getenv('RESPONSE_CACHE_TTL') or 60
     
     auth: AuthenticationSettings = AuthenticationSettings()
     cors: CORSSettings           = CORSSettings()
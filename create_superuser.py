@@ -1,10 +1,12 @@
+import asyncio
+
 from apps.users.utils import Users
 from apps.users.models.requests import UserCreate, RoleOptions
 from config import settings
-from database.connection import Session, engine
+from database.connection import async_session_maker, async_engine
 
-def create_user(username, password, session):
-    user = Users.create_user(
+async def create_user(username, password, session):
+    user = await Users.create_user(
         user_data = UserCreate(
             username = username,
             password = password,
@@ -13,8 +15,12 @@ def create_user(username, password, session):
         db = session)
     return user
 
+async def main(username, password):
+    async with async_session_maker() as session:
+        await create_user(username, password, session)
+    await async_engine.dispose()
+
 username = input('username: ')
 password = input('password: ')
 
-with Session(engine) as session:
-    create_user(username, password, session)
\ No newline at end of file
+asyncio.run(main(username, password))
@@ -1,47 +1,99 @@
 from typing import Annotated
 
-from fastapi import Depends
-from sqlmodel import create_engine, SQLModel, Session
+from fastapi import Depends, Request
+from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from config import settings
+from database.pool import PoolMetrics, instrumented_pool, pool_metrics
+from database.routing import RoutingSession, recent_writers, request_identity
 import logging, asyncio
 
 MAX_RETRIES = 10
 RETRY_DELAY = 5
 
 db_connector = settings.database.CONNECTOR
+db_async_connector = settings.database.ASYNC_CONNECTOR
 db_host = settings.database.HOST
 db_port = settings.database.PORT
 db_name = settings.database.DB_NAME
 db_user = settings.database.DB_USER
 db_password = settings.database.DB_PASSWORD
 
-match db_connector:
-    case 'mariadb+mariadbconnector':
-        db_fullhost = str(db_host) + ":" + str(db_port) + '/' + str(db_name)
+def build_url(connector: str) -> str:
+    match connector.split('+')[0]:
+        case 'mariadb' | 'mysql':
+            db_fullhost = str(db_host) + ":" + str(db_port) + '/' + str(db_name)
+            db_credentials = str(db_user)
 
-        if db_user != '':
-            db_fullhost = '@' + db_fullhost
+            if db_user != '':
+                db_fullhost = '@' + db_fullhost
 
-            if db_password != '':
-                db_password = ':' + str(db_password)
+                if db_password != '':
+                    db_credentials += ':' + str(db_password)
 
-        full_url = str(db_connector) + "://" + str(db_user) + str(db_password)  + str(db_fullhost)
+            return str(connector) + "://" + db_credentials + str(db_fullhost)
+
+        case 'sqlite':
+            # DB_NAME é o caminho do arquivo (execução local)
+            return str(connector) + ":///" + str(db_name)
+
+    raise ValueError(f"Conector de banco não suportado: {connector}")
 # Documentação de url de conexão do sqlalchemy:
 # https://docs.sqlalchemy.org/en/20/core/engines.html#backend-specific-urls
-    
-engine = create_engine(full_url, echo=settings.DEBUG)
 
-def init_db():
-    SQLModel.metadata.create_all(engine)
+full_url = build_url(db_connector)
+full_async_url = build_url(db_async_connector)
+
+pool_options = {
+    'pool_size': settings.database.POOL_SIZE,
+    'max_overflow': settings.database.MAX_OVERFLOW,
+    'pool_timeout': settings.database.POOL_TIMEOUT,
+    'pool_recycle': settings.database.POOL_RECYCLE,
+    'pool_pre_ping': settings.database.POOL_PRE_PING,
+}
+
+# Engine síncrono: usado apenas por scripts e pelo startup (DDL, seeders)
+engine = create_engine(full_url, echo=settings.database.ECHO, poolclass=QueuePool, **pool_options)
+
+def create_instrumented_engine(url: str, name: str):
+    pool_metrics[name] = PoolMetrics()
+    instrumented_engine = create_async_engine(
+        url,
+        echo = settings.database.ECHO,
+        poolclass = instrumented_pool(AsyncAdaptedQueuePool, pool_metrics[name]),
+        **pool_options
+    )
+    pool_metrics[name].attach(instrumented_engine.sync_engine)
+
+    return instrumented_engine
+
+# Engine assíncrono: usado pelas rotas, não bloqueia o event loop
+async_engine = create_instrumented_engine(full_async_url, 'primary')
+
+# Réplicas de leitura (opcionais)
+replica_engines = [
+    create_instrumented_engine(url.strip(), f'replica-{i}')
+    for i, url in enumerate(settings.database.REPLICA_URLS.split(','))
+    if url.strip()
+]
+
+RoutingSession.primary = async_engine.sync_engine
+RoutingSession.replicas = [replica.sync_engine for replica in replica_engines]
+
+# expire_on_commit = False: após o commit os atributos continuam acessíveis
+# sem nova ida ao banco (lazy load não é permitido em sessões assíncronas)
+async_session_maker = async_sessionmaker(class_ = AsyncSession, sync_session_class = RoutingSession, expire_on_commit = False)
 
 async def connect_db():
     logging.info("Tentando conectar com o DB...")
     retries = 0
     while retries < MAX_RETRIES:
         try:
-            with engine.connect() as conn:
-                conn.execute(text("SELECT 1"))
+            async with async_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
             logging.info("Conexão com DB bem-sucedida!")
             return
         except Exception as e:
@@ -52,6 +104,11 @@ async def connect_db():
                 raise e
             await asyncio.sleep(RETRY_DELAY)
 
+async def disconnect_db():
+    await async_engine.dispose()
+    for replica in replica_engines:
+        await replica.dispose()
+
 
 def get_session():
     with Session(engine) as session:
@@ -59,6 +116,21 @@ def get_session():
 
 DBSessionDep = Annotated[Session, Depends(get_session)]
 
+async def get_async_session(request: Request):
+    async with async_session_maker() as session:
+        identity = request_identity(request.headers.get('authorization'))
+        session.info['identity'] = identity
+        # o cache de respostas só guarda corpos lidos do primário (ver 'replica' em get_bind)
+        request.state.db_session_info = session.info
+
+        # apenas GETs sem escrita recente do usuário podem ler de réplicas
+        if request.method not in ('GET', 'HEAD') or recent_writers.is_recent(identity):
+            session.info['primary'] = True
+
+        yield session
+
+AsyncDBSessionDep = Annotated[AsyncSession, Depends(get_async_session)]
+
 # from sqlmodel import create_engine, SQLModel, Session
 # from config import settings
 
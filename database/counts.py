@@ -0,0 +1,104 @@
+import time
+from typing import Iterable
+
+from fastapi import Response
+from sqlalchemy import func
+from sqlmodel import select
+
+from config import settings
+from .connection import AsyncDBSessionDep
+from .invalidation import on_write
+
+'''
+''  Total de registros das listagens (X-Total-Count)
+''
+''  COUNT exato limitado a COUNT_EXACT_LIMIT linhas: com os índices dos
+''  filtros isso custa no máximo esse número de entradas de índice. Acima
+''  do limite, o MariaDB devolve a estimativa do EXPLAIN; no SQLite (uso
+''  local) a contagem completa é feita. Os totais ficam em cache por
+''  statement, limpos a cada commit nas tabelas envolvidas.
+'''
+class CountCache:
+    def __init__(self, ttl: float, max_entries: int = 4096):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: dict[str, tuple[float, frozenset[str], int, bool]] = {}
+        self._tables: set[str] = set()
+
+    def lookup(self, key: str) -> tuple[int, bool] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, _, total, exact = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        return total, exact
+
+    def store(self, key: str, tables: frozenset[str], total: int, exact: bool):
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+
+        self._entries[key] = (time.monotonic() + self.ttl, tables, total, exact)
+        for table in tables - self._tables:
+            self._tables.add(table)
+            on_write([table], self.invalidate)
+
+    def invalidate(self, tables: set[str]):
+        for key in [key for key, entry in self._entries.items() if entry[1] & tables]:
+            del self._entries[key]
+
+count_cache = CountCache(ttl = settings.database.COUNT_CACHE_TTL)
+
+async def _estimate(query, db: AsyncDBSessionDep) -> int | None:
+    '''Linhas estimadas pelo otimizador (MariaDB); None onde não há estimativa barata.'''
+    dialect = db.get_bind().dialect
+    if dialect.name not in ('mysql', 'mariadb'):
+        return None
+
+    sql = str(query.compile(dialect = dialect, compile_kwargs = { 'literal_binds': True }))
+    connection = await db.connection()
+    plan = (await connection.exec_driver_sql('EXPLAIN ' + sql)).mappings().all()
+
+    # a primeira linha é a tabela que conduz a query
+    return int(plan[0]['rows']) if plan and plan[0]['rows'] is not None else None
+
+async def count_rows(query, *,
+    tables: Iterable[str],
+    db: AsyncDBSessionDep,
+) -> tuple[int, bool]:
+    '''(total, exato) das linhas de 'query' (um select de ids já filtrado).'''
+    query = query.order_by(None)
+    dialect = db.get_bind().dialect
+    compiled = query.compile(dialect = dialect)
+    key = compiled.string + '|' + repr(sorted(compiled.params.items(), key = lambda item: item[0]))
+
+    cached = count_cache.lookup(key)
+    if cached is not None:
+        return cached
+
+    limit = settings.database.COUNT_EXACT_LIMIT
+    bounded = select(func.count()).select_from(query.limit(limit + 1).subquery())
+    total = (await db.exec(bounded)).one()
+    exact = True
+
+    if total > limit:
+        estimate = await _estimate(query, db)
+        if estimate is not None:
+            total, exact = max(estimate, total), False
+        else:
+            total = (await db.exec(select(func.count()).select_from(query.subquery()))).one()
+
+    count_cache.store(key, frozenset(tables), total, exact)
+    return total, exact
+
+def set_total_count(response: Response, total: int, exact: bool = True):
+    '''
+    Total em 'X-Total-Count'; 'X-Total-Count-Estimated: true' quando é a
+    estimativa do banco e não uma contagem.
+    '''
+    response.headers['X-Total-Count'] = str(total)
+    if not exact:
+        response.headers['X-Total-Count-Estimated'] = 'true'
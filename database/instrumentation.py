@@ -0,0 +1,152 @@
+import json
+import logging
+import re
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from config import settings
+
+'''
+''  Estatísticas por requisição
+'''
+class RequestQueryStats:
+    def __init__(self, route: str):
+        self.route = route
+        self.count = 0
+        self.total_ms = 0.0
+        self.shapes: Counter[str] = Counter()
+
+    def record(self, statement: str, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated_shapes(self, threshold: int) -> dict[str, int]:
+        return { shape: count for shape, count in self.shapes.items() if count > threshold }
+
+current_stats: ContextVar[RequestQueryStats | None] = ContextVar('current_stats', default = None)
+
+_in_list = re.compile(r'\((?:\s*(?:\?|%s|:\w+|__\[POSTCOMPILE_\w+\])\s*,?)+\)')
+_whitespace = re.compile(r'\s+')
+
+def statement_shape(statement: str) -> str:
+    '''
+    Forma do statement: placeholders de listas IN colapsados e espaços
+    normalizados, para que o mesmo SELECT com N ids diferentes conte igual.
+    '''
+    shape = _in_list.sub('(?)', statement)
+    return _whitespace.sub(' ', shape).strip()
+
+'''
+''  Log de formatos de SELECT (entrada do index_advisor.py)
+'''
+class QueryShapeLog:
+    '''
+    Grava, em JSON lines, o primeiro SELECT de cada formato visto por este
+    processo, com os parâmetros usados, para ser reexecutado com EXPLAIN.
+    '''
+    def __init__(self, path: str):
+        self.path = path
+        self._seen: set[str] = set()
+
+    def record(self, conn, statement: str, parameters, executemany: bool):
+        if executemany or not statement.lstrip().upper().startswith('SELECT'):
+            return
+
+        shape = statement_shape(statement)
+        if shape in self._seen:
+            return
+        self._seen.add(shape)
+
+        entry = {
+            'shape': shape,
+            'statement': statement,
+            'parameters': parameters,
+            'dialect': conn.dialect.name,
+            'paramstyle': conn.dialect.paramstyle,
+        }
+        with open(self.path, 'a') as log:
+            log.write(json.dumps(entry, default = str) + '\n')
+
+query_log = QueryShapeLog(settings.database.QUERY_LOG) if settings.database.QUERY_LOG else None
+
+'''
+''  Eventos do SQLAlchemy (todas as engines, inclusive as assíncronas)
+'''
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_stats.get() is not None:
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if query_log is not None:
+        query_log.record(conn, statement, parameters, executemany)
+
+    stats = current_stats.get()
+    if stats is None or not conn.info.get('query_start'):
+        return
+
+    elapsed_ms = (time.perf_counter() - conn.info['query_start'].pop()) * 1000
+    stats.record(statement, elapsed_ms)
+
+'''
+''  Relatório de N+1
+'''
+class QueryReport:
+    '''
+    Últimas requisições com suspeita de N+1 e totais por rota,
+    expostos em /internal/queries.
+    '''
+    def __init__(self, maxlen: int = 100):
+        self.flagged = deque(maxlen = maxlen)
+        self.routes: dict[str, dict] = {}
+
+    def add(self, stats: RequestQueryStats, repeated: dict[str, int]):
+        route = self.routes.setdefault(stats.route, { 'requests': 0, 'queries': 0, 'db_ms': 0.0, 'max_queries': 0 })
+        route['requests'] += 1
+        route['queries'] += stats.count
+        route['db_ms'] += stats.total_ms
+        route['max_queries'] = max(route['max_queries'], stats.count)
+
+        if repeated:
+            self.flagged.append({
+                'route': stats.route,
+                'queries': stats.count,
+                'db_ms': round(stats.total_ms, 2),
+                'repeated': repeated,
+            })
+
+query_report = QueryReport()
+
+class QueryInstrumentationMiddleware(BaseHTTPMiddleware):
+    '''
+    Conta statements e tempo de banco por requisição, devolve em
+    'Server-Timing' e registra statements repetidos (N+1).
+    '''
+    async def dispatch(self, request: Request, call_next):
+        stats = RequestQueryStats(route = request.method + ' ' + request.url.path)
+        token = current_stats.set(stats)
+        try:
+            response = await call_next(request)
+        finally:
+            current_stats.reset(token)
+
+        route = request.scope.get('route')
+        if route is not None:
+            stats.route = request.method + ' ' + route.path
+
+        repeated = stats.repeated_shapes(settings.database.N_PLUS_ONE_THRESHOLD)
+        for shape, count in repeated.items():
+            logging.warning("Possível N+1 em %s: %d execuções de %s", stats.route, count, shape)
+
+        query_report.add(stats, repeated)
+
+        response.headers.append('Server-Timing', f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries"')
+        return response
@@ -0,0 +1,63 @@
+from collections import defaultdict
+from typing import Callable, Iterable
+
+from sqlalchemy import event, inspect
+
+from .routing import RoutingSession
+
+'''
+''  Invalidação de caches por tabela
+''
+''  A sessão anota as tabelas escritas (flush do ORM e insert/update/delete
+''  executados direto) e, no commit, avisa os caches inscritos nelas.
+''  Rollback descarta as anotações: nada foi escrito.
+'''
+_listeners: dict[str, list[Callable[[set[str]], None]]] = defaultdict(list)
+
+def on_write(tables: Iterable[str], callback: Callable[[set[str]], None]):
+    '''Chama 'callback(tabelas escritas)' após cada commit que escreveu em alguma de 'tables'.'''
+    for table in tables:
+        _listeners[table].append(callback)
+
+def notify(tables: Iterable[str]):
+    '''Avisa os inscritos de uma escrita feita fora da sessão (sql puro, outro processo).'''
+    tables = set(tables)
+    callbacks = {}
+    for table in tables:
+        for callback in _listeners.get(table, ()):
+            callbacks[id(callback)] = callback
+
+    for callback in callbacks.values():
+        callback(tables)
+
+def _written(session) -> set[str]:
+    return session.info.setdefault('written_tables', set())
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _track_flush(session, flush_context):
+    written = _written(session)
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        state = inspect(instance)
+        written.add(state.mapper.local_table.name)
+
+        # coleções many-to-many escrevem na tabela de ligação
+        for relationship in state.mapper.relationships:
+            if relationship.secondary is None:
+                continue
+            if instance in session.deleted or state.attrs[relationship.key].history.has_changes():
+                written.add(relationship.secondary.name)
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _track_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _written(orm_execute_state.session).add(orm_execute_state.statement.table.name)
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _after_commit(session):
+    written = session.info.pop('written_tables', None)
+    if written:
+        notify(written)
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('written_tables', None)
@@ -0,0 +1,71 @@
+from functools import lru_cache
+from typing import get_args
+
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+from sqlmodel import SQLModel
+
+MAX_DEPTH = 3
+
+def _response_model_of(annotation) -> type[BaseModel] | None:
+    '''
+    Modelo de resposta aninhado em uma anotação (X, list[X], X | None...).
+    Modelos de tabela são ignorados: serializam apenas colunas.
+    '''
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        if issubclass(annotation, SQLModel) and getattr(annotation, '__table__', None) is not None:
+            return None
+        return annotation
+
+    for arg in get_args(annotation):
+        nested = _response_model_of(arg)
+        if nested is not None:
+            return nested
+
+    return None
+
+@lru_cache
+def loader_options(model: type[SQLModel], response_model: type[BaseModel], depth: int = 0) -> tuple:
+    '''
+    Opções de carregamento para os relacionamentos que 'response_model' serializa.
+
+    Coleções usam selectinload (uma query IN por relacionamento, por página)
+    e many-to-one usa joinedload (mesma query). Assim uma página de N
+    registros custa um número constante de queries, não N por relacionamento.
+    '''
+    return tuple(loader for _, loader in relation_loaders(model, response_model, depth))
+
+@lru_cache
+def relation_loaders(model: type[SQLModel], response_model: type[BaseModel], depth: int = 0) -> tuple:
+    '''Pares (relacionamento, opção de carregamento) de loader_options.'''
+    if depth >= MAX_DEPTH:
+        return ()
+
+    relationships = inspect(model).relationships
+    options = []
+    for name, field in response_model.model_fields.items():
+        relationship = relationships.get(name)
+        if relationship is None:
+            continue
+
+        attribute = getattr(model, name)
+        loader = selectinload(attribute) if relationship.uselist else joinedload(attribute)
+
+        nested = _response_model_of(field.annotation)
+        if nested is not None:
+            nested_options = loader_options(relationship.mapper.class_, nested, depth + 1)
+            if nested_options:
+                loader = loader.options(*nested_options)
+
+        options.append((name, loader))
+
+    return tuple(options)
+
+def relation_names(model: type[SQLModel], response_model: type[BaseModel]) -> list[str]:
+    '''
+    Relacionamentos de primeiro nível serializados por 'response_model',
+    para recarregar com session.refresh após uma escrita.
+    '''
+    relationships = inspect(model).relationships
+    return [name for name in response_model.model_fields if name in relationships]
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+
+# registra as tabelas em SQLModel.metadata
+import database.schemas.users, database.schemas.problemas
+
+from . import m0001_initial, m0002_problema_fulltext, m0003_filter_indexes, m0004_sugestao_vote_counters, m0005_sugestao_score
+
+# ordem de aplicação; cada módulo define VERSION, DESCRIPTION e upgrade(conn).
+# m0001 cria as tabelas a partir dos modelos atuais, então migrations
+# seguintes devem ser idempotentes (checar se coluna/índice já existe).
+MIGRATIONS = [
+    m0001_initial,
+    m0002_problema_fulltext,
+    m0003_filter_indexes,
+    m0004_sugestao_vote_counters,
+    m0005_sugestao_score,
+]
+
+LATEST_VERSION = MIGRATIONS[-1].VERSION
+LOCK_NAME = 'copedex_migrations'
+
+# fora de SQLModel.metadata: não entra no fingerprint nem no create_all dos modelos
+version_metadata = MetaData()
+schema_version = Table(
+    'schema_version', version_metadata,
+    Column('version', Integer, primary_key = True),
+    Column('fingerprint', String(64), nullable = False),
+    Column('description', String(255), nullable = False),
+    Column('applied_at', DateTime, nullable = False),
+)
+
+'''
+''  Fingerprint
+'''
+def schema_fingerprint(metadata: MetaData = SQLModel.metadata) -> str:
+    '''
+    Hash das tabelas, colunas e índices declarados nos modelos.
+    Muda sempre que um modelo muda, com ou sem migration correspondente.
+    '''
+    description = []
+    for table in sorted(metadata.tables.values(), key = lambda table: table.name):
+        description.append({
+            'table': table.name,
+            'columns': [
+                [column.name, str(column.type), column.nullable, column.primary_key]
+                for column in table.columns
+            ],
+            'indexes': sorted(
+                [index.name, [column.name for column in index.columns], index.unique]
+                for index in table.indexes
+            ),
+        })
+
+    return hashlib.sha256(json.dumps(description, sort_keys = True).encode()).hexdigest()
+
+def schema_differences(conn: Connection, metadata: MetaData = SQLModel.metadata) -> list[str]:
+    '''
+    Tabelas, colunas e índices declarados nos modelos que não existem no
+    banco. O fingerprint só descreve os modelos; isto confere o banco real.
+    '''
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+
+    missing = []
+    for table in sorted(metadata.tables.values(), key = lambda table: table.name):
+        if table.name not in existing_tables:
+            missing.append(f'tabela {table.name}')
+            continue
+
+        columns = { column['name'] for column in inspector.get_columns(table.name) }
+        missing.extend(f'coluna {table.name}.{column.name}' for column in table.columns if column.name not in columns)
+
+        indexes = { index['name'] for index in inspector.get_indexes(table.name) }
+        missing.extend(f'índice {index.name}' for index in table.indexes if index.name not in indexes)
+
+    return missing
+
+'''
+''  Estado
+'''
+def _current_row(conn: Connection):
+    if not inspect(conn).has_table('schema_version'):
+        return None
+
+    query = select(schema_version).order_by(schema_version.c.version.desc()).limit(1)
+    return conn.execute(query).first()
+
+async def schema_is_current(async_engine: AsyncEngine) -> bool:
+    '''
+    Uma única consulta no startup dos workers: compara a versão gravada
+    com a última migration. Não executa DDL.
+    '''
+    async with async_engine.connect() as conn:
+        row = await conn.run_sync(_current_row)
+
+    if row is None or row.version < LATEST_VERSION:
+        return False
+
+    if row.fingerprint != schema_fingerprint():
+        logging.warning(
+            "Modelos diferem do schema gravado na versão %s; falta uma migration?", row.version
+        )
+
+    return True
+
+'''
+''  Aplicação
+'''
+def _lock(conn: Connection):
+    # serializa execuções concorrentes (vários workers/deploys); SQLite não precisa
+    if conn.dialect.name in ('mysql', 'mariadb'):
+        conn.execute(text("SELECT GET_LOCK(:name, 600)"), { 'name': LOCK_NAME })
+
+def _unlock(conn: Connection):
+    if conn.dialect.name in ('mysql', 'mariadb'):
+        conn.execute(text("SELECT RELEASE_LOCK(:name)"), { 'name': LOCK_NAME })
+
+def apply_pending(engine: Engine) -> list[int]:
+    '''
+    Aplica, em ordem, as migrations com versão acima da gravada.
+    Retorna as versões aplicadas.
+    '''
+    applied = []
+    with engine.connect() as lock_conn:
+        _lock(lock_conn)
+        try:
+            version_metadata.create_all(engine)
+
+            with engine.connect() as conn:
+                row = _current_row(conn)
+            current = row.version if row is not None else 0
+
+            for migration in MIGRATIONS:
+                if migration.VERSION <= current:
+                    continue
+
+                logging.info("Aplicando migration %s: %s", migration.VERSION, migration.DESCRIPTION)
+                with engine.begin() as conn:
+                    migration.upgrade(conn)
+
+                    # a última versão só é gravada se o banco bate com os modelos
+                    if migration is MIGRATIONS[-1]:
+                        missing = schema_differences(conn)
+                        if missing:
+                            raise RuntimeError(f"Schema incompleto após a migration {migration.VERSION}: {', '.join(missing)}")
+
+                    conn.execute(schema_version.insert().values(
+                        version = migration.VERSION,
+                        fingerprint = schema_fingerprint(),
+                        description = migration.DESCRIPTION,
+                        applied_at = datetime.now(timezone.utc).replace(tzinfo = None),
+                    ))
+                applied.append(migration.VERSION)
+        finally:
+            _unlock(lock_conn)
+
+    return applied
@@ -0,0 +1,43 @@
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel
+
+from database.seeders.roles import RoleSeeder
+
+VERSION = 1
+DESCRIPTION = 'tabelas iniciais e papéis'
+
+# schema anterior às migrations: colunas que um banco existente precisa ter
+# (as adicionadas depois são responsabilidade das migrations seguintes)
+BASELINE = {
+    'tag': ('id', 'nome'),
+    'evento': ('id', 'titulo'),
+    'role': ('id', 'display_name'),
+    'problema': (
+        'id', 'autor', 'dificuldade', 'limite_tempo', 'limite_memoria_mb',
+        'titulo', 'enunciado', 'categoria', 'evento_id',
+    ),
+    'user': ('id', 'username', 'password', 'ativo', 'role_id'),
+    'problema_tag': ('problema_id', 'tag_id'),
+    'problema_user': ('problema_id', 'user_id'),
+    'sugestao': ('id', 'descricao', 'status', 'problema_id', 'autor_id'),
+    'pessoa': ('id', 'nome', 'user_id'),
+    'sugestao_user': ('sugestao_id', 'user_id', 'voto'),
+}
+
+def upgrade(conn: Connection):
+    # checkfirst: bancos criados antes das migrations já possuem as tabelas
+    SQLModel.metadata.create_all(conn, checkfirst = True)
+
+    # tabela existente não é recriada: confere se ela tem o schema de partida
+    # antes de gravar a versão (criação interrompida, modelo antigo)
+    inspector = inspect(conn)
+    missing = [
+        f'{table}.{column}'
+        for table, columns in BASELINE.items()
+        for column in set(columns) - { column['name'] for column in inspector.get_columns(table) }
+    ]
+    if missing:
+        raise RuntimeError(f"Banco existente não tem o schema inicial; colunas ausentes: {', '.join(sorted(missing))}")
+
+    RoleSeeder.seed_db(conn)
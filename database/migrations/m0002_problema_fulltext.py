@@ -0,0 +1,33 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+VERSION = 2
+DESCRIPTION = 'busca textual em problema (FULLTEXT / FTS5)'
+
+def upgrade(conn: Connection):
+    if conn.dialect.name == 'sqlite':
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS problema_fts USING fts5("
+            "titulo, enunciado, content='problema', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        ))
+        # tabela de conteúdo externo: os triggers mantêm o índice em sincronia
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS problema_fts_ai AFTER INSERT ON problema BEGIN "
+            "INSERT INTO problema_fts(rowid, titulo, enunciado) VALUES (new.id, new.titulo, new.enunciado); END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS problema_fts_ad AFTER DELETE ON problema BEGIN "
+            "INSERT INTO problema_fts(problema_fts, rowid, titulo, enunciado) VALUES ('delete', old.id, old.titulo, old.enunciado); END"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER IF NOT EXISTS problema_fts_au AFTER UPDATE ON problema BEGIN "
+            "INSERT INTO problema_fts(problema_fts, rowid, titulo, enunciado) VALUES ('delete', old.id, old.titulo, old.enunciado); "
+            "INSERT INTO problema_fts(rowid, titulo, enunciado) VALUES (new.id, new.titulo, new.enunciado); END"
+        ))
+        conn.execute(text("INSERT INTO problema_fts(problema_fts) VALUES ('rebuild')"))
+        return
+
+    indexes = { index['name'] for index in inspect(conn).get_indexes('problema') }
+    if 'ix_problema_fulltext' not in indexes:
+        conn.execute(text("CREATE FULLTEXT INDEX ix_problema_fulltext ON problema (titulo, enunciado)"))
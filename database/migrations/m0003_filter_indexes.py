@@ -0,0 +1,32 @@
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel
+
+VERSION = 3
+DESCRIPTION = 'índices das colunas filtradas em problema, sugestao e tabelas de ligação'
+
+# nomes fixos: índices declarados por migrations futuras não entram aqui
+INDEXES = {
+    'problema': (
+        'ix_problema_categoria_dificuldade',
+        'ix_problema_dificuldade',
+        'ix_problema_autor',
+        'ix_problema_limite_tempo',
+        'ix_problema_limite_memoria_mb',
+        'ix_problema_evento_id',
+        'ix_problema_titulo',
+    ),
+    'problema_tag': ('ix_problema_tag_tag_id',),
+    'problema_user': ('ix_problema_user_user_id',),
+    'sugestao': ('ix_sugestao_problema_id_status', 'ix_sugestao_autor_id'),
+    'sugestao_user': ('ix_sugestao_user_user_id',),
+}
+
+def upgrade(conn: Connection):
+    for table_name, names in INDEXES.items():
+        table = SQLModel.metadata.tables[table_name]
+        existing = { index['name'] for index in inspect(conn).get_indexes(table_name) }
+
+        for index in table.indexes:
+            if index.name in names and index.name not in existing:
+                index.create(conn)
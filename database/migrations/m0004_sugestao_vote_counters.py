@@ -0,0 +1,27 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel
+
+VERSION = 4
+DESCRIPTION = 'contadores de votos em sugestao (upvotes_count, downvotes_count) e seus índices'
+
+COLUMNS = ('upvotes_count', 'downvotes_count')
+INDEXES = ('ix_sugestao_upvotes_count', 'ix_sugestao_downvotes_count')
+
+def upgrade(conn: Connection):
+    existing = { column['name'] for column in inspect(conn).get_columns('sugestao') }
+    for column in COLUMNS:
+        if column not in existing:
+            conn.execute(text(f"ALTER TABLE sugestao ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"))
+
+    # votos já registrados
+    conn.execute(text(
+        "UPDATE sugestao SET "
+        "upvotes_count = (SELECT COUNT(*) FROM sugestao_user WHERE sugestao_user.sugestao_id = sugestao.id AND sugestao_user.voto = 1), "
+        "downvotes_count = (SELECT COUNT(*) FROM sugestao_user WHERE sugestao_user.sugestao_id = sugestao.id AND sugestao_user.voto = 0)"
+    ))
+
+    existing = { index['name'] for index in inspect(conn).get_indexes('sugestao') }
+    for index in SQLModel.metadata.tables['sugestao'].indexes:
+        if index.name in INDEXES and index.name not in existing:
+            index.create(conn)
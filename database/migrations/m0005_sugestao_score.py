@@ -0,0 +1,35 @@
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel
+
+from database.schemas.problemas import wilson_score
+
+VERSION = 5
+DESCRIPTION = 'score (limite inferior de Wilson) em sugestao e índice (problema_id, status, score)'
+
+INDEX = 'ix_sugestao_problema_id_status_score'
+# prefixo do novo índice: removido depois que ele existe (a FK de problema_id precisa de um)
+OLD_INDEX = 'ix_sugestao_problema_id_status'
+
+def upgrade(conn: Connection):
+    existing = { column['name'] for column in inspect(conn).get_columns('sugestao') }
+    if 'score' not in existing:
+        conn.execute(text("ALTER TABLE sugestao ADD COLUMN score DOUBLE NOT NULL DEFAULT 0"))
+
+    # sugestões já votadas; sem votos o score é o padrão 0
+    rows = conn.execute(text(
+        "SELECT id, upvotes_count, downvotes_count FROM sugestao WHERE upvotes_count + downvotes_count > 0"
+    )).all()
+    if rows:
+        conn.execute(
+            text("UPDATE sugestao SET score = :score WHERE id = :id").bindparams(bindparam('score'), bindparam('id')),
+            [{ 'id': id, 'score': wilson_score(up, down) } for id, up, down in rows]
+        )
+
+    existing = { index['name'] for index in inspect(conn).get_indexes('sugestao') }
+    for index in SQLModel.metadata.tables['sugestao'].indexes:
+        if index.name == INDEX and index.name not in existing:
+            index.create(conn)
+
+    if OLD_INDEX in existing:
+        conn.execute(text(f"DROP INDEX {OLD_INDEX} ON sugestao" if conn.dialect.name in ('mysql', 'mariadb') else f"DROP INDEX {OLD_INDEX}"))
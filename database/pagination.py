@@ -0,0 +1,91 @@
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import and_, or_
+from sqlmodel import SQLModel
+
+'''
+''  Cursor opaco: base64 de [coluna de ordenação, valor, id] do último registro
+'''
+def encode_cursor(sort: str, value, id: int) -> str:
+    raw = json.dumps([sort, value, id], separators = (',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value, id = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            detail = "Cursor inválido"
+        )
+
+    if cursor_sort != sort:
+        raise HTTPException(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            detail = "Cursor gerado para outra ordenação"
+        )
+
+    return value, id
+
+def paginate(query, *,
+    model: type[SQLModel],
+    sort: str = 'id',
+    cursor: str | None = None,
+    skip: int = 0,
+    limit: int = 100,
+    descending: bool = False,
+):
+    '''
+    Ordena por (sort, id) e aplica o cursor com um predicado de intervalo,
+    que usa o índice em vez de percorrer e descartar 'skip' linhas.
+    Sem cursor, mantém skip/limit para compatibilidade. 'descending'
+    inverte as duas colunas (rankings: maior primeiro).
+    '''
+    sort_column = getattr(model, sort)
+    id_column = model.id
+
+    def ordem(column):
+        return column.desc() if descending else column
+
+    def depois(column, value):
+        return column < value if descending else column > value
+
+    if sort == 'id':
+        query = query.order_by(ordem(id_column))
+    else:
+        query = query.order_by(ordem(sort_column), ordem(id_column))
+
+    if cursor is not None:
+        value, last_id = decode_cursor(cursor, sort)
+        if sort == 'id':
+            query = query.where(depois(id_column, last_id))
+        else:
+            query = query.where(or_(
+                depois(sort_column, value),
+                and_(sort_column == value, depois(id_column, last_id)),
+            ))
+    elif skip:
+        query = query.offset(skip)
+
+    return query.limit(limit)
+
+def next_cursor(rows: list, sort: str = 'id', limit: int = 100) -> str | None:
+    '''Cursor da próxima página, ou None se esta foi a última.'''
+    if not rows or len(rows) < limit:
+        return None
+
+    last = rows[-1]
+    return encode_cursor(sort, getattr(last, sort), last.id)
+
+def set_next_cursor(response: Response, rows: list, sort: str = 'id', limit: int = 100):
+    '''
+    Próxima página em 'X-Next-Cursor': o corpo continua sendo a lista,
+    compatível com os clientes que paginam por skip/limit.
+    '''
+    cursor = next_cursor(rows, sort, limit)
+    if cursor is not None:
+        response.headers['X-Next-Cursor'] = cursor
@@ -0,0 +1,92 @@
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+class PoolMetrics:
+    '''
+    Contadores de uso de um pool de conexões.
+
+    checkout/checkin/connect/invalidate vêm dos eventos do pool;
+    o tempo de espera é medido pela classe criada em instrumented_pool.
+    '''
+    def __init__(self):
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.engine: Engine | None = None
+
+    def record_wait(self, elapsed_ms: float):
+        self.wait_count += 1
+        self.wait_ms_total += elapsed_ms
+        if elapsed_ms > self.wait_ms_max:
+            self.wait_ms_max = elapsed_ms
+
+    def attach(self, engine: Engine):
+        self.engine = engine
+
+        @event.listens_for(engine, 'checkout')
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            self.checkouts += 1
+
+        @event.listens_for(engine, 'checkin')
+        def on_checkin(dbapi_connection, connection_record):
+            self.checkins += 1
+
+        @event.listens_for(engine, 'connect')
+        def on_connect(dbapi_connection, connection_record):
+            self.connects += 1
+
+        @event.listens_for(engine, 'invalidate')
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool if self.engine is not None else None
+        live = {}
+        # size/overflow só existem em pools com fila (QueuePool e derivados)
+        if pool is not None and hasattr(pool, 'overflow'):
+            live = {
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': pool.overflow(),
+            }
+
+        return {
+            **live,
+            'checkouts': self.checkouts,
+            'checkins': self.checkins,
+            'connects': self.connects,
+            'invalidations': self.invalidations,
+            'timeouts': self.timeouts,
+            'wait_ms_avg': self.wait_ms_total / self.wait_count if self.wait_count else 0.0,
+            'wait_ms_max': self.wait_ms_max,
+        }
+
+def instrumented_pool(base: type[Pool], metrics: PoolMetrics) -> type[Pool]:
+    '''
+    Subclasse de 'base' que mede o tempo gasto para obter uma conexão.
+    A classe carrega as métricas como atributo, então o pool recriado
+    em engine.dispose() continua alimentando os mesmos contadores.
+    '''
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return base.connect(self)
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.record_wait((time.perf_counter() - start) * 1000)
+
+    return type('Instrumented' + base.__name__, (base,), {'metrics': metrics, 'connect': connect})
+
+# métricas por engine, expostas em /internal/pool
+pool_metrics: dict[str, PoolMetrics] = {}
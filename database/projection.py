@@ -0,0 +1,56 @@
+from functools import lru_cache
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+from sqlmodel import SQLModel
+
+from .loaders import relation_loaders
+
+'''
+''  Sparse fieldsets: ?fields=id,titulo,tags
+''
+''  Só as colunas pedidas entram no SELECT (load_only) e só os
+''  relacionamentos pedidos são carregados; a resposta é serializada com
+''  um modelo reduzido, sem tocar nos atributos que ficaram de fora.
+'''
+def parse_fields(fields: str | None, response_model: type[BaseModel]) -> frozenset[str] | None:
+    '''Campos pedidos (sempre com 'id'), ou None para a resposta completa.'''
+    if not fields:
+        return None
+
+    requested = frozenset(name.strip() for name in fields.split(',') if name.strip())
+    unknown = requested - response_model.model_fields.keys()
+    if unknown:
+        raise HTTPException(
+            status_code = status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail = f"Campos desconhecidos: {', '.join(sorted(unknown))}. Disponíveis: {', '.join(response_model.model_fields)}"
+        )
+
+    return requested | {'id'}
+
+@lru_cache
+def projection_options(model: type[SQLModel], response_model: type[BaseModel], fields: frozenset[str]) -> tuple:
+    relationships = inspect(model).relationships
+    columns = [getattr(model, name) for name in fields if name not in relationships]
+
+    # raiseload: um atributo fora da projeção acessado por engano falha em vez de gerar outra query
+    options = [load_only(*columns, raiseload = True)]
+    options += [loader for name, loader in relation_loaders(model, response_model) if name in fields]
+
+    return tuple(options)
+
+@lru_cache
+def _partial_adapter(response_model: type[BaseModel], fields: frozenset[str], many: bool) -> TypeAdapter:
+    partial = create_model(
+        response_model.__name__ + 'Parcial',
+        __config__ = ConfigDict(from_attributes = True),
+        **{ name: (field.annotation, field) for name, field in response_model.model_fields.items() if name in fields },
+    )
+    return TypeAdapter(list[partial] if many else partial)
+
+def project(data, response_model: type[BaseModel], fields: frozenset[str]) -> Response:
+    '''Serializa 'data' (um registro ou uma lista) apenas com os campos pedidos.'''
+    adapter = _partial_adapter(response_model, fields, isinstance(data, list))
+    return Response(content = adapter.dump_json(adapter.validate_python(data)), media_type = 'application/json')
@@ -0,0 +1,151 @@
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Iterable
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+from config import settings
+from .invalidation import on_write
+from .routing import recent_writers, request_identity
+
+'''
+''  Cache de respostas (GET) com ETag
+'''
+CACHED_HEADERS = ('content-type', 'x-next-cursor', 'x-total-count', 'x-total-count-estimated')
+
+class CachedResponse:
+    __slots__ = ('body', 'headers', 'etag', 'tables', 'expires_at')
+
+    def __init__(self, body: bytes, headers: dict, tables: frozenset[str], ttl: float):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.headers = { **headers, 'ETag': self.etag, 'Cache-Control': 'no-cache' }
+        self.tables = tables
+        self.expires_at = time.monotonic() + ttl
+
+class ResponseCache:
+    '''
+    LRU limitado pelo total de bytes dos corpos. Chave: caminho + query
+    string normalizada. Cada rota declara as tabelas que sua resposta lê;
+    um commit que escreve em alguma delas (upsert_row, delete_row, métodos
+    de Problemas...) remove as entradas dessas rotas. O TTL cobre escritas
+    feitas por outros workers.
+    '''
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.routes: list[tuple[re.Pattern, frozenset[str]]] = []
+        self.generation = 0 # muda a cada invalidação; respostas montadas antes dela não entram
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._bytes = 0
+
+    def route(self, pattern: str, tables: Iterable[str]):
+        tables = frozenset(tables)
+        self.routes.append((re.compile(pattern), tables))
+        on_write(tables, self.invalidate)
+
+    def tables_for(self, path: str) -> frozenset[str] | None:
+        for pattern, tables in self.routes:
+            if pattern.match(path):
+                return tables
+        return None
+
+    @staticmethod
+    def key(path: str, query_string: str) -> str:
+        '''Parâmetros em ordem: ?b=1&a=2 e ?a=2&b=1 são a mesma entrada.'''
+        return path + '?' + urlencode(sorted(parse_qsl(query_string, keep_blank_values = True)))
+
+    def lookup(self, key: str) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if entry.expires_at < time.monotonic():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def store(self, key: str, entry: CachedResponse, generation: int):
+        if generation != self.generation or len(entry.body) > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = entry
+        self._bytes += len(entry.body)
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, tables: set[str]):
+        self.generation += 1
+        for key in [key for key, entry in self._entries.items() if entry.tables & tables]:
+            self._remove(key)
+
+    def _remove(self, key: str):
+        self._bytes -= len(self._entries.pop(key).body)
+
+response_cache = ResponseCache(
+    max_bytes = settings.RESPONSE_CACHE_MAX_BYTES,
+    ttl = settings.RESPONSE_CACHE_TTL,
+)
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == '*':
+        return True
+
+    # comparação fraca (RFC 9110): W/"x" casa com "x"
+    return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    '''
+    Responde GETs das rotas registradas em response_cache sem passar pela
+    rota, e 304 quando If-None-Match traz o ETag atual.
+
+    Quem escreveu há pouco (read-your-writes) não usa o cache nem o
+    preenche, e só entram corpos montados sem ler de uma réplica: uma
+    réplica atrasada devolveria a versão anterior a uma invalidação.
+    '''
+    def __init__(self, app, cache: ResponseCache = response_cache):
+        super().__init__(app)
+        self.cache = cache
+
+    async def dispatch(self, request: Request, call_next):
+        if request.method != 'GET':
+            return await call_next(request)
+
+        tables = self.cache.tables_for(request.url.path)
+        if tables is None or recent_writers.is_recent(request_identity(request.headers.get('authorization'))):
+            return await call_next(request)
+
+        key = self.cache.key(request.url.path, request.url.query)
+        entry = self.cache.lookup(key)
+
+        if entry is None:
+            generation = self.cache.generation
+            response = await call_next(request)
+            if response.status_code != 200:
+                return response
+
+            body = b''.join([chunk async for chunk in response.body_iterator])
+            headers = { name: response.headers[name] for name in CACHED_HEADERS if name in response.headers }
+            entry = CachedResponse(body, headers, tables, self.cache.ttl)
+
+            session_info = getattr(request.state, 'db_session_info', None)
+            if session_info is None or 'replica' not in session_info:
+                self.cache.store(key, entry, generation)
+
+        if etag_matches(request.headers.get('if-none-match'), entry.etag):
+            return Response(status_code = 304, headers = { 'ETag': entry.etag, 'Cache-Control': 'no-cache' })
+
+        return Response(content = entry.body, headers = entry.headers)
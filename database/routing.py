@@ -0,0 +1,102 @@
+import random
+import time
+
+import jwt
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+from config import settings
+
+'''
+''  Roteamento primário / réplicas
+'''
+class RoutingSession(Session):
+    '''
+    Sessão que envia leituras para uma réplica e escritas para o primário.
+
+    Depois da primeira escrita (flush ou insert/update/delete direto) a
+    sessão passa a ler também do primário, para não ler de volta dados que ainda não foram replicados.
+    session.info['primary'] = True força o primário desde o início.
+
+    A réplica é sorteada na primeira leitura e fixada em session.info:
+    réplicas com atrasos diferentes dentro da mesma sessão fariam leituras
+    seguidas voltarem no tempo.
+    '''
+    primary: Engine | None = None
+    replicas: list[Engine] = []
+
+    def get_bind(self, mapper = None, clause = None, **kwargs):
+        if not self.replicas or self._flushing or self.info.get('primary'):
+            return self.primary
+
+        if clause is not None and not getattr(clause, 'is_select', False):
+            return self.primary
+
+        replica = self.info.get('replica')
+        if replica is None:
+            replica = self.info['replica'] = random.choice(self.replicas)
+        return replica
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    session.info['primary'] = True
+    session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _after_statement(orm_execute_state):
+    # insert/update/delete executados direto (Core, em lote) não passam pelo flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['primary'] = True
+        orm_execute_state.session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _after_commit(session):
+    if session.info.pop('wrote', False) and session.info.get('identity'):
+        recent_writers.record(session.info['identity'])
+
+'''
+''  Read-your-writes
+'''
+class RecentWriters:
+    '''
+    Identidades que escreveram há menos de 'window' segundos.
+    Suas leituras vão para o primário até a réplica alcançá-lo.
+    '''
+    def __init__(self, window: float = 5):
+        self.window = window
+        self._expires_at: dict[str, float] = {}
+
+    def record(self, identity: str):
+        self._expires_at[identity] = time.monotonic() + self.window
+
+    def is_recent(self, identity: str | None) -> bool:
+        if identity is None:
+            return False
+
+        expires_at = self._expires_at.get(identity)
+        if expires_at is None:
+            return False
+
+        if expires_at < time.monotonic():
+            del self._expires_at[identity]
+            return False
+
+        return True
+
+recent_writers = RecentWriters(window = settings.database.READ_YOUR_WRITES_SECONDS)
+
+def request_identity(authorization: str | None) -> str | None:
+    '''
+    Usuário do bearer token, com assinatura e expiração verificadas: um
+    token forjado não pode marcar outro usuário como escritor recente nem
+    mandar leituras para o primário. A autenticação continua em get_current_user.
+    '''
+    if not authorization or not authorization.lower().startswith('bearer '):
+        return None
+
+    try:
+        payload = jwt.decode(authorization[7:], settings.auth.SECRET_KEY, algorithms = [settings.auth.ALGORITHM])
+    except jwt.InvalidTokenError:
+        return None
+
+    return payload.get('sub')
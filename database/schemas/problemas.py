@@ -1,4 +1,6 @@
+import math
 from typing import TYPE_CHECKING
+from sqlalchemy import Double, Index
 from sqlmodel import Field, SQLModel, Relationship
 from enum import Enum
 
@@ -19,11 +21,16 @@ class Problema_Tag(SQLModel, table=True):
     problema_id: int | None = Field(default = None, foreign_key = "problema.id", primary_key = True)
     tag_id:      int | None = Field(default = None, foreign_key = "tag.id",      primary_key = True)
 
+    # a chave primária atende problema -> tags; este índice atende tag -> problemas
+    __table_args__ = (Index('ix_problema_tag_tag_id', 'tag_id', 'problema_id'),)
+
 
 class Problema_User(SQLModel, table=True):
     problema_id: int | None = Field(default = None, foreign_key = "problema.id", primary_key= True)
     user_id: int | None     = Field(default = None, foreign_key = "user.id",     primary_key= True)
 
+    __table_args__ = (Index('ix_problema_user_user_id', 'user_id', 'problema_id'),)
+
 
 class TagBase(SQLModel):
     id: int | None = Field(default = None, primary_key = True)
@@ -62,6 +69,30 @@ class Problema(ProblemaBase, table=True):
 
     sugestoes: list['Sugestao'] | None = Relationship(back_populates = "problema")
 
+    # filtros de ProblemaListQueryParams e ordenações da paginação por cursor
+    __table_args__ = (
+        Index('ix_problema_categoria_dificuldade', 'categoria', 'dificuldade'),
+        Index('ix_problema_dificuldade', 'dificuldade'),
+        Index('ix_problema_autor', 'autor'),
+        Index('ix_problema_limite_tempo', 'limite_tempo'),
+        Index('ix_problema_limite_memoria_mb', 'limite_memoria_mb'),
+        Index('ix_problema_evento_id', 'evento_id'),
+        Index('ix_problema_titulo', 'titulo'),
+    )
+
+
+def wilson_score(upvotes: int, downvotes: int, z: float = 1.96) -> float:
+    '''
+    Limite inferior do intervalo de Wilson (95%) da fração de upvotes: poucas
+    avaliações positivas não passam na frente de muitas quase todas positivas.
+    0 sem votos.
+    '''
+    n = upvotes + downvotes
+    if n == 0:
+        return 0.0
+
+    p = upvotes / n
+    return (p + z * z / (2 * n) - z * math.sqrt((p * (1 - p) + z * z / (4 * n)) / n)) / (1 + z * z / n)
 
 class Sugestao_User(SQLModel, table=True):
     sugestao_id: int | None = Field(default = None, foreign_key = "sugestao.id", primary_key = True)
@@ -71,6 +102,9 @@ class Sugestao_User(SQLModel, table=True):
     sugestao: "Sugestao" = Relationship(back_populates = "votantes")
     user: "User" = Relationship(back_populates = 'sugestoes_votadas')
 
+    # a chave primária atende sugestao -> votos; este índice atende usuário -> votos
+    __table_args__ = (Index('ix_sugestao_user_user_id', 'user_id', 'sugestao_id'),)
+
 class SugestaoBase(SQLModel):
     id: int | None = Field(default = None, primary_key = True)
     descricao: str = Field(min_length = 3, max_length = 255)
@@ -84,17 +118,19 @@ class Sugestao(SugestaoBase, table=True):
     autor: 'User' = Relationship(back_populates = 'sugestoes_criadas')
 
     votantes: list['Sugestao_User'] = Relationship(back_populates = 'sugestao', cascade_delete = True)
-    
-    def upvotes(self):
-        return [ votante for votante in self.votantes if votante.voto == True ]
-    
-    @property
-    def upvotes_count(self):
-        return len(self.upvotes())
-    
-    def downvotes(self):
-        return [ votante for votante in self.votantes if votante.voto == False ]
-    
-    @property
-    def downvotes_count(self):
-        return len(self.downvotes())
+
+    # contadores de Sugestao_User, atualizados na mesma transação de cada voto
+    # (Sugestoes.votar); reconcile_votos.py os reconstrói a partir dos votos
+    upvotes_count: int   = Field(default = 0)
+    downvotes_count: int = Field(default = 0)
+
+    # wilson_score dos contadores, regravado junto com eles
+    score: float = Field(default = 0, sa_type = Double)
+
+    __table_args__ = (
+        # listagem por problema e status, ranqueada por score direto do índice
+        Index('ix_sugestao_problema_id_status_score', 'problema_id', 'status', 'score'),
+        Index('ix_sugestao_autor_id', 'autor_id'),
+        Index('ix_sugestao_upvotes_count', 'upvotes_count'),
+        Index('ix_sugestao_downvotes_count', 'downvotes_count'),
+    )
@@ -0,0 +1,43 @@
+import re
+
+from sqlalchemy import column, table
+from sqlalchemy.dialects.mysql import match
+
+from database.schemas.problemas import Problema
+
+'''
+''  Busca textual em Problema (titulo, enunciado)
+''
+''  MariaDB: índice FULLTEXT, MATCH ... AGAINST em boolean mode; acentos e
+''  maiúsculas são ignorados pela collation *_ci das colunas.
+''  SQLite: tabela virtual FTS5 'problema_fts' (tokenizer unicode61 com
+''  remove_diacritics), mantida por triggers. Ambas criadas em m0002.
+'''
+problema_fts = table('problema_fts', column('rowid'), column('rank'), column('problema_fts'))
+
+_term = re.compile(r'\w+', re.UNICODE)
+
+def search_terms(busca: str) -> list[str]:
+    '''Palavras da busca, sem operadores da sintaxe de cada backend.'''
+    return _term.findall(busca.lower())
+
+def apply_search(query, busca: str, dialect: str):
+    '''
+    Filtra 'query' (select de Problema) pelos termos de 'busca', todos
+    obrigatórios e com casamento por prefixo, e ordena por relevância.
+    '''
+    terms = search_terms(busca)
+    if not terms:
+        return query
+
+    if dialect == 'sqlite':
+        expression = ' '.join('"' + term + '"*' for term in terms)
+        return query.join(
+            problema_fts, problema_fts.c.rowid == Problema.id
+        ).where(
+            problema_fts.c.problema_fts.match(expression)
+        ).order_by(problema_fts.c.rank, Problema.id) # rank do FTS5 é bm25: menor é mais relevante
+
+    expression = ' '.join('+' + term + '*' for term in terms)
+    relevance = match(Problema.titulo, Problema.enunciado, against = expression).in_boolean_mode()
+    return query.where(relevance > 0).order_by(relevance.desc(), Problema.id)
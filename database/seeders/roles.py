@@ -1,21 +1,18 @@
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
 from database.schemas.users import Role
-from database.connection import Session, engine
-from sqlalchemy.exc import IntegrityError
 
 class RoleSeeder:
-    
-    def seed_db():    
-        admin  = Role(id = 3, display_name = "Administrador")
-        editor = Role(id = 2, display_name = "Editor")
-        leitor = Role(id = 1, display_name = "Leitor")
 
-        with Session(engine) as db:
-            try:
-                db.add(admin)
-                db.add(editor)
-                db.add(leitor)
-                db.commit()
-            except IntegrityError:
-                pass
-        
+    def seed_db(conn: Connection):
+        roles = [
+            { 'id': 3, 'display_name': "Administrador" },
+            { 'id': 2, 'display_name': "Editor" },
+            { 'id': 1, 'display_name': "Leitor" },
+        ]
 
+        existentes = set(conn.execute(select(Role.id)).scalars())
+        faltantes = [role for role in roles if role['id'] not in existentes]
+
+        if faltantes:
+            conn.execute(Role.__table__.insert(), faltantes)
@@ -3,71 +3,85 @@ from fastapi import HTTPException, status
 from typing import Callable
 
 # Database
-from .connection import DBSessionDep
+from .connection import AsyncDBSessionDep
+from .pagination import paginate
 from sqlmodel import SQLModel, select
 
 # Exceptions
 from sqlalchemy.exc import IntegrityError
 
-def upsert_row(
+async def upsert_row(
     model_instance: SQLModel,
-    db: DBSessionDep
+    db: AsyncDBSessionDep,
+    relations: list[str] | None = None,
 ) -> SQLModel:
     try:
         db.add(model_instance)
-        db.commit()
-        db.refresh(model_instance)
+        await db.commit()
+        await db.refresh(model_instance)
+
+        # relacionamentos precisam ser carregados explicitamente (sem lazy load em sessão assíncrona)
+        if relations:
+            await db.refresh(model_instance, attribute_names = relations)
     except IntegrityError:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail = "Registro em uso",
         )
     except:
         raise
-    
+
     return model_instance
 
-def delete_row(*,
+async def delete_row(*,
     model_instance: SQLModel,
-    db: DBSessionDep
+    db: AsyncDBSessionDep
 ) -> bool:
     try:
-        db.delete(model_instance)
-        db.commit()
+        await db.delete(model_instance)
+        await db.commit()
     except HTTPException:
         raise
 
     return True
 
-def get_index(*,
+async def get_index(*,
         model: Callable,
         skip: int = 0,
         limit: int = 100,
-        db: DBSessionDep,
+        cursor: str | None = None,
+        db: AsyncDBSessionDep,
+        options: list | None = None,
 )-> list[SQLModel | None]:
-    query = select(model).offset(skip).limit(limit)
-    model_data = db.exec(query)
+    query = paginate(select(model), model = model, cursor = cursor, skip = skip, limit = limit)
+    if options:
+        query = query.options(*options)
+
+    model_data = await db.exec(query)
 
-    return model_data
-    
-def get_by_id(*,
+    return model_data.all()
+
+async def get_by_id(*,
     model: Callable,
     id: int,
-    db: DBSessionDep
+    db: AsyncDBSessionDep,
+    options: list | None = None,
 ) -> SQLModel:
-    model_instance = db.get(model, id)
+    model_instance = await db.get(model, id, options = options)
 
     if model_instance is None:
         raise HTTPException(
                 status_code = status.HTTP_404_NOT_FOUND,
                 detail = f"Registro não encontrado!"
             )
-        
+
     return model_instance
 
 class ModelGetter:
-    def __init__(self, model: Callable):
+    def __init__(self, model: Callable, options: list | None = None):
         self.model = model
-    
-    def __call__(self, id: int, db: DBSessionDep):
-        return get_by_id(model = self.model, id = id, db = db)
\ No newline at end of file
+        self.options = options
+
+    async def __call__(self, id: int, db: AsyncDBSessionDep):
+        return await get_by_id(model = self.model, id = id, db = db, options = self.options)
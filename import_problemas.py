@@ -0,0 +1,57 @@
+'''
+Importa problemas de um arquivo local (JSONL ou CSV), o mesmo formato de
+POST /problemas/importar:
+
+    python import_problemas.py arquivo.jsonl --uploader admin
+    python import_problemas.py arquivo.csv --lote 2000
+
+JSONL: um objeto por linha com os campos de ProblemaCreate, 'evento'
+(título) e 'tags' (lista de nomes). CSV: mesmo cabeçalho, tags separadas
+por ';'. Tags e eventos precisam existir.
+'''
+import argparse
+import asyncio
+import json
+
+from sqlmodel import select
+
+from database.connection import async_engine, async_session_maker
+from database.schemas.users import User
+from apps.problemas.importacao import FORMATOS, formato_do_arquivo, ler
+from apps.problemas.utils import Problemas
+
+async def main(caminho: str, formato: str, uploader: str | None, lote: int):
+    async with async_session_maker() as db:
+        user = None
+        if uploader is not None:
+            user = (await db.exec(select(User).where(User.username == uploader))).first()
+            if user is None:
+                raise SystemExit(f"usuário não encontrado: {uploader}")
+
+        with open(caminho, 'rb') as arquivo:
+            resultado = await Problemas.importar(
+                linhas = ler(arquivo, formato),
+                uploader = user,
+                lote = lote,
+                db = db
+            )
+
+    await async_engine.dispose()
+
+    for erro in resultado['erros']:
+        print(json.dumps(erro, ensure_ascii = False))
+    print(f"inseridos: {resultado['inseridos']}, erros: {len(resultado['erros'])}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Importação de problemas em lote')
+    parser.add_argument('arquivo')
+    parser.add_argument('--formato', choices = FORMATOS, help = 'padrão: pela extensão do arquivo')
+    parser.add_argument('--uploader', help = 'username registrado como uploader dos problemas')
+    parser.add_argument('--lote', type = int, default = 1000, help = 'linhas por transação')
+    args = parser.parse_args()
+
+    formato = args.formato or formato_do_arquivo(args.arquivo)
+    if formato is None:
+        parser.error('não foi possível identificar o formato: use --formato')
+
+    asyncio.run(main(args.arquivo, formato, args.uploader, args.lote))
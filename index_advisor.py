@@ -0,0 +1,153 @@
+'''
+Advisor de índices: reexecuta com EXPLAIN os SELECTs gravados em
+DATABASE_QUERY_LOG e lista os que percorrem uma tabela inteira, com as
+colunas filtradas e os índices que a tabela já tem.
+
+    DATABASE_QUERY_LOG=queries.jsonl uvicorn main:app  # coleta (ou deixe no .env)
+    python index_advisor.py --log queries.jsonl        # análise
+
+Rode contra um banco com volume parecido com o de produção: em tabelas
+pequenas o otimizador prefere varrer a tabela mesmo havendo índice.
+'''
+import argparse
+import asyncio
+import json
+import re
+
+from sqlalchemy import inspect
+
+from config import settings
+from database.connection import async_engine
+
+_alias = re.compile(r'\b(?:FROM|JOIN)\s+`?(\w+)`?\s+(?:AS\s+)?`?(\w+)`?', re.IGNORECASE)
+_keywords = { 'WHERE', 'JOIN', 'LEFT', 'INNER', 'ON', 'ORDER', 'GROUP', 'LIMIT', 'UNION' }
+
+def load(path: str) -> list[dict]:
+    '''Uma entrada por formato (vários processos gravam no mesmo arquivo).'''
+    entries = {}
+    with open(path) as log:
+        for line in log:
+            if line.strip():
+                entry = json.loads(line)
+                entries.setdefault(entry['shape'], entry)
+    return list(entries.values())
+
+def aliases(statement: str) -> dict[str, str]:
+    '''alias -> tabela, para 'FROM problema AS problema_1' e afins.'''
+    return {
+        alias: table
+        for table, alias in _alias.findall(statement)
+        if alias.upper() not in _keywords
+    }
+
+def full_scans(dialect: str, plan: list[dict], statement: str, tables: set[str]) -> set[str]:
+    '''Tabelas reais lidas por inteiro segundo o plano.'''
+    names = aliases(statement)
+    scanned = set()
+    for row in plan:
+        if dialect == 'sqlite':
+            # 'SCAN problema' sem 'USING ... INDEX'; tabelas virtuais (FTS) ficam de fora
+            match = re.match(r'SCAN (\w+)(.*)', row['detail'])
+            if match is None or 'INDEX' in match.group(2) or 'VIRTUAL TABLE' in match.group(2):
+                continue
+            name = match.group(1)
+        else:
+            if row['type'] != 'ALL':
+                continue
+            name = row['table']
+
+        table = names.get(name, name)
+        if table in tables:
+            scanned.add(table)
+
+    return scanned
+
+def filtered_columns(statement: str, table: str) -> tuple[list[str], list[str]]:
+    '''
+    Colunas de 'table' comparadas no statement: (indexáveis, LIKE). LIKE com
+    '%' no início não usa índice em nenhum dos bancos.
+    '''
+    names = [table] + [alias for alias, name in aliases(statement).items() if name == table]
+    reference = r'`?(?:' + '|'.join(map(re.escape, names)) + r')`?\.`?(\w+)`?'
+
+    columns, like = [], []
+    for column, operator in re.findall(reference + r'\s*(=|<=|>=|<|>|!=|IN\b|BETWEEN\b|LIKE\b)', statement, re.IGNORECASE):
+        target = like if operator.upper() == 'LIKE' else columns
+        if column not in target:
+            target.append(column)
+
+    return columns, like
+
+async def explain(conn, entry: dict) -> list[dict]:
+    prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+    parameters = entry['parameters']
+    if isinstance(parameters, list):
+        parameters = tuple(parameters)
+
+    result = await conn.exec_driver_sql(prefix + entry['statement'], parameters)
+    return [dict(row) for row in result.mappings()]
+
+def schema_indexes(sync_conn) -> dict[str, list[tuple[str, list[str]]]]:
+    inspector = inspect(sync_conn)
+    indexes = {}
+    for table in inspector.get_table_names():
+        primary = inspector.get_pk_constraint(table)['constrained_columns']
+        indexes[table] = [('PRIMARY', primary)] if primary else []
+        indexes[table] += [(index['name'], index['column_names']) for index in inspector.get_indexes(table)]
+    return indexes
+
+async def run(path: str, limit: int):
+    entries = load(path)
+
+    async with async_engine.connect() as conn:
+        indexes = await conn.run_sync(schema_indexes)
+        dialect = conn.dialect.name
+
+        reports, skipped = [], 0
+        for entry in entries:
+            if entry['dialect'] != dialect or entry['paramstyle'] != conn.dialect.paramstyle:
+                skipped += 1
+                continue
+
+            try:
+                plan = await explain(conn, entry)
+            except Exception as error:
+                print(f"[erro] {entry['shape'][:limit]}\n    {error}")
+                continue
+
+            for table in sorted(full_scans(dialect, plan, entry['statement'], set(indexes))):
+                reports.append((table, entry))
+
+    for table, entry in reports:
+        columns, like = filtered_columns(entry['statement'], table)
+        leading = { index_columns[0] for _, index_columns in indexes[table] if index_columns }
+
+        print(f"[full scan] {table}")
+        print(f"    query:   {entry['shape'][:limit]}")
+        existing = ', '.join(name + '(' + ', '.join(index_columns) + ')' for name, index_columns in indexes[table])
+        print(f"    índices: {existing or '-'}")
+        if columns:
+            print(f"    filtros: {', '.join(columns)}")
+        if like:
+            print(f"    LIKE:    {', '.join(like)} (com '%' no início não usa índice)")
+
+        missing = [column for column in columns if column not in leading]
+        if missing:
+            print(f"    sugestão: CREATE INDEX ix_{table}_{'_'.join(missing)} ON {table} ({', '.join(missing)})")
+        elif columns:
+            print("    sugestão: há índice para os filtros; o otimizador preferiu varrer (tabela pequena ou filtro pouco seletivo?)")
+
+    print(f"\n{len(entries)} formatos lidos, {len(reports)} varreduras completas, {skipped} de outro banco/driver ignorados")
+
+    await async_engine.dispose()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'EXPLAIN dos SELECTs gravados e varreduras completas')
+    parser.add_argument('--log', default = settings.database.QUERY_LOG, help = 'arquivo gravado via DATABASE_QUERY_LOG')
+    parser.add_argument('--width', type = int, default = 200, help = 'caracteres da query exibidos')
+    args = parser.parse_args()
+
+    if not args.log:
+        parser.error('informe --log ou defina DATABASE_QUERY_LOG')
+
+    asyncio.run(run(args.log, args.width))
@@ -6,12 +6,16 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 # DB
-from database.connection import init_db, connect_db
-from database.seeders.roles import RoleSeeder
+from database.connection import connect_db, disconnect_db, engine, async_engine
+from database.migrations import schema_is_current, apply_pending
 
 # App
 from config import settings
 
+# Middlewares
+from database.instrumentation import QueryInstrumentationMiddleware
+from database.response_cache import ResponseCacheMiddleware
+
 # Dependencies
 
 # Models
@@ -22,18 +26,36 @@ from config import settings
 from apps.auth.routes import router as auth_router
 from apps.users.routes import router as users_router
 from apps.problemas.routes import router as problemas_router
+from apps.internal.routes import router as internal_router
 
 # Utils
+from apps.problemas.votos_buffer import vote_buffer
+from apps.problemas.duplicados import duplicate_index
 
 # import policies
 
-# Lifespan: linhas antes do 'yield' serão executadas on startup
+# Lifespan: linhas antes do 'yield' serão executadas on startup, linhas após on shutdown
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await connect_db()
-    init_db()
-    RoleSeeder.seed_db()
+
+    # DDL e seeders rodam uma vez por deploy (python migrate.py), não por worker
+    if not await schema_is_current(async_engine):
+        if not settings.database.AUTO_MIGRATE:
+            raise RuntimeError("Schema do banco desatualizado: execute 'python migrate.py'")
+
+        apply_pending(engine)
+
+    # índice de duplicados consultado pelo create: carregado em background
+    duplicate_index.recarregar_em_background()
+
+    # votos com escrita adiada: adota journals órfãos e inicia o flush periódico
+    if vote_buffer is not None:
+        await vote_buffer.start()
     yield
+    if vote_buffer is not None:
+        await vote_buffer.stop()
+    await disconnect_db()
 
 # init
 app = FastAPI(lifespan = lifespan)
@@ -45,12 +67,22 @@ app.add_middleware(
     allow_credentials = True, # permite cookies
     allow_methods     = ['*'], # lista de metodos HTTP permitidos 
     allow_headers     = ['*'], # lista de headers HTTP permitidos
+    expose_headers    = ['X-Next-Cursor', 'X-Total-Count', 'X-Total-Count-Estimated', 'Server-Timing', 'ETag'], # headers de resposta legíveis pelo cliente
 )
 
+# Cache de respostas GET (ETag / 304); rotas registradas em apps/*/routes.py
+if settings.RESPONSE_CACHE:
+    app.add_middleware(ResponseCacheMiddleware)
+
+# Queries por requisição (Server-Timing / N+1)
+if settings.database.INSTRUMENTATION:
+    app.add_middleware(QueryInstrumentationMiddleware)
+
 # Routers
 app.include_router(auth_router)
 app.include_router(users_router)
 app.include_router(problemas_router)
+app.include_router(internal_router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,25 @@
+'''
+Aplica as migrations pendentes. Executar uma vez por deploy, antes de subir os workers:
+
+    python migrate.py           # aplica pendentes
+    python migrate.py --status  # apenas mostra a versão
+'''
+import argparse
+import asyncio
+import logging
+
+from database.connection import engine, async_engine
+from database.migrations import LATEST_VERSION, apply_pending, schema_is_current
+
+logging.basicConfig(level = logging.INFO)
+
+parser = argparse.ArgumentParser(description = 'Migrations do banco')
+parser.add_argument('--status', action = 'store_true', help = 'mostra se o schema está atualizado')
+args = parser.parse_args()
+
+if args.status:
+    current = asyncio.run(schema_is_current(async_engine))
+    print(f"versão mais recente: {LATEST_VERSION}; schema {'atualizado' if current else 'com migrations pendentes'}")
+else:
+    applied = apply_pending(engine)
+    print(f"migrations aplicadas: {applied}" if applied else "nenhuma migration pendente")
@@ -0,0 +1,9 @@
+from database.schemas.users import User, RoleEnum
+
+def before(current_user: User, ability: str):
+	if current_user.has_role(RoleEnum.admin):
+		return True
+	return None
+
+def read(current_user: User | None):
+	return False
@@ -17,6 +17,10 @@ def update(current_user: User, problema: Problema | None = None):
 		return True # pode acessar a rota
 	return False
 
+def update_any(current_user: User):
+	# alterar problemas de qualquer uploader (operações em lote): apenas admin, via before
+	return False
+
 def delete(current_user: User, problema: Problema | None = None):
 	if current_user.has_role_or_higher(RoleEnum.editor):
 		if problema is not None:
@@ -6,7 +6,7 @@ from fastapi import Depends, status, HTTPException
 from apps.auth.utils import get_current_active_user
 from database.schemas.users import User
 
-from policies import user_policy, role_policy, problema_policy, evento_policy, tag_policy, sugestao_policy
+from policies import user_policy, role_policy, problema_policy, evento_policy, tag_policy, sugestao_policy, internal_policy
     
 def _inspect_permission(
     model: str,
@@ -25,6 +25,14 @@ def _inspect_permission(
     ability_check = getattr(policy_class, ability)
     return ability_check(current_user = user, **kwargs)
 
+def has_permission(
+    model: str,
+    ability: str,
+    user: User,
+    **kwargs
+) -> bool:
+    return bool(_inspect_permission(model = model, ability = ability, user = user, **kwargs))
+
 def check_permissions(
     model: str,
     ability: str,
@@ -0,0 +1,22 @@
+'''
+Reconstrói os contadores de votos das sugestões (upvotes_count e
+downvotes_count) a partir de sugestao_user, e o score que depende deles. Os contadores são mantidos a
+cada voto; rode após escritas fora da API ou periodicamente (cron):
+
+    python reconcile_votos.py
+'''
+import asyncio
+
+from database.connection import async_engine, async_session_maker
+from apps.problemas.utils import Sugestoes
+
+async def main():
+    async with async_session_maker() as db:
+        corrigidas = await Sugestoes.reconciliar_votos(db = db)
+
+    await async_engine.dispose()
+
+    print(f"sugestões corrigidas: {corrigidas}")
+
+if __name__ == '__main__':
+    asyncio.run(main())
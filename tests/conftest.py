@@ -0,0 +1,83 @@
+import os
+import sqlite3
+import sys
+import tempfile
+
+import pytest
+
+'''
+''  Ambiente de testes
+''
+''  SQLite em arquivos temporários: um primário e uma "réplica" que só
+''  recebe os dados quando o teste chama sincronizar_replica(), como uma
+''  réplica atrasada. Definido antes de importar config/main.
+'''
+DIRETORIO = tempfile.mkdtemp(prefix = 'copedex-tests-')
+PRIMARIO = os.path.join(DIRETORIO, 'primario.db')
+REPLICA = os.path.join(DIRETORIO, 'replica.db')
+
+os.environ.update(
+    DATABASE_CONNECTOR = 'sqlite',
+    DATABASE_ASYNC_CONNECTOR = 'sqlite+aiosqlite',
+    DATABASE_DB_NAME = PRIMARIO,
+    DATABASE_REPLICA_URLS = 'sqlite+aiosqlite:///' + REPLICA,
+    DATABASE_HOST = '',
+    DATABASE_PORT = '',
+    DATABASE_USER = '',
+    DATABASE_PASSWORD = '',
+    DATABASE_AUTO_MIGRATE = 'true',
+    SECRET_KEY = 'chave-de-teste-' + 'x' * 32,
+    ALGORITHM = 'HS256',
+    ACCESS_TOKEN_EXPIRE_MINUTES = '30',
+    DEBUG = 'false',
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+def sincronizar_replica():
+    '''Copia o primário para a réplica: o que for escrito depois só existe no primário.'''
+    origem, destino = sqlite3.connect(PRIMARIO), sqlite3.connect(REPLICA)
+    try:
+        origem.backup(destino)
+    finally:
+        origem.close()
+        destino.close()
+
+@pytest.fixture(scope = 'session')
+def client():
+    import main
+    from apps.auth.utils import get_password_hash
+    from database.connection import async_session_maker
+    from database.schemas.users import User, RoleEnum
+
+    with TestClient(main.app) as client:
+        async def usuarios():
+            async with async_session_maker() as db:
+                for username, role in (('admin', RoleEnum.admin), ('leitor', RoleEnum.leitor)):
+                    db.add(User(username = username, password = get_password_hash(username).decode(), role_id = role.value))
+                await db.commit()
+
+        client.portal.call(usuarios)
+        sincronizar_replica()
+        yield client
+
+def headers(client: TestClient, username: str) -> dict:
+    response = client.post('/auth/signin', data = { 'username': username, 'password': username })
+    assert response.status_code == 200, response.text
+    return { 'Authorization': 'Bearer ' + response.json()['access_token'] }
+
+@pytest.fixture
+def admin(client) -> dict:
+    return headers(client, 'admin')
+
+@pytest.fixture
+def leitor(client) -> dict:
+    return headers(client, 'leitor')
+
+@pytest.fixture(autouse = True)
+def sem_escritores_recentes():
+    # cada teste começa lendo da réplica
+    from database.routing import recent_writers
+    recent_writers._expires_at.clear()
+    yield
@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import apps.problemas.duplicados as duplicados
+from apps.problemas.duplicados import DuplicateIndex, REPRESENTANTES_POR_BUCKET
+
+'''
+''  Duplicados: clusters() compara cada membro de um bucket só com os
+''  representantes, e o create não espera o índice ser carregado.
+'''
+def test_clusters_bucket_grande(monkeypatch):
+    chamadas = 0
+    estimate = duplicados.estimate
+
+    def contar(a, b):
+        nonlocal chamadas
+        chamadas += 1
+        return estimate(a, b)
+
+    monkeypatch.setattr(duplicados, 'estimate', contar)
+
+    index = DuplicateIndex(ttl = 60)
+    # 2000 textos iguais: um bucket de 2000 em cada banda
+    linhas = [(id, 'soma de dois inteiros', 'leia a e b e imprima a soma') for id in range(1, 2001)]
+    linhas.append((3000, 'caminho minimo em grafos', 'dijkstra a partir do vertice um ate o vertice n'))
+    index.index = index._build(linhas)
+
+    assert index.clusters() == [list(range(1, 2001))]
+    assert chamadas <= len(linhas) * index.bands * REPRESENTANTES_POR_BUCKET
+
+def test_agrupamento_transitivo(monkeypatch):
+    # 2 e 3 parecem com 1, mas não entre si: ficam no mesmo grupo
+    parecidos = { frozenset((1, 2)), frozenset((1, 3)) }
+    monkeypatch.setattr(duplicados, 'estimate', lambda a, b: 1.0 if frozenset((a, b)) in parecidos else 0.0)
+
+    class Index:
+        signatures = { 1: 1, 2: 2, 3: 3, 4: 4 }
+        def groups(self):
+            return [{ 1, 2, 3, 4 }]
+
+    index = DuplicateIndex(ttl = 60)
+    index.index = Index()
+    assert index.clusters() == [[1, 2, 3]]
+
+def test_create_nao_espera_o_indice(monkeypatch):
+    from apps.problemas.utils import Problemas
+    from database.schemas.problemas import Problema
+
+    index = DuplicateIndex(ttl = 60)
+    monkeypatch.setattr('apps.problemas.utils.duplicate_index', index)
+
+    async def recarregar():
+        await asyncio.sleep(3600)
+
+    async def criar():
+        monkeypatch.setattr(index, '_recarregar', recarregar)
+        problema = Problema(id = 1, titulo = 'soma', enunciado = 'some dois inteiros', categoria = 'testes')
+        resultado = await asyncio.wait_for(Problemas.duplicados(problema = problema, esperar = False, db = None), 1)
+        agendada = index._recarga is not None
+        index._recarga.cancel()
+        return resultado, agendada
+
+    assert asyncio.run(criar()) == ([], True)
+
+def test_escritas_durante_a_reconstrucao_sao_reaplicadas(monkeypatch):
+    index = DuplicateIndex(ttl = 60)
+    build = index._build
+
+    def build_lento(linhas):
+        time.sleep(0.2)
+        return build(linhas)
+
+    monkeypatch.setattr(index, '_build', build_lento)
+
+    class Sessao:
+        info = {}
+        async def exec(self, query):
+            class Resultado:
+                def all(self):
+                    return [(1, 'soma de dois inteiros', 'leia a e b'), (2, 'caminho minimo', 'dijkstra')]
+            return Resultado()
+
+    async def reconstruir():
+        recarga = asyncio.create_task(index.ensure_loaded(Sessao()))
+        await asyncio.sleep(0.05)
+        # create e delete deste worker enquanto o _build roda na thread
+        index.set_problema(3, 'soma de dois inteiros', 'leia a e b')
+        index.remove_problema(2)
+        await recarga
+
+    asyncio.run(reconstruir())
+    assert Sessao.info['primary'] is True
+    assert set(index.index.signatures) == { 1, 3 }
+    assert index._pendentes is None
+
+def test_create_com_indice_vencido_ve_o_anterior(client, admin):
+    from apps.problemas.duplicados import duplicate_index
+    from test_read_your_writes import criar_problema
+
+    # índice vencido: o create de A agenda a reconstrução; a réplica ainda não tem A
+    duplicate_index.loaded_at = time.monotonic() - duplicate_index.ttl - 1
+    a = criar_problema(client, admin, 'problema reenviado com o mesmo enunciado')
+
+    async def esperar_recarga():
+        if duplicate_index._recarga is not None:
+            await duplicate_index._recarga
+
+    client.portal.call(esperar_recarga)
+    b = criar_problema(client, admin, 'problema reenviado com o mesmo enunciado')
+    assert a['id'] in [duplicado['id'] for duplicado in b['duplicados']]
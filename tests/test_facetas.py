@@ -0,0 +1,24 @@
+from apps.problemas.facetas import facetas_cache
+
+'''
+''  Facetas: parâmetros que não filtram não separam entradas do cache.
+'''
+def test_chave_so_com_filtros(client, leitor):
+    facetas_cache.clear()
+
+    for params in ({ 'categoria': 'testes' }, { 'categoria': 'testes', 'total': True, 'fields': 'id,titulo', 'resumo': True, 'limit': 5 }):
+        response = client.get('/problemas/facetas', params = params, headers = leitor)
+        assert response.status_code == 200, response.text
+
+    assert len(facetas_cache._entries) == 1
+
+    client.get('/problemas/facetas', params = { 'categoria': 'outra' }, headers = leitor)
+    assert len(facetas_cache._entries) == 2
+
+def test_todo_filtro_novo_entra_na_chave():
+    from apps.problemas.facetas import FACETAS_FILTROS
+    from apps.problemas.models.requests import ProblemaListQueryParams
+
+    # um filtro fora da chave devolveria facetas de outra consulta
+    sem_efeito = { 'skip', 'limit', 'cursor', 'total', 'ordenar', 'fields', 'resumo' }
+    assert set(ProblemaListQueryParams.model_fields) - sem_efeito == FACETAS_FILTROS
@@ -0,0 +1,39 @@
+import os
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+
+from conftest import DIRETORIO
+from database.migrations import LATEST_VERSION, apply_pending, schema_differences
+
+'''
+''  Migrations: o banco só é marcado como atualizado se tiver as tabelas,
+''  colunas e índices dos modelos, inclusive quando já existia antes delas.
+'''
+def banco(nome: str, *ddl: str):
+    caminho = os.path.join(DIRETORIO, nome)
+    conn = sqlite3.connect(caminho)
+    for comando in ddl:
+        conn.execute(comando)
+    conn.commit()
+    conn.close()
+    return create_engine('sqlite:///' + caminho)
+
+def versao(engine) -> int | None:
+    with engine.connect() as conn:
+        return conn.exec_driver_sql("SELECT max(version) FROM schema_version").scalar()
+
+def test_banco_novo():
+    engine = banco('novo.db')
+    assert apply_pending(engine)[-1] == LATEST_VERSION
+    with engine.connect() as conn:
+        assert schema_differences(conn) == []
+
+def test_schema_inicial_parcial_nao_e_marcado():
+    # criação interrompida antes das migrations: problema sem metade das colunas
+    engine = banco('parcial.db', "CREATE TABLE problema (id INTEGER PRIMARY KEY, titulo VARCHAR(255) NOT NULL)")
+
+    with pytest.raises(RuntimeError, match = 'problema.enunciado'):
+        apply_pending(engine)
+    assert versao(engine) is None
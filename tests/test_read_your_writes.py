@@ -0,0 +1,65 @@
+from conftest import sincronizar_replica
+from database.response_cache import response_cache
+from database.routing import recent_writers
+
+'''
+''  Read-your-writes: depois de escrever (inclusive por insert/update/delete
+''  direto, sem flush do ORM) o usuário lê do primário, não da réplica.
+'''
+def criar_problema(client, admin, titulo: str) -> dict:
+    response = client.post('/problemas/', json = { 'problema': { 'titulo': titulo, 'enunciado': 'enunciado ' + titulo, 'categoria': 'testes' } }, headers = admin)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_voto_lido_de_volta(client, admin, leitor):
+    problema = criar_problema(client, admin, 'problema do voto')
+    sugestao = client.post(f"/problemas/{problema['id']}/sugestoes", json = { 'descricao': 'melhorar' }, headers = admin).json()
+    sincronizar_replica()
+    recent_writers._expires_at.clear()
+
+    response = client.post(f"/sugestoes/{sugestao['id']}/votar", params = { 'voto': True }, headers = leitor)
+    assert response.status_code == 200, response.text
+    assert recent_writers.is_recent('leitor')
+
+    # a réplica ainda tem 0/0
+    assert client.get(f"/sugestoes/{sugestao['id']}/votos", headers = leitor).json() == { 'upvotes': 1, 'downvotes': 0 }
+
+def test_tags_em_lote_lidas_de_volta(client, admin):
+    problema = criar_problema(client, admin, 'problema das tags em lote')
+    tag = client.post('/tags/', json = { 'nome': 'tag em lote' }, headers = admin).json()
+    sincronizar_replica()
+    recent_writers._expires_at.clear()
+
+    response = client.post('/problemas/atribuir_tags', json = { 'tags': [tag['id']], 'problemas': [problema['id']] }, headers = admin)
+    assert response.status_code == 200, response.text
+    assert recent_writers.is_recent('admin')
+
+    tags = client.get(f"/problemas/{problema['id']}", headers = admin).json()['tags']
+    assert [t['id'] for t in tags] == [tag['id']]
+
+def test_importacao_lida_de_volta(client, admin):
+    sincronizar_replica()
+    recent_writers._expires_at.clear()
+
+    arquivo = b'{"titulo": "problema importado", "enunciado": "enunciado importado", "categoria": "testes"}\n'
+    response = client.post('/problemas/importar', files = { 'arquivo': ('problemas.jsonl', arquivo) }, headers = admin)
+    assert response.status_code == 200, response.text
+    assert response.json()['inseridos'] == 1
+    assert recent_writers.is_recent('admin')
+
+    titulos = [p['titulo'] for p in client.get('/problemas/', params = { 'titulo': 'problema importado' }, headers = admin).json()]
+    assert titulos == ['problema importado']
+
+def test_cache_de_respostas_apos_patch(client, admin, leitor):
+    problema = criar_problema(client, admin, 'problema do patch')
+    sincronizar_replica()
+    recent_writers._expires_at.clear()
+    assert client.get(f"/problemas/{problema['id']}", headers = leitor).json()['titulo'] == 'problema do patch'
+
+    response = client.patch(f"/problemas/{problema['id']}", json = { 'problema_update': { 'titulo': 'titulo novo' } }, headers = admin)
+    assert response.status_code == 200, response.text
+
+    # leitor ainda lê a réplica atrasada: a resposta dele não pode ir para o cache
+    assert client.get(f"/problemas/{problema['id']}", headers = leitor).json()['titulo'] == 'problema do patch'
+    assert response_cache.lookup(response_cache.key(f"/problemas/{problema['id']}", '')) is None
+    assert client.get(f"/problemas/{problema['id']}", headers = admin).json()['titulo'] == 'titulo novo'
@@ -0,0 +1,28 @@
+import jwt
+
+from config import settings
+from database.routing import RoutingSession, request_identity
+
+'''
+''  Roteamento: uma réplica por sessão e identidade só de token válido.
+'''
+def test_replica_fixa_na_sessao(monkeypatch):
+    monkeypatch.setattr(RoutingSession, 'primary', 'primario')
+    monkeypatch.setattr(RoutingSession, 'replicas', [f'replica {i}' for i in range(8)])
+
+    for _ in range(20):
+        session = RoutingSession()
+        assert len({ session.get_bind() for _ in range(50) }) == 1
+
+    session.info['primary'] = True
+    assert session.get_bind() == 'primario'
+
+def test_identidade_de_token_verificado():
+    valido = jwt.encode({ 'sub': 'leitor' }, settings.auth.SECRET_KEY, algorithm = settings.auth.ALGORITHM)
+    forjado = jwt.encode({ 'sub': 'admin' }, 'outra-chave-' + 'x' * 32, algorithm = settings.auth.ALGORITHM)
+    expirado = jwt.encode({ 'sub': 'leitor', 'exp': 1 }, settings.auth.SECRET_KEY, algorithm = settings.auth.ALGORITHM)
+
+    assert request_identity('Bearer ' + valido) == 'leitor'
+    assert request_identity('Bearer ' + forjado) is None
+    assert request_identity('Bearer ' + expirado) is None
+    assert request_identity(None) is None
@@ -0,0 +1,88 @@
+import asyncio
+import random
+import time
+
+from apps.problemas.similares import SimilarIndex
+
+'''
+''  Problemas similares: o LSH precisa devolver poucos candidatos, não o
+''  catálogo inteiro (categoria e dificuldade repetidas não entram na
+''  assinatura).
+'''
+CATALOGO = 5000
+
+def indice() -> SimilarIndex:
+    rng = random.Random(7)
+    tags, linhas = [], []
+    for id in range(1, CATALOGO + 1):
+        linhas.append((id, rng.choice(('grafos', 'strings')), rng.choice(('facil', 'medio', 'dificil'))))
+        tags.extend((tag_id, id) for tag_id in rng.sample(range(300), rng.randint(2, 5)))
+
+    # par plantado: mesmas tags, mesma categoria
+    linhas.append((CATALOGO + 1, 'grafos', 'medio'))
+    linhas.append((CATALOGO + 2, 'grafos', 'medio'))
+    tags.extend((tag_id, id) for tag_id in (1, 2, 3, 4) for id in (CATALOGO + 1, CATALOGO + 2))
+
+    similares = SimilarIndex(ttl = 60)
+    similares.index, similares.problemas, similares.categorias = similares._build(tags, linhas)
+    return similares
+
+def test_candidatos_bem_abaixo_do_catalogo():
+    similares = indice()
+
+    tamanhos = [
+        len(similares.index.candidates(similares.index.signatures[id]))
+        for id in range(1, CATALOGO + 1, 50)
+    ]
+    assert max(tamanhos) < CATALOGO * 0.05, max(tamanhos)
+    assert sum(tamanhos) / len(tamanhos) < CATALOGO * 0.01
+
+def test_par_plantado_no_topo():
+    similares = indice()
+    assert similares.top(CATALOGO + 1, k = 1)[0][0] == CATALOGO + 2
+
+def test_sem_tags_usa_a_categoria():
+    similares = indice()
+    similares.set_problema(CATALOGO + 3, 'Grafos', 'medio', [])
+
+    candidatos = similares.candidatos(CATALOGO + 3, k = 5)
+    assert candidatos and len(candidatos) <= 100
+    assert all(similares.problemas[id][0] == 'grafos' for id in candidatos)
+
+def test_escritas_durante_a_reconstrucao_sao_reaplicadas(monkeypatch):
+    similares = SimilarIndex(ttl = 60)
+    build = similares._build
+
+    def build_lento(tags, linhas):
+        time.sleep(0.2)
+        return build(tags, linhas)
+
+    monkeypatch.setattr(similares, '_build', build_lento)
+
+    class Sessao:
+        info = {}
+        consultas = iter((
+            [(1, 1), (2, 1), (1, 2)],
+            [(1, 'grafos', 'medio'), (2, 'grafos', 'facil')],
+        ))
+        async def exec(self, query):
+            linhas = next(self.consultas)
+            class Resultado:
+                def all(self):
+                    return linhas
+            return Resultado()
+
+    async def reconstruir():
+        recarga = asyncio.create_task(similares.ensure_loaded(Sessao()))
+        await asyncio.sleep(0.05)
+        # create e atribuição de tags deste worker enquanto o _build roda na thread
+        similares.set_problema(3, 'grafos', 'medio', [1, 2])
+        similares.attach(2, [2])
+        similares.remove_problema(1)
+        await recarga
+
+    asyncio.run(reconstruir())
+    assert Sessao.info['primary'] is True
+    assert set(similares.problemas) == { 2, 3 }
+    assert similares.problemas[2][2] == { 1, 2 }
+    assert similares.top(3, k = 1)[0][0] == 2
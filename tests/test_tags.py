@@ -0,0 +1,51 @@
+from sqlalchemy import delete
+
+import apps.problemas.utils as utils
+from conftest import sincronizar_replica
+from test_read_your_writes import criar_problema
+
+'''
+''  Filtro de tags: a página tirada do bitmap não pode terminar antes da hora
+''  quando o índice está desatualizado, e bitmaps grandes viram subquery.
+'''
+def problemas_com_tag(client, admin, nome: str, quantidade: int) -> list[int]:
+    tag = client.post('/tags/', json = { 'nome': nome }, headers = admin).json()
+    ids = [criar_problema(client, admin, f'{nome} {i}')['id'] for i in range(quantidade)]
+    response = client.post('/problemas/atribuir_tags', json = { 'tags': [tag['id']], 'problemas': ids }, headers = admin)
+    assert response.status_code == 200, response.text
+    return ids
+
+def listar(client, headers, **params) -> list[int]:
+    response = client.get('/problemas/', params = params, headers = headers)
+    assert response.status_code == 200, response.text
+    return [problema['id'] for problema in response.json()]
+
+def test_bitmap_desatualizado_nao_encurta_a_pagina(client, admin, leitor):
+    from database.connection import async_session_maker
+    from database.schemas.problemas import Problema_Tag
+
+    ids = problemas_com_tag(client, admin, 'desatualizada', 4)
+    sincronizar_replica()
+    assert listar(client, leitor, tags = 'desatualizada', limit = 2) == ids[:2]
+
+    # outro worker desvincula o primeiro: o índice deste não fica sabendo
+    async def desvincular():
+        async with async_session_maker() as db:
+            await db.exec(delete(Problema_Tag).where(Problema_Tag.problema_id == ids[0]))
+            await db.commit()
+
+    client.portal.call(desvincular)
+    sincronizar_replica()
+
+    assert listar(client, leitor, tags = 'desatualizada', limit = 2) == ids[1:3]
+
+def test_bitmap_grande_vira_subquery(client, admin, leitor, monkeypatch):
+    ids = problemas_com_tag(client, admin, 'subquery', 3)
+    sincronizar_replica()
+
+    esperado = listar(client, leitor, tags_expr = 'subquery & !desatualizada', ordenar = 'titulo')
+    assert sorted(esperado) == ids
+
+    monkeypatch.setattr(utils, 'MAX_IDS_IN', 0)
+    assert listar(client, leitor, tags_expr = 'subquery & !desatualizada', ordenar = 'titulo') == esperado
+    assert listar(client, leitor, tags_expr = 'subquery', titulo = 'subquery 1') == [ids[1]]
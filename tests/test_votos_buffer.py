@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os
+import tempfile
+
+import pytest
+
+from apps.problemas.utils import Sugestoes
+from apps.problemas.votos_buffer import VoteBuffer
+
+'''
+''  Buffer de votos: journal adotado depois de uma queda e lote devolvido à
+''  fila quando o flush falha.
+'''
+@pytest.fixture
+def gravados(monkeypatch) -> list[dict]:
+    lotes = []
+
+    async def votar_lote(*, votos, db):
+        lotes.append(dict(votos))
+        return len(votos)
+
+    monkeypatch.setattr(Sugestoes, 'votar_lote', votar_lote)
+    return lotes
+
+def buffer(diretorio: str) -> VoteBuffer:
+    # intervalo longo: só flushes explícitos
+    return VoteBuffer(diretorio = diretorio, max_pendentes = 100, intervalo = 3600)
+
+def test_journal_orfao_e_adotado(gravados):
+    diretorio = tempfile.mkdtemp(prefix = 'votos-')
+    orfao = os.path.join(diretorio, 'votos-999999.jsonl')
+    with open(orfao, 'w') as journal:
+        journal.write(json.dumps([1, 10, True, 100.0]) + '\n')
+        journal.write(json.dumps([1, 10, False, 200.0]) + '\n') # o mais recente vence
+        journal.write(json.dumps([2, 10, True, 150.0]) + '\n')
+        journal.write('[3, 10, tr') # worker morreu no meio da linha
+
+    async def reiniciar():
+        votos = buffer(diretorio)
+        await votos.start()
+        assert votos.pendentes.keys() == { (1, 10), (2, 10) }
+        assert not os.path.exists(orfao)
+        await votos.stop()
+
+    asyncio.run(reiniciar())
+    assert gravados == [{ (1, 10): False, (2, 10): True }]
+    assert os.listdir(diretorio) == []
+
+def test_flush_que_falha_mantem_os_votos(gravados, monkeypatch):
+    diretorio = tempfile.mkdtemp(prefix = 'votos-')
+
+    async def queda():
+        votos = buffer(diretorio)
+        await votos.start()
+
+        async def falhar(**kwargs):
+            # voto novo do mesmo usuário chega enquanto o lote está em voo
+            await votos.add(1, 10, False)
+            raise ConnectionError('banco fora')
+
+        await votos.add(1, 10, True)
+        await votos.add(2, 10, False)
+
+        with monkeypatch.context() as m:
+            m.setattr(Sugestoes, 'votar_lote', falhar)
+            await votos.flush()
+
+        # o lote volta para a fila sem sobrescrever o voto mais novo
+        assert votos.pendentes.keys() == { (1, 10), (2, 10) }
+        assert votos.voto_pendente(1, 10) is False
+        assert votos.voto_pendente(2, 10) is False
+
+        # queda: o processo morre sem stop(); o journal continua no disco
+        votos._loop_task.cancel()
+        votos._journal.close()
+
+    asyncio.run(queda())
+    assert gravados == []
+
+    async def reiniciar():
+        votos = buffer(diretorio)
+        await votos.start()
+        await votos.flush()
+        await votos.stop()
+
+    asyncio.run(reiniciar())
+    assert gravados == [{ (1, 10): False, (2, 10): False }]
+
+def test_listagens_mostram_o_voto_pendente(client, admin, leitor, monkeypatch):
+    import apps.problemas.routers.problemas as rotas_problemas
+    import apps.problemas.routers.sugestoes as rotas_sugestoes
+    from test_read_your_writes import criar_problema
+
+    problema = criar_problema(client, admin, 'problema do voto pendente')
+    sugestao = client.post(f"/problemas/{problema['id']}/sugestoes", json = { 'descricao': 'melhorar' }, headers = admin).json()
+
+    votos = buffer(tempfile.mkdtemp(prefix = 'votos-'))
+    monkeypatch.setattr(rotas_problemas, 'vote_buffer', votos)
+    monkeypatch.setattr(rotas_sugestoes, 'vote_buffer', votos)
+    client.portal.call(votos.start)
+    try:
+        response = client.post(f"/sugestoes/{sugestao['id']}/votar", params = { 'voto': True }, headers = leitor)
+        assert response.status_code == 200, response.text
+
+        for rota, params in (('/sugestoes/', { 'problema_id': problema['id'] }), (f"/problemas/{problema['id']}/sugestoes", {})):
+            listada, = client.get(rota, params = params, headers = leitor).json()
+            assert (listada['upvotes_count'], listada['downvotes_count']) == (1, 0), rota
+            assert listada['score'] == response.json()['score'] > 0
+
+            # os outros usuários só veem o voto depois do flush
+            listada, = client.get(rota, params = params, headers = admin).json()
+            assert listada['upvotes_count'] == 0
+    finally:
+        client.portal.call(votos.stop)